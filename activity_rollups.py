@@ -0,0 +1,301 @@
+"""
+ACTIVITY ROLLUPS
+================
+Per-day activity aggregates, so admin analytics, weekly challenges and the
+online counter read a handful of small rows instead of scanning
+quiz_attempts / guest_quiz_attempts with DATE(completed_at) filters.
+
+Three tables, each holding quizzes, questions, correct answers, points,
+high scores (>= HIGH_SCORE_PERCENTAGE) and the sum of percentages:
+
+- activity_daily_learner: one row per learner per day ('user:<id>' or
+  'guest:<code>', the same owner keys as spend_engine), with last_at
+- activity_daily_class:   one row per class per day
+- activity_daily:         one row per day per learner type ('user' /
+  'guest'), with the number of distinct learners active that day
+
+record_attempt() adds one submitted quiz to all three inside the caller's
+transaction - it never commits. backfill() rebuilds them from the raw
+attempt tables, e.g. after creating them or to repair a range of days.
+
+Both follow the same rules, so a backfill gives the same numbers as the
+incremental updates:
+- Only completed attempts count (total_questions > 0) - not the empty rows
+  created when a registered student starts a quiz
+- points = score + who_am_i_bonus (+ milestone_points for guests)
+- A class's rows count its students' attempts while they were enrolled;
+  backfill() can only use current enrolments
+
+Create the tables with migrate_activity_rollups.py. Until then
+record_attempt() does nothing and available() is False.
+"""
+
+from datetime import datetime, date, timedelta
+
+from sqlalchemy import text, inspect, bindparam
+
+HIGH_SCORE_PERCENTAGE = 80
+
+METRICS = ('quizzes', 'questions', 'correct', 'points', 'high_scores', 'percentage_sum')
+
+_tables = {'exists': None}
+
+
+def learner_key(user_id=None, guest_code=None):
+    return f'guest:{guest_code}' if guest_code else f'user:{user_id}'
+
+
+def available(db):
+    if _tables['exists'] is None:
+        _tables['exists'] = inspect(db.engine).has_table('activity_daily_learner')
+        if not _tables['exists']:
+            print("⚠️ Activity rollup tables missing - run migrate_activity_rollups.py")
+    return _tables['exists']
+
+
+def _metric_sql():
+    """SET clause adding :quizzes, :questions, ... to the current values"""
+    return ', '.join(f"{m} = {m} + :{m}" for m in METRICS)
+
+
+def _totals(row):
+    totals = {m: (getattr(row, m, 0) or 0) if row is not None else 0 for m in METRICS}
+    totals['percentage_sum'] = float(totals['percentage_sum'])
+    totals['average_percentage'] = round(totals['percentage_sum'] / totals['quizzes'], 2) if totals['quizzes'] else 0
+    return totals
+
+
+def record_attempt(db, score, total_questions, percentage=None, bonus=0, user_id=None,
+                   guest_code=None, class_ids=(), completed_at=None):
+    """
+    Add one submitted quiz to the rollups (in the caller's transaction).
+    percentage defaults to score / total_questions; bonus is any points on
+    top of the score. class_ids are the classes the student is enrolled in.
+    """
+    if not total_questions or not available(db):
+        return
+
+    completed_at = completed_at or datetime.utcnow()
+    percentage = score * 100.0 / total_questions if percentage is None else float(percentage)
+    values = {
+        'quizzes': 1,
+        'questions': total_questions,
+        'correct': score,
+        'points': score + (bonus or 0),
+        'high_scores': 1 if percentage >= HIGH_SCORE_PERCENTAGE else 0,
+        'percentage_sum': percentage,
+    }
+    day = completed_at.date()
+    learner = learner_key(user_id, guest_code)
+
+    # Insert-if-missing then add: the insert's row count tells us whether
+    # this is the learner's first quiz of the day, and concurrent submits
+    # both land on the same row.
+    first_today = db.session.execute(text("""
+        INSERT INTO activity_daily_learner (learner, day, user_id, guest_code, quizzes, questions,
+                                            correct, points, high_scores, percentage_sum, last_at)
+        VALUES (:learner, :day, :user_id, :guest_code, 0, 0, 0, 0, 0, 0, :at)
+        ON CONFLICT (learner, day) DO NOTHING
+    """), {'learner': learner, 'day': day, 'user_id': None if guest_code else user_id,
+           'guest_code': guest_code, 'at': completed_at}).rowcount
+    db.session.execute(text(f"""
+        UPDATE activity_daily_learner
+        SET {_metric_sql()},
+            last_at = CASE WHEN last_at IS NULL OR last_at < :at THEN :at ELSE last_at END
+        WHERE learner = :learner AND day = :day
+    """), {**values, 'learner': learner, 'day': day, 'at': completed_at})
+
+    db.session.execute(text("""
+        INSERT INTO activity_daily (day, learner_type, learners, quizzes, questions, correct,
+                                    points, high_scores, percentage_sum)
+        VALUES (:day, :type, 0, 0, 0, 0, 0, 0, 0)
+        ON CONFLICT (day, learner_type) DO NOTHING
+    """), {'day': day, 'type': 'guest' if guest_code else 'user'})
+    db.session.execute(text(f"""
+        UPDATE activity_daily SET learners = learners + :new_learner, {_metric_sql()}
+        WHERE day = :day AND learner_type = :type
+    """), {**values, 'new_learner': 1 if first_today else 0, 'day': day,
+           'type': 'guest' if guest_code else 'user'})
+
+    for class_id in class_ids or ():
+        db.session.execute(text("""
+            INSERT INTO activity_daily_class (class_id, day, quizzes, questions, correct,
+                                              points, high_scores, percentage_sum)
+            VALUES (:class_id, :day, 0, 0, 0, 0, 0, 0)
+            ON CONFLICT (class_id, day) DO NOTHING
+        """), {'class_id': class_id, 'day': day})
+        db.session.execute(text(f"""
+            UPDATE activity_daily_class SET {_metric_sql()}
+            WHERE class_id = :class_id AND day = :day
+        """), {**values, 'class_id': class_id, 'day': day})
+
+
+def student_class_ids(db, user_id):
+    return [row[0] for row in db.session.execute(text(
+        "SELECT class_id FROM class_enrollments WHERE student_id = :uid"
+    ), {'uid': user_id}).fetchall()]
+
+
+# ==================== BACKFILL ====================
+
+# Per-attempt expressions for each raw table, following record_attempt()
+_USER_PERCENTAGE = "COALESCE(qa.percentage, qa.score * 100.0 / qa.total_questions)"
+_GUEST_PERCENTAGE = "(qa.score * 100.0 / qa.total_questions)"
+
+def _aggregates(percentage, points):
+    return f"""
+        COUNT(*), SUM(qa.total_questions), SUM(qa.score), SUM({points}),
+        SUM(CASE WHEN {percentage} >= {HIGH_SCORE_PERCENTAGE} THEN 1 ELSE 0 END),
+        SUM({percentage})
+    """
+
+
+def backfill(db, since=None):
+    """
+    Rebuild the rollups from quiz_attempts and guest_quiz_attempts for every
+    day from `since` (a date; None = all history). Commits. Returns the
+    number of learner-day rows written.
+    """
+    since = since or date(1970, 1, 1)
+    since_at = datetime.combine(since, datetime.min.time())
+    params = {'since': since, 'since_at': since_at}
+
+    for table in ('activity_daily_learner', 'activity_daily_class', 'activity_daily'):
+        db.session.execute(text(f"DELETE FROM {table} WHERE day >= :since"), params)
+
+    columns = "quizzes, questions, correct, points, high_scores, percentage_sum"
+
+    db.session.execute(text(f"""
+        INSERT INTO activity_daily_learner (learner, day, user_id, guest_code, {columns}, last_at)
+        SELECT 'user:' || qa.user_id, DATE(qa.completed_at), qa.user_id, NULL,
+               {_aggregates(_USER_PERCENTAGE, 'qa.score + COALESCE(qa.who_am_i_bonus, 0)')},
+               MAX(qa.completed_at)
+        FROM quiz_attempts qa
+        WHERE qa.completed_at >= :since_at AND qa.total_questions > 0
+        GROUP BY qa.user_id, DATE(qa.completed_at)
+    """), params)
+
+    db.session.execute(text(f"""
+        INSERT INTO activity_daily_learner (learner, day, user_id, guest_code, {columns}, last_at)
+        SELECT 'guest:' || qa.guest_code, DATE(qa.completed_at), NULL, qa.guest_code,
+               {_aggregates(_GUEST_PERCENTAGE,
+                            'qa.score + COALESCE(qa.who_am_i_bonus, 0) + COALESCE(qa.milestone_points, 0)')},
+               MAX(qa.completed_at)
+        FROM guest_quiz_attempts qa
+        WHERE qa.completed_at >= :since_at AND qa.total_questions > 0
+        GROUP BY qa.guest_code, DATE(qa.completed_at)
+    """), params)
+
+    db.session.execute(text(f"""
+        INSERT INTO activity_daily_class (class_id, day, {columns})
+        SELECT ce.class_id, DATE(qa.completed_at),
+               {_aggregates(_USER_PERCENTAGE, 'qa.score + COALESCE(qa.who_am_i_bonus, 0)')}
+        FROM quiz_attempts qa
+        JOIN class_enrollments ce ON ce.student_id = qa.user_id
+        WHERE qa.completed_at >= :since_at AND qa.total_questions > 0
+        GROUP BY ce.class_id, DATE(qa.completed_at)
+    """), params)
+
+    db.session.execute(text(f"""
+        INSERT INTO activity_daily (day, learner_type, learners, {columns})
+        SELECT day, CASE WHEN guest_code IS NULL THEN 'user' ELSE 'guest' END, COUNT(*),
+               SUM(quizzes), SUM(questions), SUM(correct), SUM(points), SUM(high_scores), SUM(percentage_sum)
+        FROM activity_daily_learner
+        WHERE day >= :since
+        GROUP BY day, CASE WHEN guest_code IS NULL THEN 'user' ELSE 'guest' END
+    """), params)
+
+    written = db.session.execute(text(
+        "SELECT COUNT(*) FROM activity_daily_learner WHERE day >= :since"
+    ), params).scalar()
+    db.session.commit()
+    _tables['exists'] = True
+    return written
+
+
+# ==================== READS ====================
+
+def learner_activity(db, user_id=None, guest_code=None, start=None, end=None):
+    """One learner's totals for days start..end (inclusive; None = open)"""
+    row = db.session.execute(text(f"""
+        SELECT {', '.join(f'SUM({m}) as {m}' for m in METRICS)}
+        FROM activity_daily_learner
+        WHERE learner = :learner AND day >= :start AND day <= :end
+    """), {'learner': learner_key(user_id, guest_code),
+           'start': start or date.min, 'end': end or date.max}).fetchone()
+    return _totals(row)
+
+
+def learners_activity(db, learners, start=None, end=None):
+    """{learner key: totals} for many learners in one query"""
+    if not learners:
+        return {}
+    rows = db.session.execute(text(f"""
+        SELECT learner, {', '.join(f'SUM({m}) as {m}' for m in METRICS)}, MAX(last_at) as last_at
+        FROM activity_daily_learner
+        WHERE learner IN :learners AND day >= :start AND day <= :end
+        GROUP BY learner
+    """).bindparams(bindparam('learners', expanding=True)), {
+        'learners': list(learners), 'start': start or date.min, 'end': end or date.max
+    }).fetchall()
+    result = {}
+    for row in rows:
+        result[row.learner] = _totals(row)
+        result[row.learner]['last_at'] = row.last_at
+    return result
+
+
+def daily_activity(db, start=None, end=None, learner_type=None):
+    """Totals over days start..end, optionally for 'user' or 'guest' only"""
+    row = db.session.execute(text(f"""
+        SELECT {', '.join(f'SUM({m}) as {m}' for m in METRICS)}, MAX(learners) as peak_learners
+        FROM activity_daily
+        WHERE day >= :start AND day <= :end
+          {'AND learner_type = :type' if learner_type else ''}
+    """), {'start': start or date.min, 'end': end or date.max, 'type': learner_type}).fetchone()
+    totals = _totals(row)
+    totals['peak_learners'] = (row.peak_learners or 0) if row else 0
+    return totals
+
+
+def learners_on(db, day):
+    """{'user': n, 'guest': n} distinct learners who finished a quiz on day"""
+    rows = db.session.execute(text(
+        "SELECT learner_type, learners FROM activity_daily WHERE day = :day"
+    ), {'day': day}).fetchall()
+    counts = {'user': 0, 'guest': 0}
+    for row in rows:
+        counts[row.learner_type] = row.learners
+    return counts
+
+
+def class_activity(db, start=None, end=None):
+    """{class_id: totals} for every class with activity in start..end"""
+    rows = db.session.execute(text(f"""
+        SELECT class_id, {', '.join(f'SUM({m}) as {m}' for m in METRICS)}
+        FROM activity_daily_class
+        WHERE day >= :start AND day <= :end
+        GROUP BY class_id
+    """), {'start': start or date.min, 'end': end or date.max}).fetchall()
+    return {row.class_id: _totals(row) for row in rows}
+
+
+def recently_active(db, since):
+    """{'user': n, 'guest': n} learners whose last quiz finished after since"""
+    rows = db.session.execute(text("""
+        SELECT CASE WHEN guest_code IS NULL THEN 'user' ELSE 'guest' END as learner_type,
+               COUNT(DISTINCT learner) as learners
+        FROM activity_daily_learner
+        WHERE day >= :day AND last_at > :since
+        GROUP BY 1
+    """), {'day': since.date(), 'since': since}).fetchall()
+    counts = {'user': 0, 'guest': 0}
+    for row in rows:
+        counts[row.learner_type] = row.learners
+    return counts
+
+
+def week_start(today=None):
+    """Monday of the current (UTC) week"""
+    today = today or datetime.utcnow().date()
+    return today - timedelta(days=today.weekday())
@@ -0,0 +1,267 @@
+"""
+ADMIN USER LISTING
+==================
+One listing behind every admin user table (/api/admin/users,
+/api/admin/all-users, /api/admin/analytics/registered-users).
+
+- One query per page: users LEFT JOIN user_stats, so points, level, quiz
+  count and last activity come back with the user instead of two extra
+  queries per row. The quiz count is user_stats.total_quizzes, which quiz
+  submission already maintains.
+- Server-side sort (created_at, name, email, points, quizzes, last_active)
+  and filters (role, approval, activity, email domain, search, guests).
+- Keyset pagination: each page ends with an opaque cursor holding the last
+  row's sort value and id, and the next page continues from there with
+  WHERE (key, id) < (value, id) - no OFFSET, so deep pages cost the same as
+  the first.
+- Totals come from user_counts, a per (role, approval, guest) counter table
+  kept up to date by triggers on users (migrate_admin_user_listing.py).
+  Without it they fall back to COUNT(*). Totals are only given for filters
+  the counters cover - role, approval and guests - and are None otherwise.
+"""
+
+import base64
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import text, inspect
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+GUEST_EMAIL_PATTERN = 'guest%@%'
+
+# Days since last activity: active < 7 <= stale < 30 <= inactive
+ACTIVE_DAYS = 7
+STALE_DAYS = 30
+
+LAST_ACTIVE_SQL = "COALESCE(us.updated_at, u.created_at)"
+
+# Stands in for a missing timestamp in sort keys; both databases compare it
+# with timestamps (PostgreSQL would reject '')
+NO_TIME_SQL = "'1970-01-01 00:00:00'"
+
+# sort name -> SQL key (never NULL, so keyset comparisons hold)
+SORTS = {
+    'created_at': f"COALESCE(u.created_at, {NO_TIME_SQL})",
+    'name': "LOWER(COALESCE(u.full_name, ''))",
+    'email': "LOWER(u.email)",
+    'points': "COALESCE(us.total_points, 0)",
+    'quizzes': "COALESCE(us.total_quizzes, 0)",
+    'last_active': f"COALESCE({LAST_ACTIVE_SQL}, {NO_TIME_SQL})",
+}
+
+ROLES = ('student', 'teacher', 'admin')
+APPROVALS = ('approved', 'pending')
+ACTIVITIES = ('active', 'stale', 'inactive')
+
+_counts_table = {'exists': None}
+
+
+class ListingError(ValueError):
+    """A bad sort, filter or cursor - reported to the client as a 400"""
+
+
+def encode_cursor(value, user_id):
+    if isinstance(value, datetime):
+        value = value.isoformat(' ')  # PostgreSQL returns timestamps; SQLite returns the stored text
+    raw = json.dumps([value, user_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value, user_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return value, int(user_id)
+    except (ValueError, TypeError):
+        raise ListingError('Invalid cursor')
+
+
+def parse_limit(value, default=DEFAULT_LIMIT):
+    if value in (None, ''):
+        return default
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ListingError('limit must be a number')
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def _filters(role=None, approval=None, activity=None, domain=None, search=None,
+             include_guests=True, now=None):
+    where, params = [], {}
+
+    if role:
+        if role not in ROLES:
+            raise ListingError(f'Unknown role: {role}')
+        where.append("u.role = :role")
+        params['role'] = role
+
+    if approval:
+        if approval not in APPROVALS:
+            raise ListingError(f'Unknown approval filter: {approval}')
+        where.append("COALESCE(u.is_approved, FALSE) = :approved")
+        params['approved'] = approval == 'approved'
+
+    if activity:
+        if activity not in ACTIVITIES:
+            raise ListingError(f'Unknown activity filter: {activity}')
+        now = now or datetime.utcnow()
+        if activity in ('active', 'stale'):
+            where.append(f"{LAST_ACTIVE_SQL} >= :active_after")
+            params['active_after'] = now - timedelta(days=ACTIVE_DAYS if activity == 'active' else STALE_DAYS)
+        if activity in ('stale', 'inactive'):
+            where.append(f"({LAST_ACTIVE_SQL} < :active_before OR {LAST_ACTIVE_SQL} IS NULL)")
+            params['active_before'] = now - timedelta(days=ACTIVE_DAYS if activity == 'stale' else STALE_DAYS)
+
+    if domain:
+        where.append("LOWER(u.email) LIKE :domain")
+        params['domain'] = '%@' + domain.strip().lower().lstrip('@')
+
+    if search:
+        where.append("(LOWER(COALESCE(u.full_name, '')) LIKE :search OR LOWER(u.email) LIKE :search)")
+        params['search'] = f"%{search.strip().lower()}%"
+
+    if not include_guests:
+        where.append("u.email NOT LIKE :guest_email")
+        params['guest_email'] = GUEST_EMAIL_PATTERN
+
+    return where, params
+
+
+def _as_datetime(value):
+    if value is None or isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+def _iso(value):
+    value_dt = _as_datetime(value)
+    if value_dt:
+        return value_dt.isoformat()
+    return str(value) if value else None
+
+
+def activity_status(last_active, now=None):
+    """('active' | 'stale' | 'inactive', days since last activity)"""
+    last_active = _as_datetime(last_active)
+    if not last_active:
+        return 'inactive', None
+    days = ((now or datetime.utcnow()) - last_active).days
+    if days < ACTIVE_DAYS:
+        return 'active', days
+    return ('stale' if days < STALE_DAYS else 'inactive'), days
+
+
+def list_users(db, role=None, approval=None, activity=None, domain=None, search=None,
+               include_guests=True, sort='created_at', direction='desc',
+               limit=DEFAULT_LIMIT, cursor=None, now=None):
+    """
+    One page of users with their stats, in one query.
+
+    Returns {'users': [...], 'next_cursor': str or None}. Pass next_cursor
+    back (with the same sort and filters) for the following page. limit=None
+    returns every matching user.
+    """
+    if sort not in SORTS:
+        raise ListingError(f'Unknown sort: {sort}')
+    if direction not in ('asc', 'desc'):
+        raise ListingError('direction must be asc or desc')
+
+    now = now or datetime.utcnow()
+    sort_key = SORTS[sort]
+    where, params = _filters(role, approval, activity, domain, search, include_guests, now)
+
+    if cursor:
+        value, after_id = decode_cursor(cursor)
+        op = '<' if direction == 'desc' else '>'
+        where.append(f"({sort_key} {op} :cursor_value OR ({sort_key} = :cursor_value AND u.id {op} :cursor_id))")
+        params['cursor_value'] = value
+        params['cursor_id'] = after_id
+
+    sql = f"""
+        SELECT u.id, u.email, u.full_name, u.role, u.is_approved, u.created_at,
+               COALESCE(us.total_quizzes, 0) as total_quizzes,
+               COALESCE(us.total_points, 0) as total_points,
+               COALESCE(us.level, 1) as level,
+               {LAST_ACTIVE_SQL} as last_active,
+               {sort_key} as sort_value
+        FROM users u
+        LEFT JOIN user_stats us ON us.user_id = u.id
+        {'WHERE ' + ' AND '.join(where) if where else ''}
+        ORDER BY sort_value {direction.upper()}, u.id {direction.upper()}
+    """
+    if limit is not None:
+        sql += " LIMIT :fetch"
+        params['fetch'] = limit + 1  # One extra row tells us whether there is a next page
+
+    rows = db.session.execute(text(sql), params).fetchall()
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].sort_value, rows[-1].id)
+
+    users = []
+    for row in rows:
+        status, days_inactive = activity_status(row.last_active, now)
+        users.append({
+            'id': row.id,
+            'email': row.email,
+            'full_name': row.full_name,
+            'role': row.role,
+            'is_approved': bool(row.is_approved),
+            'created_at': _iso(row.created_at),
+            'total_quizzes': row.total_quizzes,
+            'total_points': row.total_points,
+            'level': row.level,
+            'last_active': _iso(row.last_active),
+            'activity_status': status,
+            'days_inactive': days_inactive,
+        })
+
+    return {'users': users, 'next_cursor': next_cursor}
+
+
+def counters_available(db):
+    if _counts_table['exists'] is None:
+        _counts_table['exists'] = inspect(db.engine).has_table('user_counts')
+        if not _counts_table['exists']:
+            print("⚠️ user_counts table missing - admin user totals use COUNT(*) (run migrate_admin_user_listing.py)")
+    return _counts_table['exists']
+
+
+def count_users(db, role=None, approval=None, include_guests=True, **other_filters):
+    """
+    Total for a listing, from the user_counts counters. Returns None when
+    other_filters (activity, domain, search) are in use - counting those
+    would mean scanning the table.
+    """
+    if any(other_filters.values()):
+        return None
+
+    where, params = [], {}
+    if role:
+        where.append("role = :role")
+        params['role'] = role
+    if approval:
+        where.append("is_approved = :approved")
+        params['approved'] = approval == 'approved'
+
+    if counters_available(db):
+        if not include_guests:
+            where.append("is_guest = FALSE")
+        sql = "SELECT COALESCE(SUM(users), 0) FROM user_counts"
+    else:
+        if not include_guests:
+            where.append("email NOT LIKE :guest_email")
+            params['guest_email'] = GUEST_EMAIL_PATTERN
+        sql = "SELECT COUNT(*) FROM users"
+
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    return db.session.execute(text(sql), params).scalar()
@@ -0,0 +1,304 @@
+"""
+AVATAR RENDERER
+===============
+Server-side copy of AvatarRenderer.generateSVG in static/js/avatar.js, so a
+whole avatar (animal, hat, glasses, background, accessory) can be served as
+one cached SVG image - e.g. on leaderboards, where each row would otherwise
+need its own configuration lookup and client-side render.
+
+Each distinct combination is rendered once per worker (lru_cache) and served
+from a versioned URL with immutable caching. Bump RENDER_VERSION whenever the
+drawing changes here or in avatar.js, so browsers fetch the new images.
+
+Keep the shapes and colours in step with static/js/avatar.js.
+"""
+
+from functools import lru_cache
+
+RENDER_VERSION = 1
+AVATAR_SLOTS = ('animal', 'hat', 'glasses', 'background', 'accessory')
+DEFAULT_AVATAR = {'animal': 'panda', 'hat': 'none', 'glasses': 'none', 'background': 'none', 'accessory': 'none'}
+
+ANIMAL_COLORS = {
+    'panda': {'face': '#ffffff', 'ears': '#1a1a1a', 'patches': '#1a1a1a', 'nose': '#1a1a1a'},
+    'fox': {'face': '#ff6b35', 'ears': '#ff6b35', 'patches': '#ffffff', 'nose': '#1a1a1a'},
+    'cat': {'face': '#ffa94d', 'ears': '#ffa94d', 'patches': '#ffffff', 'nose': '#ffb6c1'},
+    'owl': {'face': '#8b4513', 'ears': '#654321', 'patches': '#f5deb3', 'nose': '#ffa500'},
+    'lion': {'face': '#daa520', 'ears': '#b8860b', 'patches': '#f4a460', 'nose': '#1a1a1a'},
+    'bear': {'face': '#8b4513', 'ears': '#654321', 'patches': '#a0522d', 'nose': '#1a1a1a'},
+    'wolf': {'face': '#708090', 'ears': '#4a4a4a', 'patches': '#d3d3d3', 'nose': '#1a1a1a'},
+    'rabbit': {'face': '#f5f5f5', 'ears': '#ffb6c1', 'patches': '#ffffff', 'nose': '#ffb6c1'},
+    'tiger': {'face': '#ff8c00', 'ears': '#ff6600', 'patches': '#1a1a1a', 'nose': '#1a1a1a'},
+    'penguin': {'face': '#1a1a1a', 'ears': '#1a1a1a', 'patches': '#ffffff', 'nose': '#ffa500'},
+    'koala': {'face': '#808080', 'ears': '#696969', 'patches': '#d3d3d3', 'nose': '#1a1a1a'},
+    'elephant': {'face': '#808080', 'ears': '#696969', 'patches': '#a9a9a9', 'nose': '#696969'},
+    'monkey': {'face': '#deb887', 'ears': '#d2691e', 'patches': '#ffe4c4', 'nose': '#8b4513'},
+    'dog': {'face': '#d2691e', 'ears': '#8b4513', 'patches': '#ffe4c4', 'nose': '#1a1a1a'},
+    'dolphin': {'face': '#4682b4', 'ears': '#4169e1', 'patches': '#87ceeb', 'nose': '#4682b4'},
+    'horse': {'face': '#8b4513', 'ears': '#654321', 'patches': '#d2691e', 'nose': '#1a1a1a'},
+    'deer': {'face': '#d2691e', 'ears': '#8b4513', 'patches': '#f5deb3', 'nose': '#1a1a1a'},
+    'eagle': {'face': '#8b4513', 'ears': '#654321', 'patches': '#ffffff', 'nose': '#ffa500'},
+    'parrot': {'face': '#32cd32', 'ears': '#228b22', 'patches': '#ff4500', 'nose': '#ffa500'},
+    'turtle': {'face': '#228b22', 'ears': '#006400', 'patches': '#90ee90', 'nose': '#2e8b57'},
+}
+
+BACKGROUNDS = ('none', 'forest', 'ocean', 'sunset', 'space', 'rainbow')
+
+GRADIENT_DEFS = """
+    <linearGradient id="bg-forest" x1="0%" y1="0%" x2="100%" y2="100%">
+        <stop offset="0%" style="stop-color:#90EE90"/>
+        <stop offset="100%" style="stop-color:#228B22"/>
+    </linearGradient>
+    <linearGradient id="bg-ocean" x1="0%" y1="0%" x2="100%" y2="100%">
+        <stop offset="0%" style="stop-color:#87CEEB"/>
+        <stop offset="100%" style="stop-color:#4169E1"/>
+    </linearGradient>
+    <linearGradient id="bg-sunset" x1="0%" y1="0%" x2="100%" y2="100%">
+        <stop offset="0%" style="stop-color:#FFB347"/>
+        <stop offset="100%" style="stop-color:#FF6B6B"/>
+    </linearGradient>
+    <linearGradient id="bg-rainbow" x1="0%" y1="0%" x2="100%" y2="100%">
+        <stop offset="0%" style="stop-color:#ff6b6b"/>
+        <stop offset="33%" style="stop-color:#feca57"/>
+        <stop offset="66%" style="stop-color:#48dbfb"/>
+        <stop offset="100%" style="stop-color:#ff9ff3"/>
+    </linearGradient>
+"""
+
+GLASSES = {
+    'round': """
+        <circle cx="35" cy="50" r="12" fill="none" stroke="#333" stroke-width="2"/>
+        <circle cx="65" cy="50" r="12" fill="none" stroke="#333" stroke-width="2"/>
+        <line x1="47" y1="50" x2="53" y2="50" stroke="#333" stroke-width="2"/>
+    """,
+    'cool': """
+        <rect x="22" y="44" width="26" height="14" rx="2" fill="#1a1a2e"/>
+        <rect x="52" y="44" width="26" height="14" rx="2" fill="#1a1a2e"/>
+        <line x1="48" y1="50" x2="52" y2="50" stroke="#333" stroke-width="2"/>
+    """,
+    'heart': """
+        <path d="M 25 50 C 25 42 35 42 35 50 C 35 42 45 42 45 50 C 45 60 35 65 35 65 C 35 65 25 60 25 50" fill="#ff6b6b"/>
+        <path d="M 55 50 C 55 42 65 42 65 50 C 65 42 75 42 75 50 C 75 60 65 65 65 65 C 65 65 55 60 55 50" fill="#ff6b6b"/>
+    """,
+    'star': """
+        <polygon points="35,42 37,48 43,48 38,52 40,58 35,54 30,58 32,52 27,48 33,48" fill="#f1c40f"/>
+        <polygon points="65,42 67,48 73,48 68,52 70,58 65,54 60,58 62,52 57,48 63,48" fill="#f1c40f"/>
+    """,
+}
+
+HATS = {
+    'party': """
+        <polygon points="50,5 35,35 65,35" fill="#9b59b6"/>
+        <circle cx="50" cy="5" r="4" fill="#f1c40f"/>
+        <rect x="38" y="20" width="4" height="4" fill="#3498db"/>
+        <rect x="48" y="15" width="4" height="4" fill="#e74c3c"/>
+        <rect x="55" y="22" width="4" height="4" fill="#2ecc71"/>
+    """,
+    'cap': """
+        <ellipse cx="50" cy="22" rx="25" ry="12" fill="#e74c3c"/>
+        <rect x="20" y="22" width="30" height="8" fill="#c0392b"/>
+    """,
+    'beanie': """
+        <ellipse cx="50" cy="25" rx="28" ry="18" fill="#e74c3c"/>
+        <circle cx="50" cy="8" r="5" fill="#e74c3c"/>
+        <rect x="25" y="30" width="50" height="6" fill="#c0392b"/>
+    """,
+    'tophat': """
+        <rect x="32" y="5" width="36" height="25" fill="#2c3e50"/>
+        <rect x="25" y="28" width="50" height="6" fill="#34495e"/>
+        <rect x="35" y="20" width="30" height="4" fill="#9b59b6"/>
+    """,
+    'wizard': """
+        <polygon points="50,0 30,35 70,35" fill="#9b59b6"/>
+        <rect x="28" y="32" width="44" height="5" fill="#8e44ad"/>
+        <circle cx="50" cy="15" r="4" fill="#f1c40f"/>
+        <circle cx="40" cy="25" r="2" fill="#f1c40f"/>
+        <circle cx="58" cy="22" r="2" fill="#f1c40f"/>
+    """,
+    'crown': """
+        <rect x="30" y="18" width="40" height="12" fill="#f1c40f"/>
+        <polygon points="30,18 38,5 46,18" fill="#f1c40f"/>
+        <polygon points="42,18 50,2 58,18" fill="#f1c40f"/>
+        <polygon points="54,18 62,5 70,18" fill="#f1c40f"/>
+        <circle cx="38" cy="22" r="3" fill="#e74c3c"/>
+        <circle cx="50" cy="22" r="3" fill="#3498db"/>
+        <circle cx="62" cy="22" r="3" fill="#2ecc71"/>
+    """,
+    'graduation': """
+        <rect x="30" y="18" width="40" height="10" fill="#2c3e50"/>
+        <rect x="20" y="15" width="60" height="5" fill="#34495e"/>
+        <rect x="48" y="8" width="4" height="8" fill="#f1c40f"/>
+        <circle cx="60" cy="8" r="3" fill="#f1c40f"/>
+        <line x1="50" y1="8" x2="65" y2="12" stroke="#f1c40f" stroke-width="2"/>
+    """,
+}
+
+ACCESSORIES = {
+    'pencil': """
+        <g transform="translate(72, 55) rotate(30)">
+            <rect x="0" y="0" width="6" height="25" fill="#f1c40f"/>
+            <polygon points="0,25 3,32 6,25" fill="#ffd5b5"/>
+            <rect x="0" y="0" width="6" height="4" fill="#e74c3c"/>
+        </g>
+    """,
+    'calculator': """
+        <g transform="translate(70, 65)">
+            <rect x="0" y="0" width="18" height="25" rx="2" fill="#34495e"/>
+            <rect x="2" y="2" width="14" height="6" fill="#2ecc71"/>
+            <rect x="2" y="10" width="4" height="4" fill="#ecf0f1"/>
+            <rect x="7" y="10" width="4" height="4" fill="#ecf0f1"/>
+            <rect x="12" y="10" width="4" height="4" fill="#e74c3c"/>
+            <rect x="2" y="15" width="4" height="4" fill="#ecf0f1"/>
+            <rect x="7" y="15" width="4" height="4" fill="#ecf0f1"/>
+            <rect x="12" y="15" width="4" height="4" fill="#3498db"/>
+        </g>
+    """,
+    'protractor': """
+        <g transform="translate(68, 70)">
+            <path d="M 0,20 A 20,20 0 0,1 40,20 L 20,20 Z" fill="#3498db" opacity="0.8"/>
+            <circle cx="20" cy="20" r="3" fill="#2c3e50"/>
+        </g>
+    """,
+    'medal': """
+        <g transform="translate(42, 78)">
+            <rect x="6" y="-8" width="4" height="10" fill="#3498db"/>
+            <circle cx="8" cy="8" r="10" fill="#f1c40f"/>
+            <circle cx="8" cy="8" r="7" fill="#f39c12"/>
+            <text x="8" y="12" text-anchor="middle" font-size="10" fill="#fff" font-weight="bold">1</text>
+        </g>
+    """,
+    'trophy': """
+        <g transform="translate(70, 60)">
+            <rect x="8" y="25" width="10" height="5" fill="#f39c12"/>
+            <rect x="5" y="28" width="16" height="4" fill="#d68910"/>
+            <path d="M 3,5 L 3,15 Q 3,25 13,25 Q 23,25 23,15 L 23,5 Z" fill="#f1c40f"/>
+            <path d="M 0,5 Q 0,15 3,15 L 3,5 Z" fill="#f39c12"/>
+            <path d="M 23,5 L 23,15 Q 26,15 26,5 Z" fill="#f39c12"/>
+        </g>
+    """,
+}
+
+
+def normalize_avatar(config):
+    """
+    Avatar configuration with unknown keys replaced by the defaults, so only
+    combinations that can actually be drawn reach the cache
+    """
+    config = config or {}
+    animal = config.get('animal')
+    background = config.get('background')
+    return {
+        'animal': animal if animal in ANIMAL_COLORS else 'panda',
+        'hat': config.get('hat') if config.get('hat') in HATS else 'none',
+        'glasses': config.get('glasses') if config.get('glasses') in GLASSES else 'none',
+        'background': background if background in BACKGROUNDS else 'none',
+        'accessory': config.get('accessory') if config.get('accessory') in ACCESSORIES else 'none',
+    }
+
+
+def avatar_url(config):
+    """Versioned URL of the composite SVG for an avatar configuration"""
+    config = normalize_avatar(config)
+    return f"/avatar/render/v{RENDER_VERSION}/" + '/'.join(config[slot] for slot in AVATAR_SLOTS) + '.svg'
+
+
+def _background_fill(background):
+    if background == 'none':
+        return '#e8e8e8'
+    if background == 'space':
+        return '#2C3E50'
+    return f'url(#bg-{background})'
+
+
+def _ears(animal, colors):
+    svg = f"""
+        <circle cx="25" cy="25" r="15" fill="{colors['ears']}"/>
+        <circle cx="75" cy="25" r="15" fill="{colors['ears']}"/>
+    """
+    if animal == 'panda':
+        svg += """
+        <circle cx="25" cy="25" r="8" fill="#333"/>
+        <circle cx="75" cy="25" r="8" fill="#333"/>
+    """
+    elif animal == 'fox':
+        svg += """
+        <circle cx="25" cy="25" r="8" fill="#1a1a1a"/>
+        <circle cx="75" cy="25" r="8" fill="#1a1a1a"/>
+    """
+    elif animal == 'cat':
+        svg += """
+        <polygon points="20,15 25,30 30,15" fill="#ffb6c1"/>
+        <polygon points="70,15 75,30 80,15" fill="#ffb6c1"/>
+    """
+    elif animal == 'owl':
+        svg += f"""
+        <polygon points="20,18 25,28 30,18" fill="{colors['ears']}"/>
+        <polygon points="70,18 75,28 80,18" fill="{colors['ears']}"/>
+    """
+    return svg
+
+
+def _face(animal, colors):
+    svg = f'<ellipse cx="50" cy="55" rx="35" ry="32" fill="{colors["face"]}"/>'
+    if animal == 'panda':
+        svg += f"""
+        <ellipse cx="35" cy="50" rx="12" ry="10" fill="{colors['patches']}"/>
+        <ellipse cx="65" cy="50" rx="12" ry="10" fill="{colors['patches']}"/>
+    """
+    elif animal in ('fox', 'cat'):
+        svg += f'<ellipse cx="50" cy="70" rx="20" ry="15" fill="{colors["patches"]}"/>'
+    elif animal == 'owl':
+        svg += f"""
+        <circle cx="35" cy="50" r="14" fill="{colors['patches']}"/>
+        <circle cx="65" cy="50" r="14" fill="{colors['patches']}"/>
+    """
+    return svg
+
+
+EYES = """
+        <circle cx="35" cy="50" r="8" fill="#fff"/>
+        <circle cx="65" cy="50" r="8" fill="#fff"/>
+        <circle cx="37" cy="50" r="5" fill="#333"/>
+        <circle cx="67" cy="50" r="5" fill="#333"/>
+        <circle cx="38" cy="48" r="2" fill="#fff"/>
+        <circle cx="68" cy="48" r="2" fill="#fff"/>
+"""
+
+WHISKERS = """
+        <line x1="20" y1="60" x2="35" y2="62" stroke="#333" stroke-width="1"/>
+        <line x1="20" y1="65" x2="35" y2="65" stroke="#333" stroke-width="1"/>
+        <line x1="65" y1="62" x2="80" y2="60" stroke="#333" stroke-width="1"/>
+        <line x1="65" y1="65" x2="80" y2="65" stroke="#333" stroke-width="1"/>
+"""
+
+
+def _nose_and_mouth(animal, colors):
+    if animal == 'owl':
+        return f'<polygon points="50,58 45,68 55,68" fill="{colors["nose"]}"/>'
+    return f"""
+        <ellipse cx="50" cy="62" rx="5" ry="4" fill="{colors['nose']}"/>
+        <path d="M 45 68 Q 50 73 55 68" stroke="#333" stroke-width="2" fill="none"/>
+    """
+
+
+@lru_cache(maxsize=4096)
+def _render(animal, hat, glasses, background, accessory):
+    colors = ANIMAL_COLORS[animal]
+    return f"""<svg viewBox="0 0 100 100" xmlns="http://www.w3.org/2000/svg">
+    <defs>{GRADIENT_DEFS}</defs>
+    <rect width="100" height="100" fill="{_background_fill(background)}"/>
+    {_ears(animal, colors)}
+    {_face(animal, colors)}
+    {EYES}
+    {_nose_and_mouth(animal, colors)}
+    {WHISKERS if animal in ('cat', 'fox') else ''}
+    {GLASSES.get(glasses, '')}
+    {HATS.get(hat, '')}
+    {ACCESSORIES.get(accessory, '')}
+</svg>"""
+
+
+def render_avatar_svg(config):
+    """Composite SVG for an avatar configuration (rendered once per combination)"""
+    config = normalize_avatar(config)
+    return _render(*(config[slot] for slot in AVATAR_SLOTS))
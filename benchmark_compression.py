@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Compression Benchmark - Bytes on the Wire
+=========================================
+
+Requests the heaviest pages, API responses and static assets through the
+Flask test client and compares the bytes sent with no compression, gzip and
+brotli. Only GET endpoints that don't change data are used.
+
+Run `python build_assets.py` first to include precompressed static files.
+
+Usage:
+    cd /home/bbsisk/mathapp
+    source venv/bin/activate
+    python benchmark_compression.py [--json results.json]
+"""
+
+import json
+import sys
+
+from app import app, db, BROTLI_AVAILABLE
+from sqlalchemy import text
+
+PAGES = [
+    # (label, path, session role)
+    ('Login page', '/', None),
+    ('Student app', '/app', 'guest'),
+    ('Racing car page', '/racing-car', 'guest'),
+    ('Admin dashboard', '/admin', 'admin'),
+    ('All questions (admin)', '/api/admin/all-questions', 'admin'),
+    ('Topics', '/api/topics', 'guest'),
+    ('Service worker', '/sw.js', None),
+]
+
+STATIC_FILES = ['js/who_am_i.js', 'js/avatar.js', 'css/avatar.css', 'quiz_milestones.js']
+
+
+def make_client(role):
+    client = app.test_client()
+    with app.app_context():
+        if role == 'admin':
+            admin_id = db.session.execute(text(
+                "SELECT id FROM users WHERE role = 'admin' ORDER BY id LIMIT 1"
+            )).scalar()
+            with client.session_transaction() as sess:
+                sess['user_id'] = admin_id
+        elif role == 'guest':
+            guest_code = db.session.execute(text(
+                "SELECT guest_code FROM guest_users ORDER BY id LIMIT 1"
+            )).scalar()
+            with client.session_transaction() as sess:
+                sess['guest_code'] = guest_code
+    return client
+
+
+def measure(client, path):
+    """Return {encoding: bytes on the wire} for one URL"""
+    sizes = {}
+    encodings = [('identity', 'identity'), ('gzip', 'gzip')]
+    if BROTLI_AVAILABLE:
+        encodings.append(('br', 'br'))
+    for label, accept in encodings:
+        response = client.get(path, headers={'Accept-Encoding': accept})
+        if response.status_code != 200:
+            return None
+        sizes[label] = len(response.get_data())
+        response.close()
+    return sizes
+
+
+def run_benchmark():
+    clients = {}
+    rows = []
+    targets = [(label, path, role) for label, path, role in PAGES]
+    targets += [(f"static/{name}", f"/static/{name}", None) for name in STATIC_FILES]
+
+    for label, path, role in targets:
+        if role not in clients:
+            clients[role] = make_client(role)
+        sizes = measure(clients[role], path)
+        if sizes is None:
+            print(f"  skipped {label} ({path}) - not available")
+            continue
+        rows.append({'label': label, 'path': path, 'bytes': sizes})
+
+    print("\n" + "=" * 78)
+    print(f"{'Response':<28}{'identity':>14}{'gzip':>14}{'br':>14}{'saved':>8}")
+    print("=" * 78)
+    total_raw = total_best = 0
+    for row in rows:
+        sizes = row['bytes']
+        best = min(sizes.values())
+        total_raw += sizes['identity']
+        total_best += best
+        saved = 100 - round(best * 100 / sizes['identity']) if sizes['identity'] else 0
+        br = f"{sizes['br']:,}" if 'br' in sizes else '-'
+        print(f"{row['label']:<28}{sizes['identity']:>14,}{sizes['gzip']:>14,}{br:>14}{saved:>7}%")
+    print("-" * 78)
+    saved = 100 - round(total_best * 100 / total_raw) if total_raw else 0
+    print(f"{'TOTAL':<28}{total_raw:>14,}{'':>14}{total_best:>14,}{saved:>7}%")
+    if not BROTLI_AVAILABLE:
+        print("\n(brotli not installed - br column is empty)")
+    return rows
+
+
+if __name__ == '__main__':
+    results = run_benchmark()
+    if '--json' in sys.argv:
+        output = sys.argv[sys.argv.index('--json') + 1]
+        with open(output, 'w') as f:
+            json.dump({'brotli_available': BROTLI_AVAILABLE, 'results': results}, f, indent=2)
+        print(f"\nSaved results to {output}")
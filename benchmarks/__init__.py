@@ -0,0 +1,17 @@
+"""
+BENCHMARKS
+==========
+Load tests for the hot endpoints against a synthetic database at a chosen
+scale (tens of thousands of learners), so performance changes can be
+measured instead of guessed.
+
+- synthetic_data.py: builds a mathquiz.db with the real schema and question
+  bank plus generated schools, classes, students, repeat guests, attempts,
+  question history, badges, raffles and race results
+- endpoints.py: drives get_questions, submit_quiz, the class matrix,
+  leaderboards, badges and championship standings through the Flask test
+  client from concurrent threads and reports throughput and p50/p95/p99
+  per endpoint, saved as JSON for comparing commits
+
+See README.md in this directory for usage.
+"""
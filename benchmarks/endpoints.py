@@ -0,0 +1,357 @@
+"""
+Endpoint Benchmark
+==================
+
+Drives the hot endpoints through the Flask test client from concurrent
+threads and reports, per endpoint, throughput and p50/p95/p99 latency:
+- get_questions and submit_quiz, as students and as repeat guests
+- the teacher class matrix (matrix-data and performance-matrix)
+- class, weekly, all-time and guest leaderboards
+- badges, my-progress and championship standings
+
+Each request runs as a random learner (or teacher) from the database, with
+the session set up outside the timed part. Only the app is measured - there
+is no HTTP server or network in the loop - so compare results from the same
+machine.
+
+Results are written as JSON (benchmarks/results/<time>-<commit>.json by
+default) with the commit, database size and settings, and --compare prints
+the change against an earlier result file.
+
+The benchmark writes to the database (questions are marked seen, quizzes
+are submitted), so run it against a generated copy, never the live file.
+
+Usage:
+    cd /home/bbsisk/mathapp
+    source venv/bin/activate
+    python -m benchmarks.synthetic_data --scale medium
+    python -m benchmarks.endpoints --db benchmarks/data/mathquiz.db --threads 8 --requests 200
+    python -m benchmarks.endpoints --db benchmarks/data/mathquiz.db --compare benchmarks/results/<earlier>.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+DEFAULT_DB = 'benchmarks/data/mathquiz.db'
+RESULTS_DIR = 'benchmarks/results'
+GUEST_EMAIL = 'guest@agentmath.app'
+
+COUNTED_TABLES = ('users', 'classes', 'guest_users', 'questions', 'quiz_attempts', 'guest_quiz_attempts',
+                  'user_question_history', 'raffle_entries', 'race_results', 'championship_standings')
+
+
+# ---------- identities ----------
+
+class Identities:
+    """Who the benchmark can act as, loaded from the database before the app is imported"""
+
+    def __init__(self, path):
+        conn = sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True)
+        self.students = [row[0] for row in conn.execute("SELECT id FROM users WHERE role = 'student' AND email != ?",
+                                                         (GUEST_EMAIL,))]
+        self.classes = conn.execute("SELECT id, teacher_id FROM classes").fetchall()
+        self.guests = [row[0] for row in conn.execute("SELECT guest_code FROM guest_users")]
+        guest_user = conn.execute("SELECT id FROM users WHERE email = ?", (GUEST_EMAIL,)).fetchone()
+        self.guest_user_id = guest_user[0] if guest_user else None
+        self.combos = conn.execute("""
+            SELECT topic, difficulty FROM questions GROUP BY topic, difficulty HAVING COUNT(*) >= 25
+        """).fetchall()
+        self.row_counts = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                           for table in COUNTED_TABLES}
+        self.class_students = {}
+        for class_id, student_id in conn.execute("SELECT class_id, student_id FROM class_enrollments"):
+            self.class_students.setdefault(class_id, []).append(student_id)
+        conn.close()
+
+        if not self.students or not self.classes or not self.combos:
+            raise SystemExit(f"{path} has no students, classes or question pools - generate it with "
+                             f"python -m benchmarks.synthetic_data")
+        if self.guests and self.guest_user_id is None:
+            raise SystemExit(f"{path} has guests but no {GUEST_EMAIL} account")
+
+    def student(self, rng):
+        return {'user_id': rng.choice(self.students), 'user_role': 'student'}
+
+    def guest(self, rng):
+        return {'guest_code': rng.choice(self.guests), 'user_id': self.guest_user_id,
+                'role': 'student', 'guest_type': 'repeat'}
+
+    def learner(self, rng):
+        return self.guest(rng) if self.guests and rng.random() < 0.5 else self.student(rng)
+
+    def teacher_class(self, rng):
+        class_id, teacher_id = rng.choice(self.classes)
+        return class_id, {'user_id': teacher_id, 'user_role': 'teacher'}
+
+    def class_member(self, rng):
+        class_id = rng.choice(list(self.class_students))
+        return class_id, {'user_id': rng.choice(self.class_students[class_id]), 'user_role': 'student'}
+
+
+# ---------- endpoints ----------
+# Each builds one request for a random identity: (session, method, path, json body)
+
+def _quiz_body(rng, topic, difficulty):
+    score = rng.randint(5, 25)
+    return {'topic': topic, 'difficulty': difficulty, 'score': score, 'total_questions': 25,
+            'percentage': score * 4, 'time_taken': rng.randint(180, 900)}
+
+
+def get_questions_student(ids, rng):
+    topic, difficulty = rng.choice(ids.combos)
+    return ids.student(rng), 'GET', f"/api/questions/{topic}/{difficulty}", None
+
+
+def get_questions_guest(ids, rng):
+    topic, difficulty = rng.choice(ids.combos)
+    return ids.guest(rng), 'GET', f"/api/questions/{topic}/{difficulty}", None
+
+
+def submit_quiz_student(ids, rng):
+    topic, difficulty = rng.choice(ids.combos)
+    return ids.student(rng), 'POST', '/api/submit-quiz', _quiz_body(rng, topic, difficulty)
+
+
+def submit_quiz_guest(ids, rng):
+    topic, difficulty = rng.choice(ids.combos)
+    return ids.guest(rng), 'POST', '/api/submit-quiz', _quiz_body(rng, topic, difficulty)
+
+
+def class_matrix_data(ids, rng):
+    class_id, teacher = ids.teacher_class(rng)
+    return teacher, 'GET', f"/api/teacher/class/{class_id}/matrix-data", None
+
+
+def class_performance_matrix(ids, rng):
+    class_id, teacher = ids.teacher_class(rng)
+    return teacher, 'GET', f"/api/teacher/class/{class_id}/performance-matrix", None
+
+
+def class_leaderboard(ids, rng):
+    class_id, student = ids.class_member(rng)
+    return student, 'GET', f"/api/class/{class_id}/leaderboard", None
+
+
+def leaderboard_weekly(ids, rng):
+    return ids.learner(rng), 'GET', '/api/leaderboard/weekly', None
+
+
+def leaderboard_all_time(ids, rng):
+    return ids.learner(rng), 'GET', '/api/leaderboard/all-time', None
+
+
+def guest_leaderboard(ids, rng):
+    return {}, 'GET', '/api/guest-leaderboard', None
+
+
+def badges_student(ids, rng):
+    return ids.student(rng), 'GET', '/api/student/badges', None
+
+
+def badges_guest(ids, rng):
+    return ids.guest(rng), 'GET', '/api/student/badges', None
+
+
+def my_progress(ids, rng):
+    return ids.student(rng), 'GET', '/api/my-progress', None
+
+
+def championship_standings(ids, rng):
+    return ids.learner(rng), 'GET', f"/api/racing-car/championship/standings?page={rng.randint(1, 3)}", None
+
+
+ENDPOINTS = {
+    'get_questions.student': get_questions_student,
+    'get_questions.guest': get_questions_guest,
+    'submit_quiz.student': submit_quiz_student,
+    'submit_quiz.guest': submit_quiz_guest,
+    'class_matrix_data': class_matrix_data,
+    'class_performance_matrix': class_performance_matrix,
+    'class_leaderboard': class_leaderboard,
+    'leaderboard.weekly': leaderboard_weekly,
+    'leaderboard.all_time': leaderboard_all_time,
+    'guest_leaderboard': guest_leaderboard,
+    'badges.student': badges_student,
+    'badges.guest': badges_guest,
+    'my_progress': my_progress,
+    'championship_standings': championship_standings,
+}
+GUEST_ENDPOINTS = {'get_questions.guest', 'submit_quiz.guest', 'badges.guest'}
+
+
+# ---------- running ----------
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(latencies_ms, statuses, elapsed):
+    latencies_ms = sorted(latencies_ms)
+    codes = {}
+    for status in statuses:
+        codes[str(status)] = codes.get(str(status), 0) + 1
+    return {
+        'requests': len(statuses),
+        'errors': sum(1 for status in statuses if status >= 400),
+        'status_codes': codes,
+        'throughput_rps': round(len(statuses) / elapsed, 1) if elapsed else None,
+        'mean_ms': round(sum(latencies_ms) / len(latencies_ms), 2) if latencies_ms else None,
+        'p50_ms': round(percentile(latencies_ms, 50), 2) if latencies_ms else None,
+        'p95_ms': round(percentile(latencies_ms, 95), 2) if latencies_ms else None,
+        'p99_ms': round(percentile(latencies_ms, 99), 2) if latencies_ms else None,
+        'max_ms': round(latencies_ms[-1], 2) if latencies_ms else None,
+    }
+
+
+class Runner:
+    def __init__(self, app, ids, seed):
+        self.app = app
+        self.ids = ids
+        self.seed = seed
+        self._local = threading.local()
+
+    def rng(self):
+        if not hasattr(self._local, 'rng'):
+            self._local.rng = random.Random(f"{self.seed}-{threading.get_ident()}")
+        return self._local.rng
+
+    def one_request(self, build):
+        rng = self.rng()
+        identity, method, path, body = build(self.ids, rng)
+        client = self.app.test_client()
+        if identity:
+            with client.session_transaction() as flask_session:
+                flask_session.update(identity)
+
+        started = time.perf_counter()
+        response = client.open(path, method=method, json=body)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        status = response.status_code
+        response.close()
+        return elapsed_ms, status
+
+    def run_endpoint(self, build, requests, threads, warmup):
+        for _ in range(warmup):
+            self.one_request(build)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            results = list(pool.map(lambda _: self.one_request(build), range(requests)))
+        elapsed = time.perf_counter() - started
+        return summarize([ms for ms, _ in results], [status for _, status in results], elapsed)
+
+
+def git_commit():
+    def git(*args):
+        return subprocess.run(('git',) + args, capture_output=True, text=True).stdout.strip()
+    try:
+        return {'sha': git('rev-parse', 'HEAD') or None, 'dirty': bool(git('status', '--porcelain', '--untracked-files=no'))}
+    except OSError:
+        return {'sha': None, 'dirty': None}
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {baseline_path} ({(baseline['commit']['sha'] or 'unknown')[:10]}):")
+    print(f"{'endpoint':28} {'rps':>18} {'p50 ms':>18} {'p95 ms':>18} {'p99 ms':>18}")
+
+    def delta(old, new):
+        if old is None or new is None:
+            return f"{'-':>18}"
+        change = f"{(new - old) * 100 / old:+.0f}%" if old else ''
+        return f"{new:>9} {change:>8}"
+
+    for name, new in results['endpoints'].items():
+        old = baseline['endpoints'].get(name)
+        if not old:
+            print(f"{name:28} (not in baseline)")
+            continue
+        print(f"{name:28} {delta(old['throughput_rps'], new['throughput_rps'])} "
+              f"{delta(old['p50_ms'], new['p50_ms'])} {delta(old['p95_ms'], new['p95_ms'])} "
+              f"{delta(old['p99_ms'], new['p99_ms'])}")
+
+
+def run(db_path, names, threads, requests, warmup, seed, verbose):
+    ids = Identities(db_path)
+    if not ids.guests:
+        names = [name for name in names if name not in GUEST_ENDPOINTS]
+
+    os.environ['DATABASE_URI'] = f"sqlite:///{os.path.abspath(db_path)}"
+    os.environ.setdefault('SCHEDULER_ENABLED', 'false')
+    quiet = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    with quiet:
+        from app import app
+    app.config['TESTING'] = True
+    runner = Runner(app, ids, seed)
+
+    print(f"Benchmarking {len(names)} endpoints: {requests} requests each on {threads} threads "
+          f"against {db_path} ({ids.row_counts['users']} users, {ids.row_counts['guest_users']} guests)\n")
+    print(f"{'endpoint':28} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'errors':>7}")
+
+    endpoints = {}
+    for name in names:
+        with quiet:
+            summary = runner.run_endpoint(ENDPOINTS[name], requests, threads, warmup)
+        endpoints[name] = summary
+        print(f"{name:28} {summary['throughput_rps']:>8} {summary['p50_ms']:>9} {summary['p95_ms']:>9} "
+              f"{summary['p99_ms']:>9} {summary['max_ms']:>9} {summary['errors']:>7}")
+
+    return {
+        'created_at': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+        'commit': git_commit(),
+        'database': {'path': db_path, 'rows': ids.row_counts},
+        'settings': {'threads': threads, 'requests': requests, 'warmup': warmup, 'seed': seed,
+                     'python': sys.version.split()[0], 'sqlite': sqlite3.sqlite_version},
+        'endpoints': endpoints,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the hot endpoints against a synthetic database')
+    parser.add_argument('--db', default=DEFAULT_DB, help=f'database to run against (default {DEFAULT_DB})')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200, help='timed requests per endpoint')
+    parser.add_argument('--warmup', type=int, default=5, help='untimed requests per endpoint first')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--only', nargs='+', choices=sorted(ENDPOINTS), help='run just these endpoints')
+    parser.add_argument('--out', help=f'result file (default {RESULTS_DIR}/<time>-<commit>.json)')
+    parser.add_argument('--compare', help='earlier result file to compare against')
+    parser.add_argument('--verbose', action='store_true', help="keep the app's own output")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        raise SystemExit(f"{args.db} not found - generate it with python -m benchmarks.synthetic_data")
+
+    results = run(args.db, args.only or list(ENDPOINTS), args.threads, args.requests, args.warmup,
+                  args.seed, args.verbose)
+
+    out = args.out
+    if not out:
+        sha = (results['commit']['sha'] or 'unknown')[:10]
+        out = os.path.join(RESULTS_DIR, f"{datetime.utcnow():%Y%m%d-%H%M%S}-{sha}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n✅ Results saved to {out}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,449 @@
+"""
+Synthetic Data Generator
+========================
+
+Builds a mathquiz.db for benchmarking at a chosen scale:
+- Schema (tables, indexes, triggers) and reference data (strands, topics,
+  questions, badges, avatar items, car parts, race calendar, who-am-i
+  images, ...) are copied from a source database, so run the migrations on
+  the source first
+- Admin accounts and the shared guest account are kept; every other
+  learner-side table starts empty and is filled with generated schools,
+  teachers, classes, students, repeat guests, quiz attempts, question
+  history, stats, topic progress, badges, raffle entries and race results
+- Finally the app itself rebuilds what it derives from that data: activity
+  rollups, championship rank keys and the duplicate index
+
+Generation is seeded (--seed), so the same scale gives the same database.
+Every generated account's password is 'benchmark'.
+
+Usage:
+    cd /home/bbsisk/mathapp
+    source venv/bin/activate
+    python -m benchmarks.synthetic_data --scale medium
+    python -m benchmarks.synthetic_data --scale large --guests 50000 --out /tmp/bench/mathquiz.db
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+DEFAULT_SOURCE = 'instance/mathquiz.db'
+DEFAULT_OUT = 'benchmarks/data/mathquiz.db'
+
+SCALES = {
+    'small': dict(schools=2, classes_per_school=3, students_per_class=20, guests=200,
+                  attempts_per_learner=8, history_per_learner=60, raffles=2),
+    'medium': dict(schools=10, classes_per_school=6, students_per_class=25, guests=3000,
+                   attempts_per_learner=12, history_per_learner=100, raffles=5),
+    'large': dict(schools=40, classes_per_school=10, students_per_class=30, guests=25000,
+                  attempts_per_learner=15, history_per_learner=150, raffles=20),
+}
+
+CLASSES_PER_TEACHER = 2
+DAYS_OF_HISTORY = 120
+QUESTIONS_PER_QUIZ = 25
+BATCH_SIZE = 5000
+PASSWORD = 'benchmark'
+
+RAFFLE_SHARE = 0.3  # Learners holding tickets in a raffle open to them
+RACE_SHARE = 0.2    # Learners entering each completed race
+POINTS_BY_POSITION = (25, 18, 15, 12, 10, 8, 6, 4, 2, 1)
+
+# Copied row for row from the source. Every other table starts empty.
+REFERENCE_TABLES = (
+    'strands', 'topics', 'questions', 'question_flags', 'badges', 'tutorials', 'system_settings',
+    'avatar_items', 'car_parts', 'car_upgrades', 'ai_race_drivers', 'race_calendar', 'race_season_status',
+    'who_am_i_images', 'who_am_i_image_topics', 'bonus_questions', 'weekly_puzzles', 'prizes',
+    'school_closure_days', 'guest_code_pool',
+)
+KEEP_USERS_SQL = "role = 'admin' OR email = 'guest@agentmath.app'"
+
+# 3-letter animals + 5 digits stays within guest_users' 8 character limit
+GUEST_ANIMALS = ('fox', 'owl', 'cat', 'bee', 'yak', 'emu', 'elk', 'ram', 'cub', 'ant')
+
+FTS_SHADOW_SUFFIXES = ('data', 'idx', 'content', 'docsize', 'config')
+
+
+# ---------- schema and reference data ----------
+
+def copy_schema(source, target):
+    """Create every table, index, trigger and view of the source in the target"""
+    entries = source.execute("""
+        SELECT type, name, sql FROM sqlite_master
+        WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%'
+    """).fetchall()
+    virtual = {name for kind, name, sql in entries if sql.upper().startswith('CREATE VIRTUAL TABLE')}
+    shadow = {f"{name}_{suffix}" for name in virtual for suffix in FTS_SHADOW_SUFFIXES}
+
+    for kind in ('table', 'index', 'view', 'trigger'):
+        for entry_kind, name, sql in entries:
+            if entry_kind == kind and name not in shadow:
+                target.execute(sql)
+    return [name for kind, name, sql in entries if kind == 'table' and name not in shadow]
+
+
+def copy_reference_data(target, source_path, tables):
+    target.execute("ATTACH DATABASE ? AS source", (source_path,))
+    for table in REFERENCE_TABLES:
+        if table in tables:
+            target.execute(f"INSERT INTO main.{table} SELECT * FROM source.{table}")
+    target.execute(f"INSERT INTO main.users SELECT * FROM source.users WHERE {KEEP_USERS_SQL}")
+    target.commit()
+    target.execute("DETACH DATABASE source")
+
+
+# ---------- generation ----------
+
+class Generator:
+    def __init__(self, conn, scale, seed):
+        self.conn = conn
+        self.scale = scale
+        self.rng = random.Random(seed)
+        self.now = datetime.utcnow().replace(microsecond=0)
+        self.password_hash = generate_password_hash(PASSWORD)
+
+        self.questions = {}
+        for question_id, topic, difficulty in conn.execute("SELECT id, topic, difficulty FROM questions"):
+            self.questions.setdefault((topic, difficulty), []).append(question_id)
+        if not self.questions:
+            raise SystemExit("Source database has no questions - nothing to generate quizzes from")
+        self.combos = sorted(self.questions)
+        self.badges = conn.execute("SELECT id, name FROM badges").fetchall()
+
+        self.schools = []   # school ids
+        self.classes = []   # (class id, school id, teacher id)
+        self.students = []  # (user id, school id)
+        self.guests = []    # guest codes
+
+    def next_id(self, table):
+        return self.conn.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}").fetchone()[0]
+
+    def insert(self, table, columns, rows):
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        for start in range(0, len(rows), BATCH_SIZE):
+            self.conn.executemany(sql, rows[start:start + BATCH_SIZE])
+
+    def past(self, days=DAYS_OF_HISTORY):
+        return self.now - timedelta(seconds=self.rng.uniform(0, days * 86400))
+
+    def quiz_score(self, skill):
+        return sum(1 for _ in range(QUESTIONS_PER_QUIZ) if self.rng.random() < skill)
+
+    def attempt_count(self):
+        mean = self.scale['attempts_per_learner']
+        return self.rng.randint(max(1, mean // 2), mean * 3 // 2)
+
+    def favourite_combos(self):
+        return self.rng.sample(self.combos, min(len(self.combos), self.rng.randint(2, 6)))
+
+    # schools, classes and accounts
+
+    def schools_and_accounts(self):
+        school_id = self.next_id('prize_schools')
+        user_id = self.next_id('users')
+        class_id = self.next_id('classes')
+        schools, users, classes, enrollments = [], [], [], []
+
+        for s in range(self.scale['schools']):
+            schools.append((school_id, f"Benchmark School {s + 1}", f"B{s + 1:05d}", 'Dublin',
+                            'approved', 1.0, self.past(365)))
+            teacher_id = None
+            for c in range(self.scale['classes_per_school']):
+                if c % CLASSES_PER_TEACHER == 0:
+                    teacher_id = user_id
+                    user_id += 1
+                    users.append((teacher_id, f"teacher{teacher_id}@school{s + 1}.bench", self.password_hash,
+                                  f"Teacher {teacher_id}", 'teacher', 1, self.past(365), school_id))
+                classes.append((class_id, f"{c + 1}{'ABCDEFGHJK'[c % 10]} Maths", teacher_id, self.past(365)))
+                self.classes.append((class_id, school_id, teacher_id))
+                for _ in range(self.scale['students_per_class']):
+                    users.append((user_id, f"student{user_id}@school{s + 1}.bench", self.password_hash,
+                                  f"Student {user_id}", 'student', 1, self.past(365), school_id))
+                    enrollments.append((class_id, user_id, self.past(300)))
+                    self.students.append((user_id, school_id))
+                    user_id += 1
+                class_id += 1
+            self.schools.append(school_id)
+            school_id += 1
+
+        self.insert('prize_schools', ('id', 'name', 'roll_number', 'county', 'status', 'points_multiplier',
+                                      'created_at'), schools)
+        self.insert('users', ('id', 'email', 'password_hash', 'full_name', 'role', 'is_approved', 'created_at',
+                              'default_school_id'), users)
+        self.insert('classes', ('id', 'name', 'teacher_id', 'created_at'), classes)
+        self.insert('class_enrollments', ('class_id', 'student_id', 'enrolled_at'), enrollments)
+
+    def guest_accounts(self):
+        per_animal = -(-self.scale['guests'] // len(GUEST_ANIMALS))
+        self.guests = [f"{animal}{n:05d}" for animal in GUEST_ANIMALS for n in range(per_animal)]
+        self.guests = self.guests[:self.scale['guests']]
+
+    # quiz activity
+
+    def question_history(self, combos, user_id=None, guest_code=None):
+        rows = []
+        per_combo = max(1, self.scale['history_per_learner'] // len(combos))
+        for topic, difficulty in combos:
+            pool = self.questions[(topic, difficulty)]
+            for question_id in self.rng.sample(pool, min(len(pool), per_combo)):
+                rows.append((user_id, guest_code, question_id, topic, difficulty, self.past()))
+        return rows
+
+    def student_activity(self):
+        attempts, stats, progress, history, badges = [], [], [], [], []
+        history_columns = ('user_id', 'guest_code', 'question_id', 'topic', 'difficulty', 'seen_at')
+
+        for user_id, _ in self.students:
+            skill = self.rng.uniform(0.45, 0.95)
+            combos = self.favourite_combos()
+            days, per_combo = set(), {}
+            points = questions = perfect = 0
+            for _ in range(self.attempt_count()):
+                topic, difficulty = self.rng.choice(combos)
+                score = self.quiz_score(skill)
+                completed_at = self.past()
+                percentage = score * 100.0 / QUESTIONS_PER_QUIZ
+                attempts.append((user_id, topic, difficulty, score, QUESTIONS_PER_QUIZ, percentage,
+                                 self.rng.randint(180, 900), completed_at, 0, 0))
+                points += score
+                questions += QUESTIONS_PER_QUIZ
+                perfect += score == QUESTIONS_PER_QUIZ
+                days.add(completed_at.date())
+                entry = per_combo.setdefault((topic, difficulty), [0, 0, 0, 0, completed_at])
+                entry[0] += 1
+                entry[1] = max(entry[1], score)
+                entry[2] += score
+                entry[3] += QUESTIONS_PER_QUIZ
+                entry[4] = max(entry[4], completed_at)
+
+            mastered = 0
+            for (topic, difficulty), (count, best, correct, answered, last_at) in per_combo.items():
+                is_mastered = best * 100 >= 80 * QUESTIONS_PER_QUIZ and count >= 2
+                mastered += is_mastered
+                progress.append((user_id, topic, difficulty, count, best, best * 100.0 / QUESTIONS_PER_QUIZ,
+                                 answered, correct, int(is_mastered), last_at))
+            stats.append((user_id, sum(entry[0] for entry in per_combo.values()), questions, points,
+                          self.rng.randint(0, 5), self.rng.randint(1, 12), max(days) if days else None,
+                          points, points // 100 + 1, mastered, perfect, self.now))
+            for badge_id, _ in self.rng.sample(self.badges, self.rng.randint(0, min(5, len(self.badges)))):
+                badges.append((user_id, badge_id, self.past(), 100))
+            history.extend(self.question_history(combos, user_id=user_id))
+
+            if len(history) >= BATCH_SIZE:
+                self.insert('user_question_history', history_columns, history)
+                history = []
+
+        self.insert('quiz_attempts', ('user_id', 'topic', 'difficulty', 'score', 'total_questions', 'percentage',
+                                      'time_taken', 'completed_at', 'is_guest', 'who_am_i_bonus'), attempts)
+        self.insert('user_stats', ('user_id', 'total_quizzes', 'total_questions_answered', 'total_correct_answers',
+                                   'current_streak_days', 'longest_streak_days', 'last_quiz_date', 'total_points',
+                                   'level', 'topics_mastered', 'perfect_scores', 'updated_at'), stats)
+        self.insert('topic_progress', ('user_id', 'topic', 'difficulty', 'attempts', 'best_score', 'best_percentage',
+                                       'total_questions_answered', 'total_correct', 'is_mastered',
+                                       'last_attempt_at'), progress)
+        self.insert('user_badges', ('user_id', 'badge_id', 'earned_at', 'progress'), badges)
+        self.insert('user_question_history', history_columns, history)
+        return len(attempts)
+
+    def guest_activity(self):
+        guests, attempts, history, badges = [], [], [], []
+        history_columns = ('user_id', 'guest_code', 'question_id', 'topic', 'difficulty', 'seen_at')
+
+        for guest_code in self.guests:
+            skill = self.rng.uniform(0.4, 0.95)
+            combos = self.favourite_combos()
+            total = count = 0
+            last_active = created_at = self.past()
+            for _ in range(self.attempt_count()):
+                topic, difficulty = self.rng.choice(combos)
+                score = self.quiz_score(skill)
+                milestone = self.rng.choice((0, 0, 0, 10, 25))
+                completed_at = self.past()
+                attempts.append((guest_code, topic, difficulty, score, QUESTIONS_PER_QUIZ,
+                                 self.rng.randint(180, 900), completed_at, 0, milestone))
+                total += score + milestone
+                count += 1
+                created_at = min(created_at, completed_at)
+                last_active = max(last_active, completed_at)
+            guests.append((guest_code, created_at, last_active, 1, total, count))
+            for _, name in self.rng.sample(self.badges, self.rng.randint(0, min(4, len(self.badges)))):
+                badges.append((guest_code, name, self.past()))
+            history.extend(self.question_history(combos, guest_code=guest_code))
+
+            if len(history) >= BATCH_SIZE:
+                self.insert('user_question_history', history_columns, history)
+                history = []
+
+        self.insert('guest_users', ('guest_code', 'created_at', 'last_active', 'is_active', 'total_score',
+                                    'quizzes_completed'), guests)
+        self.insert('guest_quiz_attempts', ('guest_code', 'topic', 'difficulty', 'score', 'total_questions',
+                                            'time_spent', 'completed_at', 'who_am_i_bonus', 'milestone_points'),
+                    attempts)
+        self.insert('guest_badges', ('guest_code', 'badge_name', 'earned_at'), badges)
+        self.insert('user_question_history', history_columns, history)
+        return len(attempts)
+
+    # raffles and races
+
+    def raffles(self):
+        raffle_id = self.next_id('raffles')
+        entry_id = self.next_id('raffle_entries')
+        raffles, entries, blocks = [], [], []
+
+        for r in range(self.scale['raffles']):
+            # Alternate school raffles (its students) and open raffles (everyone)
+            school_id = self.schools[r % len(self.schools)] if r % 2 == 0 and self.schools else None
+            holders = [(user_id, None) for user_id, school in self.students if school_id in (None, school)]
+            if school_id is None:
+                holders += [(None, code) for code in self.guests]
+            holders = self.rng.sample(holders, int(len(holders) * RAFFLE_SHARE))
+
+            cost, ticket = 50, 0
+            for user_id, guest_code in holders:
+                count = self.rng.randint(1, 5)
+                entered_at = self.past(30)
+                entries.append((entry_id, raffle_id, user_id, school_id, count, count * cost, 1, entered_at, guest_code))
+                blocks.append((raffle_id, entry_id, ticket, count, count * cost, entered_at))
+                ticket += count
+                entry_id += 1
+            raffles.append((raffle_id, f"Benchmark Raffle {r + 1}", 'Synthetic raffle', 'A prize', school_id, cost,
+                            10, 'weekly', 4, 'physical', 1, 0, ticket, 0, self.past(60), 0, len(holders)))
+            raffle_id += 1
+
+        self.insert('raffles', ('id', 'name', 'description', 'prize_description', 'school_id', 'entry_cost',
+                                'max_entries_per_student', 'draw_frequency', 'draw_day_of_week', 'prize_type',
+                                'is_active', 'auto_draw_enabled', 'total_entries', 'total_draws', 'created_at',
+                                'round_ticket_start', 'active_participants'), raffles)
+        self.insert('raffle_entries', ('id', 'raffle_id', 'student_id', 'school_id', 'entry_count', 'points_spent',
+                                       'is_active', 'entered_at', 'guest_code'), entries)
+        self.insert('raffle_ticket_blocks', ('raffle_id', 'entry_id', 'ticket_start', 'tickets', 'points_spent',
+                                             'created_at'), blocks)
+        return len(entries)
+
+    def races(self):
+        season = self.conn.execute("SELECT MAX(season_year) FROM race_calendar").fetchone()[0]
+        if season is None:
+            return 0
+        races = self.conn.execute("""
+            SELECT id FROM race_calendar WHERE season_year = ? ORDER BY race_number
+        """, (season,)).fetchall()
+        completed = [race_id for (race_id,) in races[:max(1, len(races) // 2)]]
+
+        drivers = [(user_id, None) for user_id, _ in self.students] + [(None, code) for code in self.guests]
+        results, standings = [], {}
+        for race_id in completed:
+            field = self.rng.sample(drivers, int(len(drivers) * RACE_SHARE))
+            for position, (user_id, guest_code) in enumerate(field, start=1):
+                points = POINTS_BY_POSITION[position - 1] if position <= len(POINTS_BY_POSITION) else 0
+                results.append((race_id, user_id, guest_code, position, points, self.rng.choice(('soft', 'medium', 'hard')),
+                                0, round(self.rng.uniform(40, 100), 1), self.rng.randint(5_000_000, 6_000_000), self.past(60)))
+                entry = standings.setdefault((user_id, guest_code), [0, 0, 0, 0, 99])
+                entry[0] += points
+                entry[1] += 1
+                entry[2] += position == 1
+                entry[3] += position <= 3
+                entry[4] = min(entry[4], position)
+
+        self.insert('race_results', ('race_id', 'user_id', 'guest_code', 'finish_position', 'points_earned',
+                                     'tyre_choice', 'is_wet_race', 'race_performance_score', 'race_time_ms',
+                                     'created_at'), results)
+        self.insert('championship_standings', ('season_year', 'user_id', 'guest_code', 'total_points', 'races_entered',
+                                               'wins', 'podiums', 'best_finish', 'last_updated'),
+                    [(season, user_id, guest_code, *entry, self.now) for (user_id, guest_code), entry in standings.items()])
+        return len(results)
+
+
+# ---------- driver ----------
+
+def derive_with_app(path):
+    """Let the app rebuild what it derives from the generated rows"""
+    os.environ['DATABASE_URI'] = f"sqlite:///{os.path.abspath(path)}"
+    os.environ.setdefault('SCHEDULER_ENABLED', 'false')
+    from app import app, db, CHAMPIONSHIP_RANK_KEY_SQL
+    from activity_rollups import available as rollups_available, backfill
+    from question_dedup import available as dedup_available, rebuild
+    from sqlalchemy import text
+
+    with app.app_context():
+        if rollups_available(db):
+            print(f"✓ Activity rollups: {backfill(db)} learner-days")
+        db.session.execute(text(f"UPDATE championship_standings SET rank_key = {CHAMPIONSHIP_RANK_KEY_SQL}"))
+        db.session.commit()
+        print("✓ Championship rank keys")
+        if dedup_available(db):
+            print(f"✓ Duplicate index: {rebuild(db)} questions")
+
+
+def generate(out, scale, source=DEFAULT_SOURCE, seed=42, force=False):
+    if not os.path.exists(source):
+        raise SystemExit(f"Source database not found: {source}")
+    if os.path.exists(out):
+        if not force:
+            raise SystemExit(f"{out} already exists - pass --force to replace it")
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(out + suffix):
+                os.remove(out + suffix)
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+
+    print("=" * 60)
+    print("🧪 SYNTHETIC BENCHMARK DATABASE")
+    print("=" * 60)
+    started = time.time()
+
+    source_conn = sqlite3.connect(f"file:{os.path.abspath(source)}?mode=ro", uri=True)
+    conn = sqlite3.connect(out)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+
+    tables = copy_schema(source_conn, conn)
+    source_conn.close()
+    copy_reference_data(conn, os.path.abspath(source), tables)
+    print(f"✓ Schema ({len(tables)} tables) and reference data copied from {source}")
+
+    generator = Generator(conn, scale, seed)
+    generator.schools_and_accounts()
+    print(f"✓ {len(generator.schools)} schools, {len(generator.classes)} classes, {len(generator.students)} students")
+    generator.guest_accounts()
+    print(f"✓ {generator.student_activity()} student quiz attempts")
+    print(f"✓ {len(generator.guests)} repeat guests, {generator.guest_activity()} guest quiz attempts")
+    print(f"✓ {generator.raffles()} raffle entries")
+    print(f"✓ {generator.races()} race results")
+    conn.commit()
+    conn.close()
+
+    derive_with_app(out)
+
+    print("\n" + "=" * 60)
+    print(f"✅ {out} ready in {time.time() - started:.1f}s")
+    print("=" * 60)
+    print(f"\nNext: python -m benchmarks.endpoints --db {out}")
+
+
+def parse_scale(args):
+    scale = dict(SCALES[args.scale])
+    for key in scale:
+        value = getattr(args, key)
+        if value is not None:
+            scale[key] = value
+    return scale
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate a synthetic mathquiz.db for benchmarking')
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--out', default=DEFAULT_OUT, help=f'database to create (default {DEFAULT_OUT})')
+    parser.add_argument('--source', default=DEFAULT_SOURCE, help='migrated database to copy schema and questions from')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--force', action='store_true', help='replace --out if it exists')
+    for key in SCALES['small']:
+        parser.add_argument(f"--{key.replace('_', '-')}", dest=key, type=int, help='override the scale preset')
+    args = parser.parse_args()
+    generate(args.out, parse_scale(args), source=args.source, seed=args.seed, force=args.force)
+    sys.exit(0)
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Static Asset Build Step
+=======================
+
+student_app.html and admin_dashboard.html carry hundreds of kilobytes of
+inline JavaScript and CSS, so every page view re-downloads code that only
+changes on deploy. This script moves those inline blocks into content-hashed
+files under static/dist/ and writes slim copies of the templates to
+templates/dist/ that reference them.
+
+- Hashed bundles are served with immutable caching headers (see app.py)
+- Admin dashboard sections wrapped in `// @lazy-panel <tab>` ...
+  `// @end-lazy-panel` become separate bundles loaded the first time that
+  tab is opened
+- static/dist/asset-manifest.json lists every bundle; /sw.js reads it so the
+  service worker precache list updates automatically
+- Every text asset under static/ gets .gz (and .br, if the optional brotli
+  package is installed) siblings, which app.py serves to clients that accept them
+
+Blocks containing Jinja syntax are left inline. If a source template changes
+after a build, app.py falls back to the source template until you rebuild.
+
+Usage (run on every deploy, after git pull):
+    cd /home/bbsisk/mathapp
+    source venv/bin/activate
+    python build_assets.py
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+from datetime import datetime
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE_DIR = os.path.join(BASE_DIR, 'templates')
+STATIC_DIR = os.path.join(BASE_DIR, 'static')
+
+DIST_STATIC_DIR = os.path.join(STATIC_DIR, 'dist')
+DIST_TEMPLATE_DIR = os.path.join(TEMPLATE_DIR, 'dist')
+MANIFEST_NAME = 'asset-manifest.json'
+
+# Templates whose inline scripts/styles get extracted
+BUNDLED_TEMPLATES = ['student_app.html', 'admin_dashboard.html']
+
+# Inline blocks smaller than this stay inline (not worth an extra request)
+MIN_BLOCK_BYTES = 1024
+
+# Static files that get precompressed .gz/.br siblings
+PRECOMPRESS_EXTENSIONS = {'.js', '.css', '.html', '.json', '.svg', '.txt'}
+PRECOMPRESS_MIN_BYTES = 1024
+
+INLINE_BLOCK_RE = re.compile(r'<(script|style)(\s[^>]*)?>(.*?)</\1>', re.S | re.I)
+LAZY_PANEL_RE = re.compile(
+    r'^[ \t]*// @lazy-panel (\w+)[ \t]*\n(.*?)^[ \t]*// @end-lazy-panel[ \t]*\n',
+    re.S | re.M
+)
+JINJA_RE = re.compile(r'\{\{|\{%|\{#')
+
+
+def content_hash(content):
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()[:12]
+
+
+def write_bundle(stem, ext, content):
+    """Write a content-hashed bundle and return its path relative to static/"""
+    filename = f"{stem}.{content_hash(content)}.{ext}"
+    with open(os.path.join(DIST_STATIC_DIR, filename), 'w', encoding='utf-8') as f:
+        f.write(content)
+    return f"dist/{filename}"
+
+
+def static_url(relative_path):
+    return "{{ url_for('static', filename='" + relative_path + "') }}"
+
+
+def extract_lazy_panels(script, stem, bundles):
+    """Move lazy panel sections out of a script. Returns (script, {tab: static path})."""
+    panels = {}
+
+    def replace(match):
+        tab, body = match.group(1), match.group(2)
+        path = write_bundle(f"{stem}.panel-{tab}", 'js', body)
+        bundles.append(path)
+        panels[tab] = path
+        return f"        // Panel '{tab}' is loaded on demand from {path}\n"
+
+    script = LAZY_PANEL_RE.sub(replace, script)
+    return script, panels
+
+
+def is_extractable(tag, attrs, body):
+    attrs = (attrs or '').lower()
+    if len(body.encode('utf-8')) < MIN_BLOCK_BYTES or JINJA_RE.search(body):
+        return False
+    if tag.lower() == 'script':
+        # Only classic inline scripts - external, module and data blocks stay as they are
+        if 'src=' in attrs:
+            return False
+        type_match = re.search(r'type\s*=\s*["\']?([^"\'\s>]+)', attrs)
+        if type_match and type_match.group(1) not in ('text/javascript', 'application/javascript'):
+            return False
+    return True
+
+
+def build_template(template_name, bundles):
+    """Extract inline blocks from one template. Returns its manifest entry."""
+    source_path = os.path.join(TEMPLATE_DIR, template_name)
+    with open(source_path, encoding='utf-8') as f:
+        source = f.read()
+
+    stem = os.path.splitext(template_name)[0]
+    counter = {'n': 0}
+    lazy_panels = {}
+
+    def replace(match):
+        tag, attrs, body = match.group(1), match.group(2), match.group(3)
+        if not is_extractable(tag, attrs, body):
+            return match.group(0)
+
+        counter['n'] += 1
+        if tag.lower() == 'style':
+            path = write_bundle(f"{stem}.{counter['n']}", 'css', body)
+            bundles.append(path)
+            return f'<link rel="stylesheet" href="{static_url(path)}">'
+
+        body, panels = extract_lazy_panels(body, stem, bundles)
+        if panels:
+            lazy_panels.update(panels)
+            panel_urls = {tab: f"/static/{path}" for tab, path in panels.items()}
+            body = f"window.LAZY_PANEL_SCRIPTS = {json.dumps(panel_urls, sort_keys=True)};\n" + body
+
+        path = write_bundle(f"{stem}.{counter['n']}", 'js', body)
+        bundles.append(path)
+        return f'<script src="{static_url(path)}"></script>'
+
+    built = INLINE_BLOCK_RE.sub(replace, source)
+
+    with open(os.path.join(DIST_TEMPLATE_DIR, template_name), 'w', encoding='utf-8') as f:
+        f.write(built)
+
+    print(f"  {template_name}: {len(source.encode('utf-8')) // 1024} KB -> "
+          f"{len(built.encode('utf-8')) // 1024} KB HTML, {counter['n']} bundles, "
+          f"{len(lazy_panels)} lazy panels")
+
+    return {
+        'built_template': f"dist/{template_name}",
+        'source_hash': hashlib.sha256(source.encode('utf-8')).hexdigest(),
+        'lazy_panels': lazy_panels
+    }
+
+
+def precompress_static():
+    """Write .gz/.br siblings for text assets under static/. Returns (files, raw bytes, gz bytes)."""
+    files = raw_total = gz_total = 0
+    for root, _dirs, names in os.walk(STATIC_DIR):
+        for name in names:
+            if os.path.splitext(name)[1].lower() not in PRECOMPRESS_EXTENSIONS:
+                continue
+            path = os.path.join(root, name)
+            with open(path, 'rb') as f:
+                raw = f.read()
+            if len(raw) < PRECOMPRESS_MIN_BYTES:
+                continue
+
+            compressed = gzip.compress(raw, compresslevel=9, mtime=0)
+            with open(path + '.gz', 'wb') as f:
+                f.write(compressed)
+            if BROTLI_AVAILABLE:
+                with open(path + '.br', 'wb') as f:
+                    f.write(brotli.compress(raw, quality=11))
+
+            files += 1
+            raw_total += len(raw)
+            gz_total += len(compressed)
+    return files, raw_total, gz_total
+
+
+def build_assets():
+    print("=" * 60)
+    print("📦 BUILDING STATIC ASSET BUNDLES")
+    print("=" * 60)
+
+    # Start from a clean slate so stale hashed files don't pile up
+    for directory in (DIST_STATIC_DIR, DIST_TEMPLATE_DIR):
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+
+    bundles = []
+    templates = {}
+    for template_name in BUNDLED_TEMPLATES:
+        templates[template_name] = build_template(template_name, bundles)
+
+    manifest = {
+        'version': content_hash(''.join(sorted(bundles))),
+        'built_at': datetime.utcnow().isoformat(),
+        'templates': templates,
+        'bundles': [f"/static/{path}" for path in bundles]
+    }
+    with open(os.path.join(DIST_STATIC_DIR, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    files, raw_total, gz_total = precompress_static()
+    print(f"\n🗜️  Precompressed {files} static files: {raw_total // 1024} KB -> "
+          f"{gz_total // 1024} KB gzip" + ("" if BROTLI_AVAILABLE else " (install brotli for .br files)"))
+
+    print(f"\n✅ Wrote {len(bundles)} bundles (version {manifest['version']})")
+    print("   Restart the web app to pick up the new templates.")
+    return manifest
+
+
+if __name__ == '__main__':
+    build_assets()
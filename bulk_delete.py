@@ -0,0 +1,313 @@
+"""
+BULK DELETE
+===========
+Deletes guests, users, questions and Who Am I images by set, in chunks,
+together with every row that belongs to them.
+
+For each chunk of ids:
+1. the ids that still exist (and still match the caller's condition, e.g.
+   "inactive for 60 days") are copied into a temp table
+2. tickets the owners hold in raffle rounds still open are released: their
+   blocks are removed, the rest of the round is renumbered to close the gap
+   and the raffle's ticket and participant counters drop to match, so a
+   draw can only land on a ticket someone still holds
+3. every dependent table runs one DELETE ... WHERE col IN (SELECT id FROM
+   temp) - or an UPDATE ... SET col = NULL for rows that should be kept,
+   such as edit history
+4. the owners themselves are deleted the same way
+5. the chunk commits, so other writers get the database between chunks
+   instead of waiting for the whole cleanup
+
+Dependent tables are declared in PLANS below. Tables or columns missing
+from this database are skipped, so older installs work unchanged.
+
+BULK_DELETE_CHUNK_SIZE (default 500) sets the ids per chunk and
+BULK_DELETE_PAUSE_MS (default 0) an optional pause between chunks.
+"""
+
+import os
+import time
+
+from sqlalchemy import text, inspect, bindparam
+
+CHUNK_SIZE = int(os.environ.get('BULK_DELETE_CHUNK_SIZE', 500))
+PAUSE_MS = int(os.environ.get('BULK_DELETE_PAUSE_MS', 0))
+
+
+class Dependent:
+    """
+    Rows in `table` whose `column` points at an owner being deleted.
+    action='delete' removes them, 'nullify' keeps them and clears the column.
+    `via` reaches them through an intermediate table: (table, column, key)
+    means column IN (SELECT key FROM table WHERE column IN ids).
+    `where` adds a condition on the rows to touch.
+    """
+
+    def __init__(self, table, column, action='delete', via=None, where=None):
+        self.table = table
+        self.column = column
+        self.action = action
+        self.via = via
+        self.where = where
+
+
+class Plan:
+    """
+    `raffle_column` is the raffle_entries column holding the owner, for
+    owners whose open raffle tickets must be released first.
+    """
+
+    def __init__(self, owner_table, key, key_type, dependents, raffle_column=None):
+        self.owner_table = owner_table
+        self.key = key
+        self.key_type = key_type
+        self.dependents = dependents
+        self.raffle_column = raffle_column
+
+
+# Guest data is keyed by guest_code. A recycled code is handed to a new
+# guest, so nothing of the old guest's may be left behind under it.
+_GUEST_TABLES = (
+    'guest_quiz_attempts', 'guest_badges', 'guest_topic_progress', 'user_question_history',
+    'who_am_i_sessions', 'user_avatar_inventory', 'user_avatar_equipped', 'avatar_purchase_log',
+    'bonus_question_attempts', 'puzzle_user_status', 'user_race_cars', 'user_car_upgrades',
+    'car_part_unlocks', 'race_results', 'championship_standings', 'activity_daily_learner',
+)
+
+# Tables where a user's own rows are removed with them
+_USER_TABLES = (
+    'quiz_attempts', 'user_stats', 'topic_progress', 'user_badges', 'in_progress_quizzes',
+    'password_reset_tokens', 'user_question_history', 'who_am_i_sessions', 'user_avatar_inventory',
+    'user_avatar_equipped', 'avatar_purchase_log', 'bonus_question_attempts', 'puzzle_user_status',
+    'user_race_cars', 'user_car_upgrades', 'car_part_unlocks', 'race_results',
+    'championship_standings', 'prize_redemptions', 'school_representatives', 'activity_daily_learner',
+)
+
+# Raffle entries that won a draw stay, with their ticket blocks, so the draw still points at a ticket
+_WINNING_ENTRIES = "(SELECT winning_entry_id FROM raffle_draws WHERE winning_entry_id IS NOT NULL)"
+_UNDRAWN_ENTRIES = f"id NOT IN {_WINNING_ENTRIES}"
+_UNDRAWN_BLOCKS = f"entry_id NOT IN {_WINNING_ENTRIES}"
+
+PLANS = {
+    'guest': Plan('guest_users', 'guest_code', 'VARCHAR(20)', [
+        *(Dependent(table, 'guest_code') for table in _GUEST_TABLES),
+        Dependent('raffle_ticket_blocks', 'entry_id', via=('raffle_entries', 'guest_code', 'id'), where=_UNDRAWN_BLOCKS),
+        Dependent('raffle_entries', 'guest_code', where=_UNDRAWN_ENTRIES),
+    ], raffle_column='guest_code'),
+    'user': Plan('users', 'id', 'INTEGER', [
+        *(Dependent(table, 'user_id') for table in _USER_TABLES),
+        Dependent('question_flags', 'user_id'),
+        Dependent('question_flags', 'resolved_by', 'nullify'),
+        Dependent('question_edits', 'edited_by', 'nullify'),
+        Dependent('teacher_domain_access', 'teacher_id'),
+        Dependent('teacher_domain_access', 'granted_by', 'nullify'),
+        Dependent('domain_access_requests', 'teacher_id'),
+        Dependent('domain_access_requests', 'reviewed_by', 'nullify'),
+        Dependent('raffle_ticket_blocks', 'entry_id', via=('raffle_entries', 'student_id', 'id'), where=_UNDRAWN_BLOCKS),
+        Dependent('raffle_entries', 'student_id', where=_UNDRAWN_ENTRIES),
+        Dependent('class_enrollments', 'student_id'),
+        # A teacher's classes go with them, enrolments first
+        Dependent('class_enrollments', 'class_id', via=('classes', 'teacher_id', 'id')),
+        Dependent('activity_daily_class', 'class_id', via=('classes', 'teacher_id', 'id')),
+        Dependent('classes', 'teacher_id'),
+        # Records this user approved, fulfilled or created are kept
+        *(Dependent(table, column, 'nullify') for table, column in (
+            ('prize_redemptions', 'fulfilled_by'), ('raffle_draws', 'fulfilled_by'),
+            ('prize_schools', 'approved_by'), ('prize_school_requests', 'reviewed_by'),
+            ('school_requests', 'processed_by'), ('school_representatives', 'added_by'),
+            ('system_settings', 'updated_by'), ('raffles', 'created_by'),
+            ('weekly_puzzles', 'created_by'),
+        )),
+    ], raffle_column='student_id'),
+    'question': Plan('questions', 'id', 'INTEGER', [
+        Dependent('question_flags', 'question_id'),
+        Dependent('question_edits', 'question_id'),
+        Dependent('quiz_responses', 'question_id'),
+        Dependent('user_question_history', 'question_id'),
+    ]),
+    'who_am_i_image': Plan('who_am_i_images', 'id', 'INTEGER', [
+        Dependent('who_am_i_image_topics', 'image_id'),
+        Dependent('who_am_i_sessions', 'image_id'),
+    ]),
+}
+
+_schema = {}
+
+
+def _columns(db, table):
+    """{column: nullable} for a table, or None if it does not exist (cached)"""
+    if table not in _schema:
+        inspector = inspect(db.engine)
+        _schema[table] = ({c['name']: c.get('nullable', True) for c in inspector.get_columns(table)}
+                          if inspector.has_table(table) else None)
+    return _schema[table]
+
+
+def applicable(db, dependent):
+    columns = _columns(db, dependent.table)
+    if not columns or dependent.column not in columns:
+        return False
+    if dependent.via:
+        via_columns = _columns(db, dependent.via[0])
+        if not via_columns or dependent.via[1] not in via_columns:
+            return False
+    if dependent.action == 'nullify' and not columns[dependent.column]:
+        return False  # NOT NULL column - can't unlink, leave the rows alone
+    return True
+
+
+def _dependent_sql(dependent, ids_table):
+    target = f"(SELECT {ids_table}.id FROM {ids_table})"
+    if dependent.via:
+        via_table, via_column, via_key = dependent.via
+        target = f"(SELECT {via_key} FROM {via_table} WHERE {via_column} IN {target})"
+    condition = f"{dependent.column} IN {target}"
+    if dependent.where:
+        condition += f" AND {dependent.where}"
+    if dependent.action == 'nullify':
+        return f"UPDATE {dependent.table} SET {dependent.column} = NULL WHERE {condition}"
+    return f"DELETE FROM {dependent.table} WHERE {condition}"
+
+
+def _releases_raffle_tickets(db, plan):
+    blocks = _columns(db, 'raffle_ticket_blocks')
+    raffles = _columns(db, 'raffles')
+    return bool(plan.raffle_column and blocks and raffles and 'round_ticket_start' in raffles)
+
+
+def release_raffle_tickets(db, column, ids_table):
+    """
+    Take the tickets of active raffle entries whose `column` is in ids_table
+    out of their rounds. Each raffle's counters are updated first, which
+    takes its write lock, so no purchase can number a block in between.
+    The caller commits. Returns the number of tickets released.
+    """
+    entries = db.session.execute(text(f"""
+        SELECT raffle_id, id FROM raffle_entries
+        WHERE {column} IN (SELECT {ids_table}.id FROM {ids_table}) AND is_active = TRUE
+    """)).fetchall()
+    by_raffle = {}
+    for raffle_id, entry_id in entries:
+        by_raffle.setdefault(raffle_id, []).append(entry_id)
+
+    released = 0
+    for raffle_id, entry_ids in by_raffle.items():
+        params = {'raffle_id': raffle_id, 'entry_ids': entry_ids, 'participants': len(entry_ids)}
+        round_blocks = """
+            FROM raffle_ticket_blocks b
+            WHERE b.raffle_id = :raffle_id AND b.entry_id IN :entry_ids
+              AND b.ticket_start >= (SELECT round_ticket_start FROM raffles WHERE id = :raffle_id)
+        """
+        db.session.execute(text(f"""
+            UPDATE raffles
+            SET total_entries = total_entries - (SELECT COALESCE(SUM(b.tickets), 0) {round_blocks}),
+                active_participants = CASE WHEN active_participants > :participants
+                                           THEN active_participants - :participants ELSE 0 END
+            WHERE id = :raffle_id
+        """).bindparams(bindparam('entry_ids', expanding=True)), params)
+
+        round_start = db.session.execute(text("""
+            SELECT COALESCE(round_ticket_start, 0) FROM raffles WHERE id = :raffle_id
+        """), params).scalar()
+        blocks = db.session.execute(text("""
+            SELECT id, entry_id, ticket_start, tickets FROM raffle_ticket_blocks
+            WHERE raffle_id = :raffle_id AND ticket_start >= :round_start
+            ORDER BY ticket_start
+        """), {'raffle_id': raffle_id, 'round_start': round_start}).fetchall()
+
+        removed = [b.id for b in blocks if b.entry_id in entry_ids]
+        if not removed:
+            continue
+        released += sum(b.tickets for b in blocks if b.entry_id in entry_ids)
+        db.session.execute(text("DELETE FROM raffle_ticket_blocks WHERE id IN :ids")
+                           .bindparams(bindparam('ids', expanding=True)), {'ids': removed})
+
+        # Close the gaps. Blocks only ever move down and are moved in ascending
+        # order, so no two blocks share a ticket_start at any point.
+        moves, next_start = [], round_start
+        for block in blocks:
+            if block.entry_id in entry_ids:
+                continue
+            if block.ticket_start != next_start:
+                moves.append({'id': block.id, 'ticket_start': next_start})
+            next_start += block.tickets
+        if moves:
+            db.session.execute(text("UPDATE raffle_ticket_blocks SET ticket_start = :ticket_start WHERE id = :id"), moves)
+
+    return released
+
+
+def bulk_delete(db, kind, ids, where=None, params=None, chunk_size=None,
+                on_chunk=None, progress=None):
+    """
+    Delete the `kind` owners with these ids (guest codes for 'guest') and
+    everything that depends on them, one committed chunk at a time.
+
+    where/params: extra SQL condition on the owner table, re-checked per
+    chunk (ids no longer matching are skipped).
+    on_chunk(deleted_ids): called inside each chunk's transaction, before
+    the commit.
+    progress(summary): called after each chunk commits.
+
+    Returns {'requested', 'deleted', 'deleted_ids', 'chunks', 'rows': {table: n}}.
+    """
+    plan = PLANS[kind]
+    chunk_size = max(1, chunk_size or CHUNK_SIZE)
+    ids = list(dict.fromkeys(ids))  # De-duplicated, order kept
+    ids_table = f"bulk_delete_{kind}_ids"
+    dependents = [d for d in plan.dependents if applicable(db, d)]
+    release_tickets = _releases_raffle_tickets(db, plan)
+
+    summary = {'kind': kind, 'requested': len(ids), 'deleted': 0, 'deleted_ids': [],
+               'chunks': 0, 'total_chunks': (len(ids) + chunk_size - 1) // chunk_size, 'rows': {}}
+
+    for start in range(0, len(ids), chunk_size):
+        chunk = ids[start:start + chunk_size]
+        try:
+            db.session.execute(text(f"CREATE TEMP TABLE IF NOT EXISTS {ids_table} (id {plan.key_type} PRIMARY KEY)"))
+            db.session.execute(text(f"DELETE FROM {ids_table}"))
+            db.session.execute(text(f"""
+                INSERT INTO {ids_table} (id)
+                SELECT {plan.key} FROM {plan.owner_table}
+                WHERE {plan.key} IN :chunk {'AND (' + where + ')' if where else ''}
+            """).bindparams(bindparam('chunk', expanding=True)), {**(params or {}), 'chunk': chunk})
+            deleted_ids = [row[0] for row in db.session.execute(text(f"SELECT id FROM {ids_table}")).fetchall()]
+
+            if deleted_ids:
+                if release_tickets:
+                    released = release_raffle_tickets(db, plan.raffle_column, ids_table)
+                    if released:
+                        summary['rows']['raffle tickets released'] = summary['rows'].get('raffle tickets released', 0) + released
+                for dependent in dependents:
+                    count = db.session.execute(text(_dependent_sql(dependent, ids_table))).rowcount
+                    if count:
+                        label = dependent.table if dependent.action == 'delete' else f"{dependent.table}.{dependent.column} (unlinked)"
+                        summary['rows'][label] = summary['rows'].get(label, 0) + count
+                db.session.execute(text(f"""
+                    DELETE FROM {plan.owner_table}
+                    WHERE {plan.key} IN (SELECT {ids_table}.id FROM {ids_table})
+                """))
+                if on_chunk:
+                    on_chunk(deleted_ids)
+
+            db.session.execute(text(f"DELETE FROM {ids_table}"))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        summary['chunks'] += 1
+        summary['deleted'] += len(deleted_ids)
+        summary['deleted_ids'].extend(deleted_ids)
+        summary['rows'][plan.owner_table] = summary['deleted']
+        if progress:
+            progress(summary)
+        if PAUSE_MS and start + chunk_size < len(ids):
+            time.sleep(PAUSE_MS / 1000)
+
+    return summary
+
+
+def format_progress(summary):
+    return (f"{summary['kind']}: {summary['deleted']}/{summary['requested']} deleted, "
+            f"chunk {summary['chunks']}/{summary['total_chunks']}")
@@ -955,6 +955,7 @@ def generate_chart_questions(chart_type, difficulty, count=5, output_dir='static
 def register_chart_generator_routes(app, db, Question, admin_required_api):
     """Register Flask routes for chart question generation"""
     from sqlalchemy import text
+    from question_dedup import find_duplicate
     
     @app.route('/api/admin/generate-chart-questions', methods=['POST'])
     @admin_required_api
@@ -998,17 +999,8 @@ def register_chart_generator_routes(app, db, Question, admin_required_api):
                         skipped_count += 1
                         continue
                     
-                    # Check for duplicate
-                    existing = db.session.execute(text("""
-                        SELECT id FROM questions 
-                        WHERE topic = :topic AND difficulty = :difficulty AND question_text = :question_text
-                    """), {
-                        'topic': 'descriptive_statistics',
-                        'difficulty': q['difficulty'],
-                        'question_text': q['question_text']
-                    }).fetchone()
-                    
-                    if existing:
+                    # Check for duplicate (ignores case, spacing and punctuation)
+                    if find_duplicate(db, 'descriptive_statistics', q['question_text'], q['difficulty']):
                         skipped_count += 1
                         continue
                     
@@ -1065,6 +1065,7 @@ def generate_coordinate_questions(topic_type, difficulty, count=3, output_dir='s
 def register_coordinate_generator_routes(app, db, Question, admin_required_api):
     """Register Flask routes for coordinate geometry question generation"""
     from sqlalchemy import text
+    from question_dedup import find_duplicate
     
     @app.route('/api/admin/generate-coordinate-questions', methods=['POST'])
     @admin_required_api
@@ -1112,17 +1113,8 @@ def register_coordinate_generator_routes(app, db, Question, admin_required_api):
                         skipped_count += 1
                         continue
                     
-                    # Check for duplicate
-                    existing = db.session.execute(text("""
-                        SELECT id FROM questions 
-                        WHERE topic = :topic AND difficulty = :difficulty AND question_text = :question_text
-                    """), {
-                        'topic': 'coordinate_geometry',
-                        'difficulty': q['difficulty'],
-                        'question_text': q['question_text']
-                    }).fetchone()
-                    
-                    if existing:
+                    # Check for duplicate (ignores case, spacing and punctuation)
+                    if find_duplicate(db, 'coordinate_geometry', q['question_text'], q['difficulty']):
                         skipped_count += 1
                         continue
                     
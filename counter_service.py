@@ -0,0 +1,181 @@
+"""
+WRITE-BEHIND COUNTERS
+=====================
+Hot columns that are only ever incremented or moved forward (bonus question
+times_shown / times_correct, puzzle view counts, guest last_active) are
+buffered in memory and written in batches, instead of each request running
+its own UPDATE and commit.
+
+- increment(target, key, amount): add to a counter column
+- touch(target, key, value): move a timestamp column forward (keeps the max)
+- A background thread in each worker flushes every COUNTER_FLUSH_SECONDS as
+  one transaction with one executemany UPDATE per target
+- A flush also runs when COUNTER_MAX_PENDING keys are waiting, and when the
+  process exits normally
+
+Staleness: readers see a value at most COUNTER_FLUSH_SECONDS old.
+Crash-loss budget: if a worker is killed outright, what it had not flushed
+is lost - at most COUNTER_FLUSH_SECONDS of updates, and never more than
+COUNTER_MAX_PENDING keys. Set COUNTER_FLUSH_SECONDS=0 to write every update
+straight through (the old behaviour).
+
+Targets are declared in TARGETS below - only those columns can be written.
+"""
+
+import atexit
+import os
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import text
+
+FLUSH_SECONDS = float(os.environ.get('COUNTER_FLUSH_SECONDS', 10))
+MAX_PENDING = int(os.environ.get('COUNTER_MAX_PENDING', 1000))
+
+# name -> (table, column, key column, kind)
+TARGETS = {
+    'bonus_questions.times_shown': ('bonus_questions', 'times_shown', 'id', 'increment'),
+    'bonus_questions.times_correct': ('bonus_questions', 'times_correct', 'id', 'increment'),
+    'weekly_puzzles.view_count': ('weekly_puzzles', 'view_count', 'id', 'increment'),
+    'weekly_puzzles.hint_view_count': ('weekly_puzzles', 'hint_view_count', 'id', 'increment'),
+    'guest_users.last_active': ('guest_users', 'last_active', 'guest_code', 'max'),
+}
+
+
+def target_sql(target):
+    table, column, key_column, kind = TARGETS[target]
+    if kind == 'increment':
+        return f"UPDATE {table} SET {column} = COALESCE({column}, 0) + :value WHERE {key_column} = :key"
+    return (f"UPDATE {table} SET {column} = :value "
+            f"WHERE {key_column} = :key AND ({column} IS NULL OR {column} < :value)")
+
+
+class WriteBehindCounters:
+    """Buffers counter and timestamp updates per worker and flushes them in batches"""
+
+    def __init__(self, app, db, flush_seconds=FLUSH_SECONDS, max_pending=MAX_PENDING):
+        self.app = app
+        self.db = db
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self._pending = {}  # (target, key) -> value
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+        self.stats = {'flushes': 0, 'rows': 0, 'errors': 0, 'last_flush_at': None,
+                      'last_flush_ms': None, 'last_error': None}
+        atexit.register(self.flush)
+
+    @property
+    def write_through(self):
+        return self.flush_seconds <= 0
+
+    def start(self):
+        """Start the flush thread for this process (safe to call on every request)"""
+        if self.write_through:
+            return
+        if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._pending = {}  # Anything inherited across a fork belongs to the parent
+            self._thread = threading.Thread(target=self._loop, name='write-behind-counters', daemon=True)
+            self._thread.start()
+
+    def _loop(self):
+        while True:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            self.flush()
+
+    def increment(self, target, key, amount=1):
+        if self.write_through:
+            return self._write_now(target, key, amount)
+        with self._lock:
+            self._pending[(target, key)] = self._pending.get((target, key), 0) + amount
+            backlog = len(self._pending)
+        self._check_backlog(backlog)
+
+    def touch(self, target, key, value=None):
+        value = value or datetime.utcnow()
+        if self.write_through:
+            return self._write_now(target, key, value)
+        with self._lock:
+            current = self._pending.get((target, key))
+            if current is None or value > current:
+                self._pending[(target, key)] = value
+            backlog = len(self._pending)
+        self._check_backlog(backlog)
+
+    def _check_backlog(self, backlog):
+        if backlog >= self.max_pending:
+            self._wake.set()  # Flush from the background thread, not inside the request's transaction
+
+    def _write_now(self, target, key, value):
+        self.db.session.execute(text(target_sql(target)), {'key': key, 'value': value})
+        self.db.session.commit()
+
+    def flush(self):
+        """Write everything pending in one transaction. Returns the number of rows updated."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+
+            batches = {}
+            for (target, key), value in pending.items():
+                batches.setdefault(target, []).append({'key': key, 'value': value})
+
+            started = time.time()
+            try:
+                with self.app.app_context():
+                    session = self.db.session
+                    try:
+                        for target, params in batches.items():
+                            session.execute(text(target_sql(target)), params)
+                        session.commit()
+                    except Exception:
+                        session.rollback()
+                        raise
+            except Exception as e:
+                self._requeue(pending)
+                self.stats['errors'] += 1
+                self.stats['last_error'] = str(e)
+                print(f"⚠️ Counter flush failed, will retry: {e}")
+                return 0
+
+            self.stats['flushes'] += 1
+            self.stats['rows'] += len(pending)
+            self.stats['last_flush_at'] = datetime.utcnow().isoformat()
+            self.stats['last_flush_ms'] = int((time.time() - started) * 1000)
+            return len(pending)
+
+    def _requeue(self, pending):
+        """Merge a failed batch back in, keeping within the crash-loss budget"""
+        with self._lock:
+            for (target, key), value in pending.items():
+                if len(self._pending) >= self.max_pending and (target, key) not in self._pending:
+                    continue  # Over budget - drop rather than grow without bound
+                current = self._pending.get((target, key))
+                if TARGETS[target][3] == 'increment':
+                    self._pending[(target, key)] = (current or 0) + value
+                elif current is None or value > current:
+                    self._pending[(target, key)] = value
+
+    def status(self):
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            'mode': 'write-through' if self.write_through else 'write-behind',
+            'flush_seconds': self.flush_seconds,
+            'max_pending': self.max_pending,
+            'pending': pending,
+            'thread_running': bool(self._thread and self._thread.is_alive()),
+            **self.stats
+        }
@@ -463,6 +463,7 @@ def generate_currency_questions(question_types=None, difficulties=None, count=3,
 def register_currency_generator_routes(app, db, Question, admin_required_api):
     """Register Flask routes for Currency question generation"""
     from sqlalchemy import text
+    from question_dedup import find_duplicate
     
     @app.route('/api/admin/generate-currency-questions', methods=['POST'])
     @admin_required_api
@@ -490,11 +491,7 @@ def register_currency_generator_routes(app, db, Question, admin_required_api):
                 skipped_count += 1
                 continue
             
-            existing = db.session.execute(text(
-                "SELECT id FROM questions WHERE topic = :topic AND question_text = :qt"
-            ), {'topic': TOPIC_NAME, 'qt': q['question_text']}).fetchone()
-            
-            if existing:
+            if find_duplicate(db, TOPIC_NAME, q['question_text']):
                 skipped_count += 1
                 continue
             
@@ -0,0 +1,238 @@
+"""
+DATABASE CONNECTIONS
+====================
+Connection settings and routing for the app's database (sql_dialect.py
+decides which database that is).
+
+- SQLite runs in WAL mode, so readers and the writer no longer block each
+  other. Every connection also gets busy_timeout, synchronous and a larger
+  page cache (SQLITE_BUSY_TIMEOUT_MS, SQLITE_SYNCHRONOUS, SQLITE_CACHE_KB)
+- Views marked @read_only run their queries on a separate pool of read-only
+  connections (mode=ro on SQLite, DATABASE_READ_URI on other databases when
+  set), so long reports never take a connection quiz submissions need and
+  cannot write by mistake
+- @retry_on_lock re-runs a write that failed with "database is locked",
+  backing off exponentially, as long as the failed call has not committed
+  anything yet (DB_WRITE_RETRIES, DB_RETRY_BASE_MS)
+- status() reports the settings in effect, pool usage, write statement
+  timings (which include any wait for the write lock), lock errors and
+  retries - served at /api/admin/database/status
+"""
+
+import os
+import random
+import threading
+import time
+from functools import wraps
+
+from flask import g, has_app_context, current_app
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
+
+BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL').upper()
+CACHE_KB = int(os.environ.get('SQLITE_CACHE_KB', 16000))
+READ_POOL_SIZE = int(os.environ.get('DB_READ_POOL_SIZE', 5))
+
+WRITE_RETRIES = int(os.environ.get('DB_WRITE_RETRIES', 3))
+RETRY_BASE_MS = int(os.environ.get('DB_RETRY_BASE_MS', 50))
+RETRY_MAX_MS = 1000
+
+SLOW_WRITE_MS = 100
+
+SYNCHRONOUS_MODES = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+WRITE_VERBS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+_READ_ONLY_FLAG = 'db_read_only'
+
+
+def is_lock_error(error):
+    return isinstance(error, OperationalError) and 'locked' in str(getattr(error, 'orig', error)).lower()
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy's session, sending queries to the read-only pool while a @read_only view runs"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context() and g.get(_READ_ONLY_FLAG):
+            manager = current_app.extensions.get('db_connections')
+            if manager and manager.read_engine is not None:
+                manager.count('read_only_queries')
+                return manager.read_engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class ConnectionManager:
+    """Tunes the app's connections, owns the read-only pool and keeps lock metrics"""
+
+    def __init__(self, app, db):
+        self.app = app
+        self.db = db
+        self._lock = threading.Lock()
+        self.stats = {
+            'writes': 0, 'write_ms_total': 0.0, 'write_ms_max': 0.0, 'slow_writes': 0,
+            'lock_errors': 0, 'retries': 0, 'retry_sleep_ms': 0, 'retries_exhausted': 0,
+            'read_only_requests': 0, 'read_only_queries': 0,
+        }
+        if SYNCHRONOUS not in SYNCHRONOUS_MODES:
+            raise ValueError(f"SQLITE_SYNCHRONOUS must be one of {', '.join(SYNCHRONOUS_MODES)}")
+
+        with app.app_context():
+            self.engine = db.engine
+        self.is_sqlite = self.engine.dialect.name == 'sqlite'
+
+        if self.is_sqlite:
+            event.listen(self.engine, 'connect', self._tune_sqlite)
+        event.listen(self.engine, 'before_cursor_execute', self._before_execute)
+        event.listen(self.engine, 'after_cursor_execute', self._after_execute)
+        event.listen(self.engine, 'handle_error', self._on_error)
+        event.listen(RoutingSession, 'after_commit', self._on_commit)
+
+        if self.is_sqlite:
+            self._enable_wal()
+        self.read_engine = self._make_read_engine()
+        app.extensions['db_connections'] = self
+
+    # ---------- connection setup ----------
+
+    def _tune_sqlite(self, dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA synchronous = {SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA cache_size = -{CACHE_KB}")
+        cursor.execute("PRAGMA temp_store = MEMORY")
+        cursor.close()
+
+    def _enable_wal(self):
+        """WAL is a property of the database file, so switching once is enough"""
+        try:
+            with self.engine.connect() as conn:
+                mode = conn.exec_driver_sql("PRAGMA journal_mode = WAL").scalar()
+            if mode != 'wal':
+                print(f"⚠️ SQLite journal mode is {mode}, not WAL - readers and writers will block each other")
+        except OperationalError as e:
+            print(f"⚠️ Could not switch SQLite to WAL mode: {e}")
+        # No pooled connections may be inherited by forked workers
+        self.engine.dispose()
+
+    def _make_read_engine(self):
+        if self.is_sqlite:
+            path = self.engine.url.database
+            if not path or path == ':memory:':
+                return None
+            engine = create_engine(f"sqlite:///file:{os.path.abspath(path)}?mode=ro&uri=true",
+                                   pool_size=READ_POOL_SIZE, max_overflow=READ_POOL_SIZE)
+            event.listen(engine, 'connect', self._tune_sqlite)
+            return engine
+
+        read_uri = os.environ.get('DATABASE_READ_URI')
+        if not read_uri:
+            return None  # Read-only views share the primary pool
+        if read_uri.startswith('postgres://'):
+            read_uri = 'postgresql://' + read_uri[len('postgres://'):]
+        return create_engine(read_uri, pool_pre_ping=True, pool_size=READ_POOL_SIZE, max_overflow=READ_POOL_SIZE)
+
+    # ---------- metrics ----------
+
+    def count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip()[:7].upper().startswith(WRITE_VERBS):
+            conn.info.setdefault('write_started', []).append(time.perf_counter())
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get('write_started')
+        if started and statement.lstrip()[:7].upper().startswith(WRITE_VERBS):
+            elapsed_ms = (time.perf_counter() - started.pop()) * 1000
+            with self._lock:
+                self.stats['writes'] += 1
+                self.stats['write_ms_total'] += elapsed_ms
+                self.stats['write_ms_max'] = max(self.stats['write_ms_max'], elapsed_ms)
+                if elapsed_ms >= SLOW_WRITE_MS:
+                    self.stats['slow_writes'] += 1
+
+    def _on_error(self, context):
+        if context.connection is not None:
+            context.connection.info.pop('write_started', None)
+        if is_lock_error(context.sqlalchemy_exception):
+            self.count('lock_errors')
+
+    def _on_commit(self, session):
+        session.info['commits'] = session.info.get('commits', 0) + 1
+
+    def _pragmas(self, engine):
+        with engine.connect() as conn:
+            return {name: conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+                    for name in ('journal_mode', 'busy_timeout', 'synchronous', 'cache_size')}
+
+    def status(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats['write_ms_avg'] = round(stats['write_ms_total'] / stats['writes'], 2) if stats['writes'] else None
+        stats['write_ms_total'] = round(stats['write_ms_total'], 1)
+        stats['write_ms_max'] = round(stats['write_ms_max'], 1)
+        result = {
+            'dialect': self.engine.dialect.name,
+            'primary_pool': self.engine.pool.status(),
+            'read_pool': self.read_engine.pool.status() if self.read_engine is not None else None,
+            'write_retries': WRITE_RETRIES,
+            'slow_write_ms': SLOW_WRITE_MS,
+            **stats
+        }
+        if self.is_sqlite:
+            result['pragmas'] = self._pragmas(self.engine)
+        return result
+
+    # ---------- retries ----------
+
+    def run_with_retry(self, fn, *args, **kwargs):
+        session = self.db.session()
+        for attempt in range(WRITE_RETRIES + 1):
+            commits = session.info.get('commits', 0)
+            try:
+                return fn(*args, **kwargs)
+            except OperationalError as e:
+                # Once part of the work is committed, re-running it would repeat that part
+                if not is_lock_error(e) or session.info.get('commits', 0) != commits:
+                    raise
+                self.db.session.rollback()
+                if attempt == WRITE_RETRIES:
+                    self.count('retries_exhausted')
+                    raise
+                delay_ms = min(RETRY_MAX_MS, RETRY_BASE_MS * 2 ** attempt) * random.uniform(0.5, 1.0)
+                with self._lock:
+                    self.stats['retries'] += 1
+                    self.stats['retry_sleep_ms'] += int(delay_ms)
+                print(f"⚠️ Database locked in {fn.__name__}, retry {attempt + 1}/{WRITE_RETRIES} in {int(delay_ms)}ms")
+                time.sleep(delay_ms / 1000)
+
+
+def read_only(view):
+    """Mark a view as read-only: its queries use the read-only connection pool"""
+    @wraps(view)
+    def decorated_function(*args, **kwargs):
+        manager = current_app.extensions.get('db_connections')
+        if manager is None or manager.read_engine is None:
+            return view(*args, **kwargs)
+        manager.count('read_only_requests')
+        previous = g.get(_READ_ONLY_FLAG, False)
+        setattr(g, _READ_ONLY_FLAG, True)
+        try:
+            return view(*args, **kwargs)
+        finally:
+            setattr(g, _READ_ONLY_FLAG, previous)
+    return decorated_function
+
+
+def retry_on_lock(fn):
+    """Re-run fn when it fails with "database is locked" before committing anything"""
+    @wraps(fn)
+    def decorated_function(*args, **kwargs):
+        manager = current_app.extensions.get('db_connections')
+        if manager is None:
+            return fn(*args, **kwargs)
+        return manager.run_with_retry(fn, *args, **kwargs)
+    return decorated_function
@@ -1154,6 +1154,7 @@ def generate_geometry_questions(shape_type, difficulty, count=3, output_dir='sta
 def register_geometry_generator_routes(app, db, Question, admin_required_api):
     """Register Flask routes for geometry question generation"""
     from sqlalchemy import text
+    from question_dedup import find_duplicate
     
     @app.route('/api/admin/generate-geometry-questions', methods=['POST'])
     @admin_required_api
@@ -1197,17 +1198,8 @@ def register_geometry_generator_routes(app, db, Question, admin_required_api):
                         skipped_count += 1
                         continue
                     
-                    # Check for duplicate
-                    existing = db.session.execute(text("""
-                        SELECT id FROM questions 
-                        WHERE topic = :topic AND difficulty = :difficulty AND question_text = :question_text
-                    """), {
-                        'topic': 'geometry',
-                        'difficulty': q['difficulty'],
-                        'question_text': q['question_text']
-                    }).fetchone()
-                    
-                    if existing:
+                    # Check for duplicate (ignores case, spacing and punctuation)
+                    if find_duplicate(db, 'geometry', q['question_text'], q['difficulty']):
                         skipped_count += 1
                         continue
                     
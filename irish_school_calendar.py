@@ -8,6 +8,7 @@ excluding weekends, bank holidays, and school holiday periods.
 Used by the streak system to only count school days.
 """
 
+from array import array
 from datetime import date, timedelta
 from typing import List, Tuple
 
@@ -163,7 +164,135 @@ def get_irish_school_holidays(year: int) -> List[Tuple[date, date]]:
     return holidays
 
 
-def is_school_day(check_date: date) -> bool:
+# ==================== CALENDAR INDEX ====================
+# Streak checks run on every quiz submit, so the calendar is precomputed once
+# per process instead of re-deriving Easter, bank holidays and holiday ranges
+# for every date looked at.
+
+class SchoolCalendarIndex:
+    """
+    School days for a span of whole years, computed once:
+    - a day-by-day bitmap (1 = school day)
+    - prefix sums, so counting school days between two dates is one subtraction
+    - the list of school days in order, so next/previous school day is one lookup
+
+    `closures` are extra non-school days (e.g. one school's own closures)
+    removed on top of the national calendar.
+    """
+
+    def __init__(self, first_year: int, last_year: int, closures=()):
+        self.first_year = first_year
+        self.last_year = last_year
+        self.origin = date(first_year, 1, 1)
+        self.end = date(last_year + 1, 1, 1)
+        self.closures = frozenset(closures)
+
+        total_days = (self.end - self.origin).days
+        flags = bytearray(total_days)
+        for year in range(first_year, last_year + 1):
+            self._mark_year(flags, year)
+        for closure in self.closures:
+            if self.origin <= closure < self.end:
+                flags[(closure - self.origin).days] = 0
+
+        prefix = array('i', bytes(4 * (total_days + 1)))
+        school_days = array('i')
+        running = 0
+        for offset, flag in enumerate(flags):
+            if flag:
+                school_days.append(offset)
+                running += 1
+            prefix[offset + 1] = running
+
+        self.flags = flags
+        self.prefix = prefix
+        self.school_days = school_days
+
+    def _mark_year(self, flags: bytearray, year: int):
+        """Set the flags for one calendar year: weekdays, minus bank and school holidays"""
+        start = date(year, 1, 1)
+        base = (start - self.origin).days
+        year_days = (date(year + 1, 1, 1) - start).days
+        first_weekday = start.weekday()
+        for i in range(year_days):
+            flags[base + i] = 1 if (first_weekday + i) % 7 < 5 else 0
+
+        for holiday in get_irish_bank_holidays(year):
+            flags[(holiday - self.origin).days] = 0
+
+        # School holidays come from the academic years starting last year and this year
+        for academic_year in (year - 1, year):
+            try:
+                school_holidays = get_irish_school_holidays(academic_year)
+            except Exception:
+                continue  # Skip if date calculation fails
+            for start_date, end_date in school_holidays:
+                first = max(start_date, start)
+                last = min(end_date, date(year, 12, 31))
+                for i in range((first - self.origin).days, (last - self.origin).days + 1):
+                    flags[i] = 0
+
+    def covers(self, *dates: date) -> bool:
+        return all(self.origin <= d < self.end for d in dates)
+
+    def is_school_day(self, check_date: date) -> bool:
+        return bool(self.flags[(check_date - self.origin).days])
+
+    def school_day_number(self, check_date: date) -> int:
+        """Number of school days in the index before check_date"""
+        return self.prefix[(check_date - self.origin).days]
+
+    def count_school_days_between(self, start_date: date, end_date: date) -> int:
+        """School days from start_date up to (not including) end_date"""
+        if end_date <= start_date:
+            return 0
+        return self.school_day_number(end_date) - self.school_day_number(start_date)
+
+    def next_school_day(self, from_date: date):
+        """First school day after from_date, or None past the end of the index"""
+        k = self.prefix[(from_date - self.origin).days + 1]
+        if k < len(self.school_days):
+            return self.origin + timedelta(days=self.school_days[k])
+        return None
+
+    def previous_school_day(self, from_date: date):
+        """Last school day before from_date, or None before the start of the index"""
+        k = self.prefix[(from_date - self.origin).days] - 1
+        if k >= 0:
+            return self.origin + timedelta(days=self.school_days[k])
+        return None
+
+
+_calendar_indexes = {}  # frozenset of closure dates -> SchoolCalendarIndex
+_MAX_CALENDAR_INDEXES = 256
+
+
+def get_calendar_index(*dates: date, closures=()) -> SchoolCalendarIndex:
+    """
+    Calendar index covering the given dates (with a year's margin either side),
+    for the national calendar plus any extra closure days. Built once and
+    widened only when a date falls outside it.
+    """
+    closures = frozenset(closures)
+    years = [d.year for d in dates] or [date.today().year]
+    first_year, last_year = min(years) - 1, max(years) + 1
+
+    index = _calendar_indexes.get(closures)
+    if index is not None and index.first_year <= first_year and last_year <= index.last_year:
+        return index
+
+    if index is not None:
+        first_year = min(first_year, index.first_year)
+        last_year = max(last_year, index.last_year)
+    elif len(_calendar_indexes) >= _MAX_CALENDAR_INDEXES:
+        _calendar_indexes.pop(next(iter(_calendar_indexes)))
+
+    index = SchoolCalendarIndex(first_year, last_year, closures)
+    _calendar_indexes[closures] = index
+    return index
+
+
+def is_school_day(check_date: date, closures=()) -> bool:
     """
     Determine if a given date is a school day in Ireland.
     
@@ -171,67 +300,38 @@ def is_school_day(check_date: date) -> bool:
     - Weekends (Saturday, Sunday)
     - Bank holidays
     - School holiday periods
+    - Any extra closure days passed in (e.g. a school's own closures)
     
     Returns True for regular school days (Mon-Fri during term time)
     """
-    # Check weekend
-    if check_date.weekday() >= 5:  # Saturday = 5, Sunday = 6
-        return False
-    
-    # Check bank holidays
-    year = check_date.year
-    bank_holidays = get_irish_bank_holidays(year)
-    if check_date in bank_holidays:
-        return False
-    
-    # Check school holiday periods
-    # Need to check current year and previous year's academic calendar
-    for academic_year in [year - 1, year]:
-        try:
-            school_holidays = get_irish_school_holidays(academic_year)
-            for start_date, end_date in school_holidays:
-                if start_date <= check_date <= end_date:
-                    return False
-        except:
-            pass  # Skip if date calculation fails
-    
-    return True
+    return get_calendar_index(check_date, closures=closures).is_school_day(check_date)
 
 
-def get_previous_school_day(from_date: date) -> date:
+def get_previous_school_day(from_date: date, closures=()) -> date:
     """Get the most recent school day before the given date"""
-    check = from_date - timedelta(days=1)
-    while not is_school_day(check):
-        check -= timedelta(days=1)
-        # Safety limit - don't go back more than 100 days
-        if (from_date - check).days > 100:
-            return from_date - timedelta(days=1)
+    check = get_calendar_index(from_date, closures=closures).previous_school_day(from_date)
+    # Safety limit - don't go back more than 100 days
+    if check is None or (from_date - check).days > 100:
+        return from_date - timedelta(days=1)
     return check
 
 
-def get_next_school_day(from_date: date) -> date:
+def get_next_school_day(from_date: date, closures=()) -> date:
     """Get the next school day after the given date"""
-    check = from_date + timedelta(days=1)
-    while not is_school_day(check):
-        check += timedelta(days=1)
-        # Safety limit - don't go forward more than 100 days
-        if (check - from_date).days > 100:
-            return from_date + timedelta(days=1)
+    check = get_calendar_index(from_date, closures=closures).next_school_day(from_date)
+    # Safety limit - don't go forward more than 100 days
+    if check is None or (check - from_date).days > 100:
+        return from_date + timedelta(days=1)
     return check
 
 
-def count_school_days_between(start_date: date, end_date: date) -> int:
+def count_school_days_between(start_date: date, end_date: date, closures=()) -> int:
     """Count the number of school days between two dates (exclusive of end)"""
-    count = 0
-    current = start_date
-    while current < end_date:
-        if is_school_day(current):
-            count += 1
-        current += timedelta(days=1)
-    return count
+    index = get_calendar_index(start_date, end_date, closures=closures)
+    return index.count_school_days_between(start_date, end_date)
 
 
-def is_consecutive_school_day(last_activity_date: date, today: date) -> bool:
+def is_consecutive_school_day(last_activity_date: date, today: date, closures=()) -> bool:
     """
     Check if today is the consecutive school day after last_activity_date.
     
@@ -244,13 +344,13 @@ def is_consecutive_school_day(last_activity_date: date, today: date) -> bool:
         return False  # Same day or future date
     
     # Get the next expected school day after last activity
-    expected_next = get_next_school_day(last_activity_date)
+    expected_next = get_next_school_day(last_activity_date, closures)
     
     # If today is that expected school day, streak continues
     return today == expected_next
 
 
-def should_reset_streak(last_activity_date: date, today: date) -> bool:
+def should_reset_streak(last_activity_date: date, today: date, closures=()) -> bool:
     """
     Determine if a streak should be reset.
     
@@ -264,13 +364,47 @@ def should_reset_streak(last_activity_date: date, today: date) -> bool:
     
     # Count school days between last activity and today
     # If more than 1, they missed at least one school day
-    school_days_missed = count_school_days_between(last_activity_date, today)
+    school_days_missed = count_school_days_between(last_activity_date, today, closures)
     
     # They should have been active on the next school day
     # So if school_days_missed > 1, they missed days
     return school_days_missed > 1
 
 
+def advance_streak(streak: int, last_activity_date, today: date, closures=()) -> int:
+    """
+    The streak after activity on `today`, given the streak and date of the
+    previous activity. Same rules as the quiz submit path, so a bulk
+    recompute gives the same answer as the streaks built up quiz by quiz.
+    """
+    if last_activity_date is None:
+        return 1  # First quiz ever
+    if last_activity_date == today:
+        return streak  # Same day - no change to streak
+    if is_consecutive_school_day(last_activity_date, today, closures):
+        return streak + 1  # Consecutive school day - streak continues!
+    if should_reset_streak(last_activity_date, today, closures):
+        return 1  # Missed a school day - streak resets
+    return streak + 1  # Edge case (e.g., activity during holidays) - continue streak
+
+
+def compute_streaks(activity_dates, closures=()) -> Tuple[int, int]:
+    """
+    (current streak, longest streak) for one learner's sorted, distinct
+    activity dates, in a single pass over the precomputed index.
+    """
+    if not activity_dates:
+        return 0, 0
+    get_calendar_index(activity_dates[0], activity_dates[-1], closures=closures)
+    streak = longest = 0
+    previous = None
+    for day in activity_dates:
+        streak = advance_streak(streak, previous, day, closures)
+        longest = max(longest, streak)
+        previous = day
+    return streak, longest
+
+
 # Streak milestone definitions
 STREAK_MILESTONES = {
     3: {'name': 'Getting Started', 'points': 10, 'emoji': '🔥'},
@@ -0,0 +1,399 @@
+"""
+BACKGROUND JOB SCHEDULER
+========================
+Runs the app's periodic jobs (raffle auto-draws, guest cleanup, mastery
+recalculation) inside the web app, instead of waiting for someone to hit a
+cron URL or run a script by hand.
+
+- Jobs are declared in app.py as ScheduledJob entries
+- Next-run times are stored in the scheduled_jobs table, so restarts and
+  deploys don't reset them
+- Every worker runs a scheduler thread, but only the worker holding the
+  scheduler_lease row runs jobs. If it dies, another worker takes over when
+  the lease expires
+- Each run also claims its slot by moving next_run_at forward first, so a
+  slot never runs twice even if two processes both think they are leader
+- Every run is recorded in scheduled_job_runs (admin status endpoint + CLI)
+- Long jobs can call report_progress() as they go; the status shows it
+  while the job is running
+
+Create the tables first with migrate_job_scheduler.py.
+Set SCHEDULER_ENABLED=false to keep the thread from starting (e.g. on hosts
+whose web workers can't run background threads) and use the CLI from a
+scheduled task instead:
+
+    python job_scheduler.py status
+    python job_scheduler.py run-due
+    python job_scheduler.py run <job_name>
+"""
+
+import os
+import random
+import socket
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+TICK_SECONDS = 30          # How often each worker checks for due jobs
+LEASE_SECONDS = 300        # Leader lease; renewed every tick and before each job
+RUN_HISTORY_PER_JOB = 200  # Runs kept per job in scheduled_job_runs
+RESULT_MAX_CHARS = 2000
+
+
+class ScheduledJob:
+    """
+    A periodic job. Give either `every` (a timedelta) or `daily_at` ('HH:MM',
+    UTC). Each next run is pushed back by a random 0..jitter seconds so jobs
+    don't all fire on the same tick.
+    """
+
+    def __init__(self, name, func, every=None, daily_at=None, jitter=0, description=''):
+        if (every is None) == (daily_at is None):
+            raise ValueError(f"Job {name} needs exactly one of every= or daily_at=")
+        self.name = name
+        self.func = func
+        self.every = every
+        self.daily_at = daily_at
+        self.jitter = jitter
+        self.description = description
+
+    def next_run_after(self, moment):
+        if self.every is not None:
+            base = moment + self.every
+        else:
+            hour, minute = (int(part) for part in self.daily_at.split(':'))
+            base = moment.replace(hour=hour, minute=minute, second=0, microsecond=0)
+            if base <= moment:
+                base += timedelta(days=1)
+        return base + timedelta(seconds=random.uniform(0, self.jitter))
+
+    def first_run(self, now):
+        # Interval jobs start soon after deploy; daily jobs wait for their time
+        if self.every is not None:
+            return now + timedelta(seconds=random.uniform(0, self.jitter))
+        return self.next_run_after(now)
+
+    def schedule_description(self):
+        if self.every is not None:
+            return f"every {int(self.every.total_seconds() // 60)} min"
+        return f"daily at {self.daily_at} UTC"
+
+
+def summarise_result(result):
+    if result is None:
+        return None
+    return str(result)[:RESULT_MAX_CHARS]
+
+
+class JobScheduler:
+    """Leader-elected scheduler thread. One instance per worker process."""
+
+    def __init__(self, app, db, jobs, tick_seconds=TICK_SECONDS, lease_seconds=LEASE_SECONDS):
+        self.app = app
+        self.db = db
+        self.jobs = {job.name: job for job in jobs}
+        self.tick_seconds = tick_seconds
+        self.lease_seconds = lease_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.enabled = os.environ.get('SCHEDULER_ENABLED', 'true').lower() == 'true'
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._running = threading.local()  # Job running on this thread, for report_progress()
+
+    # ---------- thread ----------
+
+    def start(self):
+        """Start this worker's scheduler thread (no-op if already running or disabled)"""
+        if not self.enabled or self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            # Forked workers inherit the parent's object, so re-read our pid
+            self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+            self._thread = threading.Thread(target=self._loop, name='job-scheduler', daemon=True)
+            self._thread.start()
+            print(f"⏰ Job scheduler started on {self.worker_id} ({len(self.jobs)} jobs)")
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        # Stagger workers so they don't all race for the lease at once
+        self._stop.wait(random.uniform(1, self.tick_seconds))
+        while not self._stop.is_set():
+            try:
+                with self.app.app_context():
+                    self.tick()
+            except Exception as e:
+                print(f"⚠️ Job scheduler tick failed: {e}")
+            self._stop.wait(self.tick_seconds)
+
+    def tick(self):
+        """Run any due jobs if this worker is (or becomes) the leader"""
+        if not self.acquire_lease():
+            return []
+        return self.run_due_jobs()
+
+    # ---------- leader lease ----------
+
+    def acquire_lease(self):
+        """Take or renew the leader lease. Returns True if this worker holds it."""
+        session = self.db.session
+        now = datetime.utcnow()
+        try:
+            session.execute(text("""
+                INSERT INTO scheduler_lease (id, holder, expires_at) VALUES (1, NULL, :now)
+                ON CONFLICT DO NOTHING
+            """), {'now': now})
+            result = session.execute(text("""
+                UPDATE scheduler_lease
+                SET holder = :me, expires_at = :expires, renewed_at = :now
+                WHERE id = 1 AND (holder = :me OR holder IS NULL OR expires_at < :now)
+            """), {'me': self.worker_id, 'expires': now + timedelta(seconds=self.lease_seconds), 'now': now})
+            session.commit()
+            return result.rowcount == 1
+        except Exception:
+            session.rollback()
+            raise
+
+    def release_lease(self):
+        self.db.session.execute(text("""
+            UPDATE scheduler_lease SET holder = NULL WHERE id = 1 AND holder = :me
+        """), {'me': self.worker_id})
+        self.db.session.commit()
+
+    # ---------- running jobs ----------
+
+    def ensure_job_rows(self):
+        """Add a scheduled_jobs row for any job declared since the last run"""
+        session = self.db.session
+        existing = {row[0] for row in session.execute(text("SELECT name FROM scheduled_jobs")).fetchall()}
+        now = datetime.utcnow()
+        for job in self.jobs.values():
+            if job.name not in existing:
+                session.execute(text("""
+                    INSERT INTO scheduled_jobs (name, next_run_at, enabled, run_count, error_count)
+                    VALUES (:name, :next_run, TRUE, 0, 0)
+                    ON CONFLICT DO NOTHING
+                """), {'name': job.name, 'next_run': job.first_run(now)})
+        session.commit()
+
+    def run_due_jobs(self):
+        self.ensure_job_rows()
+        due = self.db.session.execute(text("""
+            SELECT name FROM scheduled_jobs
+            WHERE enabled = TRUE AND next_run_at <= :now
+            ORDER BY next_run_at
+        """), {'now': datetime.utcnow()}).fetchall()
+
+        results = []
+        for (name,) in due:
+            job = self.jobs.get(name)
+            if job is None:
+                continue  # Job removed from app.py; its row is left for history
+            if not self.acquire_lease():
+                break
+            run = self.run_job(job, claim=True)
+            if run:
+                results.append(run)
+        return results
+
+    def run_job(self, job, claim=True):
+        """
+        Run one job and record it. With claim=True the run only goes ahead if
+        this process moves next_run_at forward first. Returns the run record,
+        or None if another process claimed the slot.
+        """
+        session = self.db.session
+        started = datetime.utcnow()
+
+        claimed = session.execute(text(f"""
+            UPDATE scheduled_jobs
+            SET next_run_at = :next_run, last_started_at = :started, running_on = :me
+            WHERE name = :name {'AND enabled = TRUE AND next_run_at <= :started' if claim else ''}
+        """), {'next_run': job.next_run_after(started), 'started': started,
+               'me': self.worker_id, 'name': job.name})
+        session.commit()
+        if claim and claimed.rowcount != 1:
+            return None
+
+        timer = time.monotonic()
+        self._running.job = job.name
+        try:
+            result = job.func()
+            status = 'success'
+            detail = summarise_result(result)
+        except Exception:
+            session.rollback()
+            status = 'error'
+            detail = traceback.format_exc()[-RESULT_MAX_CHARS:]
+            print(f"❌ Scheduled job {job.name} failed:\n{detail}")
+        finally:
+            self._running.job = None
+        duration_ms = int((time.monotonic() - timer) * 1000)
+        finished = datetime.utcnow()
+
+        session.execute(text("""
+            UPDATE scheduled_jobs
+            SET last_run_at = :finished, last_status = :status, last_duration_ms = :duration,
+                last_result = :detail, running_on = NULL,
+                run_count = run_count + 1,
+                error_count = error_count + :failed
+            WHERE name = :name
+        """), {'finished': finished, 'status': status, 'duration': duration_ms, 'detail': detail,
+               'failed': 1 if status == 'error' else 0, 'name': job.name})
+        session.execute(text("""
+            INSERT INTO scheduled_job_runs (job_name, worker, started_at, finished_at, duration_ms, status, detail)
+            VALUES (:name, :me, :started, :finished, :duration, :status, :detail)
+        """), {'name': job.name, 'me': self.worker_id, 'started': started, 'finished': finished,
+               'duration': duration_ms, 'status': status, 'detail': detail})
+        session.execute(text("""
+            DELETE FROM scheduled_job_runs
+            WHERE job_name = :name AND id <= (
+                SELECT id FROM scheduled_job_runs WHERE job_name = :name
+                ORDER BY id DESC LIMIT 1 OFFSET :keep
+            )
+        """), {'name': job.name, 'keep': RUN_HISTORY_PER_JOB})
+        session.commit()
+
+        print(f"⏰ Job {job.name}: {status} in {duration_ms} ms")
+        return {'job': job.name, 'status': status, 'duration_ms': duration_ms,
+                'started_at': started.isoformat(), 'detail': detail}
+
+    def report_progress(self, detail):
+        """
+        From inside a running job: publish detail as the job's progress
+        (commits the session). Returns False when no job is running on this
+        thread, e.g. the same code called from a web request.
+        """
+        name = getattr(self._running, 'job', None)
+        if not name:
+            return False
+        self.db.session.execute(text("""
+            UPDATE scheduled_jobs SET last_result = :detail WHERE name = :name
+        """), {'detail': f'In progress: {detail}'[:RESULT_MAX_CHARS], 'name': name})
+        self.db.session.commit()
+        return True
+
+    def request_run(self, name):
+        """Ask the leader to run a job on its next tick. Returns False for unknown jobs."""
+        if name not in self.jobs:
+            return False
+        self.ensure_job_rows()
+        self.db.session.execute(text("""
+            UPDATE scheduled_jobs SET next_run_at = :now WHERE name = :name
+        """), {'now': datetime.utcnow(), 'name': name})
+        self.db.session.commit()
+        return True
+
+    def set_enabled(self, name, enabled):
+        self.ensure_job_rows()
+        updated = self.db.session.execute(text("""
+            UPDATE scheduled_jobs SET enabled = :enabled WHERE name = :name
+        """), {'enabled': bool(enabled), 'name': name}).rowcount
+        self.db.session.commit()
+        return updated == 1
+
+    # ---------- status ----------
+
+    def status(self, history=20):
+        self.ensure_job_rows()
+        session = self.db.session
+        lease = session.execute(text(
+            "SELECT holder, expires_at, renewed_at FROM scheduler_lease WHERE id = 1"
+        )).fetchone()
+        rows = session.execute(text("""
+            SELECT name, enabled, next_run_at, last_started_at, last_run_at, last_status,
+                   last_duration_ms, last_result, running_on, run_count, error_count
+            FROM scheduled_jobs ORDER BY name
+        """)).fetchall()
+        runs = session.execute(text("""
+            SELECT job_name, worker, started_at, finished_at, duration_ms, status, detail
+            FROM scheduled_job_runs ORDER BY id DESC LIMIT :limit
+        """), {'limit': history}).fetchall()
+
+        jobs = []
+        for r in rows:
+            job = self.jobs.get(r.name)
+            jobs.append({
+                'name': r.name,
+                'declared': job is not None,
+                'schedule': job.schedule_description() if job else None,
+                'description': job.description if job else None,
+                'enabled': bool(r.enabled),
+                'next_run_at': str(r.next_run_at) if r.next_run_at else None,
+                'last_started_at': str(r.last_started_at) if r.last_started_at else None,
+                'last_run_at': str(r.last_run_at) if r.last_run_at else None,
+                'last_status': r.last_status,
+                'last_duration_ms': r.last_duration_ms,
+                'last_result': r.last_result,
+                'progress': r.last_result if r.running_on else None,
+                'running_on': r.running_on,
+                'run_count': r.run_count,
+                'error_count': r.error_count
+            })
+
+        return {
+            'worker': self.worker_id,
+            'thread_enabled': self.enabled,
+            'thread_running': self._thread is not None and self._thread.is_alive(),
+            'leader': lease.holder if lease else None,
+            'lease_expires_at': str(lease.expires_at) if lease and lease.expires_at else None,
+            'server_time': datetime.utcnow().isoformat(),
+            'jobs': jobs,
+            'recent_runs': [{
+                'job': r.job_name,
+                'worker': r.worker,
+                'started_at': str(r.started_at),
+                'finished_at': str(r.finished_at) if r.finished_at else None,
+                'duration_ms': r.duration_ms,
+                'status': r.status,
+                'detail': r.detail
+            } for r in runs]
+        }
+
+
+def main(argv):
+    from app import app, job_scheduler
+
+    command = argv[1] if len(argv) > 1 else 'status'
+    with app.app_context():
+        if command == 'run-due':
+            if not job_scheduler.acquire_lease():
+                print("Another worker holds the scheduler lease - nothing to do")
+                return
+            try:
+                results = job_scheduler.run_due_jobs()
+            finally:
+                job_scheduler.release_lease()
+            print(f"Ran {len(results)} due jobs")
+        elif command == 'run' and len(argv) > 2:
+            job = job_scheduler.jobs.get(argv[2])
+            if not job:
+                print(f"Unknown job {argv[2]}. Jobs: {', '.join(sorted(job_scheduler.jobs))}")
+                return
+            job_scheduler.ensure_job_rows()
+            run = job_scheduler.run_job(job, claim=False)
+            print(f"{run['status']} in {run['duration_ms']} ms: {run['detail']}")
+        else:
+            status = job_scheduler.status(history=10)
+            print("=" * 60)
+            print(f"⏰ JOB SCHEDULER - leader: {status['leader'] or 'none'}")
+            print("=" * 60)
+            for job in status['jobs']:
+                state = 'on' if job['enabled'] else 'off'
+                print(f"  {job['name']:<26} [{state}] {job['schedule'] or 'not declared'}")
+                print(f"      next: {job['next_run_at']}  last: {job['last_run_at']} ({job['last_status']})")
+            print("\nRecent runs:")
+            for run in status['recent_runs']:
+                print(f"  {run['started_at']}  {run['job']:<26} {run['status']:<8} {run['duration_ms']} ms")
+
+
+if __name__ == '__main__':
+    main(sys.argv)
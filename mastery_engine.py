@@ -0,0 +1,255 @@
+"""
+MASTERY ENGINE
+==============
+Recomputes learners' mastery from their quiz attempts with a handful of
+grouped SQL statements, instead of walking users one at a time.
+
+One mastery rule, used everywhere (quiz submit, progress pages, badges and
+this engine):
+- A topic/difficulty is mastered when the learner's best score on it is
+  above MASTERY_THRESHOLD percent
+- A topic is mastered when all of MASTERY_DIFFICULTIES are mastered
+  (UserStats.topics_mastered counts these)
+
+Registered users' results are stored in topic_progress and
+user_stats.topics_mastered. Repeat guests have no stored progress - their
+mastery is worked out from guest_quiz_attempts on read with the same rule.
+
+Incremental runs only touch learners with attempts completed since the last
+run. The high-water mark (the completed_at the last run went up to) is kept
+in system_settings. It is keyed on completion, not id, because an attempt
+created at quiz start gets its id long before it is completed. Each run
+also looks LATE_COMMIT_MARGIN back past the mark, for submissions that
+committed after the previous run had read the attempts; redoing a learner
+is harmless. Attempts not yet completed (total_questions = 0) are ignored.
+Full runs rebuild everyone.
+
+Create the supporting indexes first with migrate_mastery_engine.py.
+
+    python mastery_engine.py            # incremental
+    python mastery_engine.py --full     # rebuild everyone
+"""
+
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+MASTERY_THRESHOLD = 80  # Best score must be above this percentage
+MASTERY_DIFFICULTIES = ('beginner', 'intermediate', 'advanced')
+HIGH_WATER_MARK_KEY = 'mastery_high_water_completed_at'
+LATE_COMMIT_MARGIN = timedelta(minutes=5)
+
+# Best percentage of a guest attempt (guest_quiz_attempts has no percentage column)
+GUEST_PERCENTAGE_SQL = "CAST(score AS FLOAT) / total_questions * 100"
+
+_DIFFICULTY_LIST_SQL = ', '.join(f"'{d}'" for d in MASTERY_DIFFICULTIES)
+
+# Topics with every difficulty mastered, for one learner's topic_progress rows
+TOPICS_MASTERED_SQL = f"""
+    SELECT COUNT(*) FROM (
+        SELECT tp.topic FROM topic_progress tp
+        WHERE tp.user_id = user_stats.user_id AND tp.is_mastered = TRUE
+          AND tp.difficulty IN ({_DIFFICULTY_LIST_SQL})
+        GROUP BY tp.topic
+        HAVING COUNT(DISTINCT tp.difficulty) = {len(MASTERY_DIFFICULTIES)}
+    ) mastered
+"""
+
+
+def is_mastered_score(best_percentage):
+    """The mastery rule for one topic/difficulty"""
+    return (best_percentage or 0) > MASTERY_THRESHOLD
+
+
+def count_mastered_topics(best_scores):
+    """
+    Topics with every difficulty mastered, from
+    {topic: {difficulty: best_percentage}}
+    """
+    return sum(
+        1 for scores in best_scores.values()
+        if all(is_mastered_score(scores.get(d)) for d in MASTERY_DIFFICULTIES)
+    )
+
+
+def user_topics_mastered(db, user_id):
+    """UserStats.topics_mastered for one user, from their topic_progress rows"""
+    return db.session.execute(text(
+        TOPICS_MASTERED_SQL.replace('user_stats.user_id', ':user_id')
+    ), {'user_id': user_id}).scalar() or 0
+
+
+def guest_topics_mastered(db, guest_code):
+    """Fully mastered topics for a repeat guest, from guest_quiz_attempts"""
+    return db.session.execute(text(f"""
+        SELECT COUNT(*) FROM (
+            SELECT topic FROM (
+                SELECT topic, difficulty, MAX({GUEST_PERCENTAGE_SQL}) as best_percentage
+                FROM guest_quiz_attempts
+                WHERE guest_code = :guest_code AND total_questions > 0
+                  AND difficulty IN ({_DIFFICULTY_LIST_SQL})
+                GROUP BY topic, difficulty
+            ) best
+            WHERE best_percentage > :threshold
+            GROUP BY topic
+            HAVING COUNT(*) = {len(MASTERY_DIFFICULTIES)}
+        ) mastered
+    """), {'guest_code': guest_code, 'threshold': MASTERY_THRESHOLD}).scalar() or 0
+
+
+def get_high_water_mark(db):
+    """completed_at the last run went up to, or None before the first run"""
+    row = db.session.execute(text(
+        "SELECT value FROM system_settings WHERE key = :key"
+    ), {'key': HIGH_WATER_MARK_KEY}).fetchone()
+    return datetime.fromisoformat(row.value) if row and row.value else None
+
+
+def set_high_water_mark(db, completed_at):
+    db.session.execute(text("""
+        INSERT INTO system_settings (key, value, description, updated_at)
+        VALUES (:key, :value, 'Quiz completions processed by the mastery engine up to this time', :now)
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+    """), {'key': HIGH_WATER_MARK_KEY, 'value': completed_at.isoformat(), 'now': datetime.utcnow()})
+
+
+def recalculate_mastery(db, full=False):
+    """
+    Bring topic_progress and user_stats.topics_mastered up to date.
+
+    Incremental (default): only users with attempts completed after the
+    high-water mark (less LATE_COMMIT_MARGIN). full=True: every user with
+    attempts. Returns a summary dict with timings; commits on success.
+    """
+    started = time.time()
+    timings = {}
+
+    mark = None if full else get_high_water_mark(db)
+    since = mark - LATE_COMMIT_MARGIN if mark else datetime.min
+    upto = datetime.utcnow()
+
+    # Learners touched by this run (completions after `upto` wait for the next run)
+    step = time.time()
+    db.session.execute(text("DROP TABLE IF EXISTS mastery_learners"))
+    db.session.execute(text("CREATE TEMP TABLE mastery_learners (user_id INTEGER PRIMARY KEY)"))
+    learners = db.session.execute(text("""
+        INSERT INTO mastery_learners (user_id)
+        SELECT DISTINCT user_id FROM quiz_attempts
+        WHERE completed_at > :since AND completed_at <= :upto
+          AND total_questions > 0 AND user_id IS NOT NULL
+    """), {'since': since, 'upto': upto}).rowcount
+    timings['select_learners'] = int((time.time() - step) * 1000)
+
+    # One grouped pass over their attempts, upserted into topic_progress
+    step = time.time()
+    progress_rows = db.session.execute(text("""
+        INSERT INTO topic_progress (
+            user_id, topic, difficulty, attempts, best_score, best_percentage,
+            total_questions_answered, total_correct, is_mastered, last_attempt_at
+        )
+        SELECT qa.user_id, qa.topic, qa.difficulty, COUNT(*), MAX(qa.score), MAX(qa.percentage),
+               SUM(qa.total_questions), SUM(qa.score),
+               MAX(qa.percentage) > :threshold, MAX(qa.completed_at)
+        FROM quiz_attempts qa
+        JOIN mastery_learners ml ON ml.user_id = qa.user_id
+        WHERE qa.total_questions > 0
+        GROUP BY qa.user_id, qa.topic, qa.difficulty
+        ON CONFLICT(user_id, topic, difficulty) DO UPDATE SET
+            attempts = excluded.attempts,
+            best_score = excluded.best_score,
+            best_percentage = excluded.best_percentage,
+            total_questions_answered = excluded.total_questions_answered,
+            total_correct = excluded.total_correct,
+            is_mastered = excluded.is_mastered,
+            last_attempt_at = excluded.last_attempt_at
+    """), {'threshold': MASTERY_THRESHOLD}).rowcount
+    timings['topic_progress'] = int((time.time() - step) * 1000)
+
+    step = time.time()
+    db.session.execute(text(f"""
+        UPDATE user_stats SET topics_mastered = ({TOPICS_MASTERED_SQL})
+        WHERE user_id IN (SELECT user_id FROM mastery_learners)
+    """))
+    timings['topics_mastered'] = int((time.time() - step) * 1000)
+
+    set_high_water_mark(db, upto)
+    db.session.execute(text("DROP TABLE IF EXISTS mastery_learners"))
+    db.session.commit()
+
+    return {
+        'mode': 'full' if full else 'incremental',
+        'learners': learners,
+        'progress_rows': progress_rows,
+        'high_water_mark': upto.isoformat(timespec='seconds'),
+        'duration_ms': int((time.time() - started) * 1000),
+        'timings_ms': timings
+    }
+
+
+def guest_mastery_summary(db):
+    """Mastery totals across repeat guests, in one grouped query"""
+    row = db.session.execute(text(f"""
+        SELECT COUNT(*) as guests,
+               SUM(CASE WHEN mastered_difficulties > 0 THEN 1 ELSE 0 END) as guests_with_mastery,
+               COALESCE(SUM(mastered_difficulties), 0) as mastered_difficulties,
+               COALESCE(SUM(mastered_topics), 0) as mastered_topics
+        FROM (
+            SELECT guest_code,
+                   SUM(mastered_count) as mastered_difficulties,
+                   SUM(CASE WHEN mastered_count = {len(MASTERY_DIFFICULTIES)} THEN 1 ELSE 0 END) as mastered_topics
+            FROM (
+                SELECT guest_code, topic,
+                       SUM(CASE WHEN best_percentage > :threshold THEN 1 ELSE 0 END) as mastered_count
+                FROM (
+                    SELECT guest_code, topic, difficulty, MAX({GUEST_PERCENTAGE_SQL}) as best_percentage
+                    FROM guest_quiz_attempts
+                    WHERE guest_code IS NOT NULL AND total_questions > 0
+                      AND difficulty IN ({_DIFFICULTY_LIST_SQL})
+                    GROUP BY guest_code, topic, difficulty
+                ) best
+                GROUP BY guest_code, topic
+            ) per_topic
+            GROUP BY guest_code
+        ) per_guest
+    """), {'threshold': MASTERY_THRESHOLD}).fetchone()
+    return {
+        'guests': int(row.guests or 0),
+        'guests_with_mastery': int(row.guests_with_mastery or 0),
+        'mastered_difficulties': int(row.mastered_difficulties),
+        'mastered_topics': int(row.mastered_topics)
+    }
+
+
+def format_result(result):
+    """One-line summary for job history and the CLI"""
+    return (f"{result['mode']}: {result['learners']} learners, "
+            f"{result['progress_rows']} progress rows in {result['duration_ms']} ms "
+            f"(high-water mark {result['high_water_mark']})")
+
+
+def main(argv):
+    from app import app, db
+
+    full = '--full' in argv
+    with app.app_context():
+        print("=" * 60)
+        print(f"🎯 MASTERY ENGINE - {'full rebuild' if full else 'incremental'}")
+        print("=" * 60)
+        try:
+            result = recalculate_mastery(db, full=full)
+        except Exception:
+            db.session.rollback()
+            raise
+        print(f"✓ {format_result(result)}")
+        for step, ms in result['timings_ms'].items():
+            print(f"    {step:<18} {ms} ms")
+
+        guests = guest_mastery_summary(db)
+        print(f"✓ Guests: {guests['guests_with_mastery']}/{guests['guests']} with a mastered difficulty, "
+              f"{guests['mastered_topics']} fully mastered topics")
+
+
+if __name__ == '__main__':
+    main(sys.argv)
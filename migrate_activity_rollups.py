@@ -0,0 +1,100 @@
+"""
+Activity Rollups Migration Script
+=================================
+
+Creates the daily activity rollup tables (see activity_rollups.py):
+
+- activity_daily_learner: per learner per day
+- activity_daily_class:   per class per day
+- activity_daily:         per day, for registered users and guests
+
+and fills them from the full quiz_attempts / guest_quiz_attempts history.
+Quiz submission keeps them up to date from then on.
+
+Safe to run more than once - each run rebuilds the rollups from scratch.
+To rebuild only recent days, pass a start date:
+
+    python migrate_activity_rollups.py 2025-11-01
+
+Usage:
+    cd /home/bbsisk/mathapp
+    source venv/bin/activate
+    python migrate_activity_rollups.py
+"""
+
+import sys
+from datetime import date
+
+from app import app, db
+from activity_rollups import backfill
+from sqlalchemy import text
+
+METRIC_COLUMNS = """
+    quizzes INTEGER NOT NULL DEFAULT 0,
+    questions INTEGER NOT NULL DEFAULT 0,
+    correct INTEGER NOT NULL DEFAULT 0,
+    points INTEGER NOT NULL DEFAULT 0,
+    high_scores INTEGER NOT NULL DEFAULT 0,
+    percentage_sum FLOAT NOT NULL DEFAULT 0
+"""
+
+def migrate_activity_rollups(since=None):
+    with app.app_context():
+        print("=" * 60)
+        print("📈 ACTIVITY ROLLUPS MIGRATION")
+        print("=" * 60)
+
+        db.session.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS activity_daily_learner (
+                learner VARCHAR(80) NOT NULL,
+                day DATE NOT NULL,
+                user_id INTEGER,
+                guest_code VARCHAR(10),
+                {METRIC_COLUMNS},
+                last_at DATETIME,
+                PRIMARY KEY (learner, day)
+            )
+        """))
+        db.session.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_activity_daily_learner_day
+            ON activity_daily_learner(day, last_at)
+        """))
+        print("✓ activity_daily_learner table ready")
+
+        db.session.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS activity_daily_class (
+                class_id INTEGER NOT NULL,
+                day DATE NOT NULL,
+                {METRIC_COLUMNS},
+                PRIMARY KEY (class_id, day)
+            )
+        """))
+        db.session.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_activity_daily_class_day
+            ON activity_daily_class(day)
+        """))
+        print("✓ activity_daily_class table ready")
+
+        db.session.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS activity_daily (
+                day DATE NOT NULL,
+                learner_type VARCHAR(10) NOT NULL,
+                learners INTEGER NOT NULL DEFAULT 0,
+                {METRIC_COLUMNS},
+                PRIMARY KEY (day, learner_type)
+            )
+        """))
+        print("✓ activity_daily table ready")
+
+        db.session.commit()
+
+        print(f"⏳ Backfilling from {since.isoformat() if since else 'the beginning'}...")
+        written = backfill(db, since)
+        print(f"✓ Wrote {written} learner-day rows")
+
+        print("\n" + "=" * 60)
+        print("✅ MIGRATION COMPLETE!")
+        print("=" * 60)
+
+if __name__ == '__main__':
+    migrate_activity_rollups(date.fromisoformat(sys.argv[1]) if len(sys.argv) > 1 else None)
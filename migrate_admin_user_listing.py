@@ -0,0 +1,109 @@
+"""
+Admin User Listing Migration Script
+===================================
+
+Creates user_counts: the number of users per (role, is_approved, is_guest),
+kept up to date by triggers on users. The admin user listing reads its
+totals from here instead of counting the users table on every page.
+
+Also adds the indexes the listing's default sorts page through:
+users(created_at, id) and users(role, created_at, id).
+
+Counts are rebuilt from the users table each run, so it is safe to run
+more than once (and to rerun if the counts ever look wrong).
+
+Usage:
+    cd /home/bbsisk/mathapp
+    source venv/bin/activate
+    python migrate_admin_user_listing.py
+"""
+
+from app import app, db
+from admin_user_listing import GUEST_EMAIL_PATTERN
+from sqlalchemy import text
+
+COUNT_KEY = "{row}.role, COALESCE({row}.is_approved, 0), ({row}.email LIKE '" + GUEST_EMAIL_PATTERN + "')"
+
+def _add_sql(row):
+    return f"""
+        INSERT OR IGNORE INTO user_counts (role, is_approved, is_guest, users)
+        VALUES ({COUNT_KEY.format(row=row)}, 0);
+        UPDATE user_counts SET users = users + 1
+        WHERE (role, is_approved, is_guest) = ({COUNT_KEY.format(row=row)});
+    """
+
+def _remove_sql(row):
+    return f"""
+        UPDATE user_counts SET users = users - 1
+        WHERE (role, is_approved, is_guest) = ({COUNT_KEY.format(row=row)});
+    """
+
+def migrate_admin_user_listing():
+    with app.app_context():
+        print("=" * 60)
+        print("👥 ADMIN USER LISTING MIGRATION")
+        print("=" * 60)
+
+        db.session.execute(text("""
+            CREATE TABLE IF NOT EXISTS user_counts (
+                role VARCHAR(20) NOT NULL,
+                is_approved BOOLEAN NOT NULL,
+                is_guest BOOLEAN NOT NULL,
+                users INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (role, is_approved, is_guest)
+            )
+        """))
+        print("✓ user_counts table ready")
+
+        for trigger in ('trg_user_counts_insert', 'trg_user_counts_delete', 'trg_user_counts_update'):
+            db.session.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+
+        db.session.execute(text(f"""
+            CREATE TRIGGER trg_user_counts_insert AFTER INSERT ON users
+            BEGIN
+                {_add_sql('NEW')}
+            END
+        """))
+        db.session.execute(text(f"""
+            CREATE TRIGGER trg_user_counts_delete AFTER DELETE ON users
+            BEGIN
+                {_remove_sql('OLD')}
+            END
+        """))
+        db.session.execute(text(f"""
+            CREATE TRIGGER trg_user_counts_update AFTER UPDATE OF role, is_approved, email ON users
+            BEGIN
+                {_remove_sql('OLD')}
+                {_add_sql('NEW')}
+            END
+        """))
+        print("✓ Triggers on users ready")
+
+        db.session.execute(text("DELETE FROM user_counts"))
+        db.session.execute(text(f"""
+            INSERT INTO user_counts (role, is_approved, is_guest, users)
+            SELECT {COUNT_KEY.format(row='users')}, COUNT(*)
+            FROM users
+            GROUP BY 1, 2, 3
+        """))
+        total = db.session.execute(text("SELECT COALESCE(SUM(users), 0) FROM user_counts")).scalar()
+        print(f"✓ Counted {total} users")
+
+        db.session.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_users_created_at_id ON users(created_at, id)
+        """))
+        db.session.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_users_role_created_at_id ON users(role, created_at, id)
+        """))
+        print("✓ Indexes on users ready")
+
+        db.session.commit()
+
+        print("\n" + "=" * 60)
+        print("✅ MIGRATION COMPLETE!")
+        print("=" * 60)
+        print("\nPaged listing:")
+        print("  • /api/admin/users?limit=50&sort=created_at&include_total=1")
+
+if __name__ == '__main__':
+    migrate_admin_user_listing()
@@ -0,0 +1,97 @@
+"""
+Championship Rankings Migration Script
+======================================
+
+Adds what the global racing championship table needs:
+- championship_standings.rank_key: points, wins, podiums and best finish
+  packed into one integer, indexed per season, so pages and ranks are
+  index range reads
+- championship_standings.previous_rank: rank before the driver's last race
+  (for position-change arrows)
+- championship_rank_history: a snapshot of each driver's rank after every race
+
+Existing standings are backfilled. Safe to run more than once.
+
+Usage:
+    cd /home/bbsisk/mathapp
+    source venv/bin/activate
+    python migrate_championship_rankings.py
+"""
+
+from app import app, db, CHAMPIONSHIP_RANK_KEY_SQL
+from sqlalchemy import text
+
+def migrate_championship_rankings():
+    with app.app_context():
+        print("=" * 60)
+        print("🏆 CHAMPIONSHIP RANKINGS MIGRATION")
+        print("=" * 60)
+
+        columns = [row[1] for row in db.session.execute(text(
+            "PRAGMA table_info(championship_standings)"
+        )).fetchall()]
+
+        if 'rank_key' not in columns:
+            db.session.execute(text(
+                "ALTER TABLE championship_standings ADD COLUMN rank_key BIGINT DEFAULT 0"
+            ))
+            print("✓ Added rank_key column")
+        else:
+            print("✓ rank_key column already exists")
+
+        if 'previous_rank' not in columns:
+            db.session.execute(text(
+                "ALTER TABLE championship_standings ADD COLUMN previous_rank INTEGER"
+            ))
+            print("✓ Added previous_rank column")
+        else:
+            print("✓ previous_rank column already exists")
+
+        updated = db.session.execute(text(f"""
+            UPDATE championship_standings SET rank_key = {CHAMPIONSHIP_RANK_KEY_SQL}
+        """)).rowcount
+        print(f"✓ Backfilled rank_key for {updated} standings")
+
+        db.session.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_championship_rank
+            ON championship_standings(season_year, rank_key DESC, id)
+        """))
+        print("✓ Index idx_championship_rank ready")
+
+        db.session.execute(text("""
+            CREATE TABLE IF NOT EXISTS championship_rank_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                season_year INTEGER NOT NULL,
+                race_id INTEGER NOT NULL,
+                user_id INTEGER,
+                guest_code VARCHAR(20),
+                rank_before INTEGER,
+                rank_after INTEGER NOT NULL,
+                total_points INTEGER DEFAULT 0,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (race_id) REFERENCES race_calendar(id),
+                UNIQUE(season_year, race_id, user_id),
+                UNIQUE(season_year, race_id, guest_code)
+            )
+        """))
+        db.session.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_rank_history_user
+            ON championship_rank_history(user_id, season_year)
+        """))
+        db.session.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_rank_history_guest
+            ON championship_rank_history(guest_code, season_year)
+        """))
+        print("✓ championship_rank_history table ready")
+
+        db.session.commit()
+
+        print("\n" + "=" * 60)
+        print("✅ MIGRATION COMPLETE!")
+        print("=" * 60)
+        print("\nNew endpoints:")
+        print("  • /api/racing-car/championship/standings?page=1&per_page=20")
+        print("  • /api/racing-car/championship/history")
+
+if __name__ == '__main__':
+    migrate_championship_rankings()
@@ -0,0 +1,78 @@
+"""
+Guest Code Pool Migration Script
+================================
+
+Creates guest_code_pool: one row per possible repeat-guest code (each
+animal in ANIMALS with 00-99), marked free or taken. New guests claim a free
+code in one conditional UPDATE instead of guessing random codes and checking
+guest_users, and recycled guests return their codes to the pool.
+
+Codes already used by a guest are added as taken. Safe to run more than
+once - rerun it after adding animals to ANIMALS.
+
+Usage:
+    cd /home/bbsisk/mathapp
+    source venv/bin/activate
+    python migrate_guest_code_pool.py
+"""
+
+from app import app, db, ensure_guest_code_pool, get_guest_code_pool_stats
+from sqlalchemy import text
+from sql_dialect import is_sqlite
+
+def migrate_guest_code_pool():
+    with app.app_context():
+        print("=" * 60)
+        print("🐼 GUEST CODE POOL MIGRATION")
+        print("=" * 60)
+
+        db.session.execute(text("""
+            CREATE TABLE IF NOT EXISTS guest_code_pool (
+                code VARCHAR(10) PRIMARY KEY,
+                animal VARCHAR(20) NOT NULL,
+                slot INTEGER NOT NULL,
+                is_free BOOLEAN DEFAULT TRUE,
+                claimed_at DATETIME,
+                released_at DATETIME
+            )
+        """))
+        # The predicate must be written exactly as claim_guest_code() writes it
+        # (is_free = TRUE) or SQLite won't use the index. Rebuild older ones.
+        if is_sqlite(db):
+            old_index = db.session.execute(text("""
+                SELECT sql FROM sqlite_master WHERE type = 'index' AND name = 'idx_guest_code_pool_free'
+            """)).scalar()
+            if old_index and 'is_free = TRUE' not in old_index:
+                db.session.execute(text("DROP INDEX idx_guest_code_pool_free"))
+                print("✓ Dropped old idx_guest_code_pool_free")
+        db.session.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_guest_code_pool_free
+            ON guest_code_pool(slot) WHERE is_free = TRUE
+        """))
+        print("✓ guest_code_pool table ready")
+
+        added = ensure_guest_code_pool()
+        print(f"✓ Added {added} codes to the pool")
+
+        # Codes in use but still marked free (e.g. created while migrating)
+        fixed = db.session.execute(text("""
+            UPDATE guest_code_pool SET is_free = FALSE
+            WHERE is_free = TRUE
+              AND code IN (SELECT guest_code FROM guest_users)
+        """)).rowcount
+        if fixed:
+            print(f"✓ Marked {fixed} codes in use as taken")
+
+        db.session.commit()
+
+        stats = get_guest_code_pool_stats()
+        print(f"✓ {stats['used']}/{stats['total']} codes in use ({stats['utilisation']}%)")
+
+        print("\n" + "=" * 60)
+        print("✅ MIGRATION COMPLETE!")
+        print("=" * 60)
+        print("\nPool utilisation per animal:")
+        print("  • /api/admin/analytics/guest-code-pool")
+
+if __name__ == '__main__':
+    migrate_guest_code_pool()
@@ -0,0 +1,85 @@
+"""
+Job Scheduler Migration Script
+==============================
+
+Creates the tables used by the built-in background job scheduler
+(job_scheduler.py):
+- scheduled_jobs: one row per job with its next run time and last result
+- scheduled_job_runs: run history (last 200 runs per job)
+- scheduler_lease: single row naming the worker allowed to run jobs
+
+Safe to run more than once.
+
+Usage:
+    cd /home/bbsisk/mathapp
+    source venv/bin/activate
+    python migrate_job_scheduler.py
+"""
+
+from app import app, db
+from sqlalchemy import text
+
+def migrate_job_scheduler():
+    with app.app_context():
+        print("=" * 60)
+        print("⏰ JOB SCHEDULER MIGRATION")
+        print("=" * 60)
+
+        db.session.execute(text("""
+            CREATE TABLE IF NOT EXISTS scheduled_jobs (
+                name VARCHAR(100) PRIMARY KEY,
+                enabled BOOLEAN DEFAULT 1,
+                next_run_at DATETIME NOT NULL,
+                last_started_at DATETIME,
+                last_run_at DATETIME,
+                last_status VARCHAR(20),
+                last_duration_ms INTEGER,
+                last_result TEXT,
+                running_on VARCHAR(100),
+                run_count INTEGER DEFAULT 0,
+                error_count INTEGER DEFAULT 0
+            )
+        """))
+        print("✓ scheduled_jobs table ready")
+
+        db.session.execute(text("""
+            CREATE TABLE IF NOT EXISTS scheduled_job_runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_name VARCHAR(100) NOT NULL,
+                worker VARCHAR(100),
+                started_at DATETIME NOT NULL,
+                finished_at DATETIME,
+                duration_ms INTEGER,
+                status VARCHAR(20),
+                detail TEXT
+            )
+        """))
+        db.session.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_scheduled_job_runs_job
+            ON scheduled_job_runs(job_name, id)
+        """))
+        print("✓ scheduled_job_runs table ready")
+
+        db.session.execute(text("""
+            CREATE TABLE IF NOT EXISTS scheduler_lease (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                holder VARCHAR(100),
+                expires_at DATETIME,
+                renewed_at DATETIME
+            )
+        """))
+        print("✓ scheduler_lease table ready")
+
+        db.session.commit()
+
+        print("\n" + "=" * 60)
+        print("✅ MIGRATION COMPLETE!")
+        print("=" * 60)
+        print("\nJobs start running after the web app is reloaded.")
+        print("  • Status: /api/admin/scheduler/status")
+        print("  • CLI:    python job_scheduler.py status")
+        print("\nOnce the raffle_auto_draw job is running, the external")
+        print("cron hitting /api/cron/raffle-auto-draw can be removed.")
+
+if __name__ == '__main__':
+    migrate_job_scheduler()
@@ -0,0 +1,64 @@
+"""
+Mastery Engine Migration Script
+===============================
+
+Adds the indexes the mastery engine (mastery_engine.py) groups on:
+- quiz_attempts(user_id, topic, difficulty)
+- quiz_attempts(completed_at), for finding what was completed since the
+  last incremental run
+- guest_quiz_attempts(guest_code, topic, difficulty)
+
+Then runs one full rebuild, so every registered user's topic_progress and
+topics_mastered follow the single mastery rule (best score above 80% on a
+difficulty; all three difficulties for a topic). Later runs are incremental.
+
+Safe to run more than once.
+
+Usage:
+    cd /home/bbsisk/mathapp
+    source venv/bin/activate
+    python migrate_mastery_engine.py
+"""
+
+from app import app, db
+from mastery_engine import recalculate_mastery, format_result
+from sqlalchemy import text
+
+def migrate_mastery_engine():
+    with app.app_context():
+        print("=" * 60)
+        print("🎯 MASTERY ENGINE MIGRATION")
+        print("=" * 60)
+
+        db.session.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_quiz_attempts_user_topic
+            ON quiz_attempts(user_id, topic, difficulty)
+        """))
+        print("✓ Index idx_quiz_attempts_user_topic ready")
+
+        db.session.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_quiz_attempts_completed_at
+            ON quiz_attempts(completed_at)
+        """))
+        print("✓ Index idx_quiz_attempts_completed_at ready")
+
+        db.session.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_guest_attempts_code_topic
+            ON guest_quiz_attempts(guest_code, topic, difficulty)
+        """))
+        print("✓ Index idx_guest_attempts_code_topic ready")
+
+        db.session.commit()
+
+        result = recalculate_mastery(db, full=True)
+        print(f"✓ Full rebuild - {format_result(result)}")
+
+        print("\n" + "=" * 60)
+        print("✅ MIGRATION COMPLETE!")
+        print("=" * 60)
+        print("\nThe mastery_recalculation job now runs incrementally every")
+        print("15 minutes, with a full rebuild nightly.")
+        print("  • CLI: python mastery_engine.py [--full]")
+
+if __name__ == '__main__':
+    migrate_mastery_engine()
@@ -0,0 +1,58 @@
+"""
+Offline Quiz Packs Migration Script
+===================================
+
+Creates the quiz_submission_receipts table used by /api/submit-quiz to
+recognise idempotency keys. The service worker replays offline quiz
+submissions with the same key, so a replay never counts a quiz twice.
+
+Usage:
+    cd /home/bbsisk/mathapp
+    source venv/bin/activate
+    python migrate_offline_quiz_packs.py
+"""
+
+from app import app, db
+from sqlalchemy import text
+
+def migrate_offline_quiz_packs():
+    with app.app_context():
+        print("=" * 60)
+        print("📦 OFFLINE QUIZ PACKS MIGRATION")
+        print("=" * 60)
+
+        existing = db.session.execute(text(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name='quiz_submission_receipts'"
+        )).fetchone()
+
+        if existing:
+            print("\n✓ 'quiz_submission_receipts' table already exists")
+        else:
+            print("\n📋 Creating 'quiz_submission_receipts' table...")
+            db.session.execute(text("""
+                CREATE TABLE quiz_submission_receipts (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    idempotency_key VARCHAR(64) NOT NULL UNIQUE,
+                    user_id INTEGER,
+                    guest_code VARCHAR(20),
+                    status VARCHAR(20) DEFAULT 'pending',
+                    status_code INTEGER,
+                    response_json TEXT,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (user_id) REFERENCES users(id)
+                )
+            """))
+            db.session.commit()
+            print("   ✓ Table created")
+
+        print("\n" + "=" * 60)
+        print("✅ MIGRATION COMPLETE!")
+        print("=" * 60)
+        print("\nHow it works:")
+        print("  • /api/quiz-pack/<topic>/<difficulty> returns questions + image list")
+        print("  • The service worker precaches the next pack after each quiz")
+        print("  • Offline submissions wait in an IndexedDB outbox and are")
+        print("    replayed with their idempotency key when back online")
+
+if __name__ == '__main__':
+    migrate_offline_quiz_packs()
@@ -0,0 +1,135 @@
+"""
+Question Dedup Migration Script
+===============================
+
+Creates the duplicate-detection index for the question bank (see
+question_dedup.py):
+- question_dedup: normalized-text hash and MinHash signature per question
+- question_dedup_lsh: LSH band buckets for near-duplicate lookups
+- question_dedup_links: each question's exact / near duplicate link
+- question_dedup_pending: questions waiting to be (re)indexed
+
+Triggers on questions queue inserted and edited questions and drop
+deleted ones, so questions written by any route, generator or script are
+picked up.
+
+The index is rebuilt from the questions table each run, so it is safe to
+run more than once.
+
+Usage:
+    cd /home/bbsisk/mathapp
+    source venv/bin/activate
+    python migrate_question_dedup.py
+"""
+
+from app import app, db
+from question_dedup import rebuild
+from sqlalchemy import text
+
+# Forget an old question's index rows. Questions linked to it are queued
+# again so they can find another match.
+FORGET_OLD_SQL = """
+    INSERT OR IGNORE INTO question_dedup_pending (question_id)
+        SELECT question_id FROM question_dedup_links WHERE duplicate_of = OLD.id;
+    DELETE FROM question_dedup_links WHERE question_id = OLD.id OR duplicate_of = OLD.id;
+    DELETE FROM question_dedup_lsh WHERE question_id = OLD.id;
+    DELETE FROM question_dedup WHERE question_id = OLD.id;
+"""
+
+def migrate_question_dedup():
+    with app.app_context():
+        print("=" * 60)
+        print("🧬 QUESTION DEDUP MIGRATION")
+        print("=" * 60)
+
+        db.session.execute(text("""
+            CREATE TABLE IF NOT EXISTS question_dedup (
+                question_id INTEGER PRIMARY KEY,
+                topic VARCHAR(50) NOT NULL,
+                difficulty VARCHAR(20),
+                exact_hash CHAR(40) NOT NULL,
+                signature BLOB NOT NULL,
+                indexed_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """))
+        db.session.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_question_dedup_topic_hash ON question_dedup(topic, exact_hash)
+        """))
+        print("✓ question_dedup table ready")
+
+        db.session.execute(text("""
+            CREATE TABLE IF NOT EXISTS question_dedup_lsh (
+                band INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                question_id INTEGER NOT NULL,
+                PRIMARY KEY (band, bucket, question_id)
+            ) WITHOUT ROWID
+        """))
+        db.session.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_question_dedup_lsh_question ON question_dedup_lsh(question_id)
+        """))
+        print("✓ question_dedup_lsh table ready")
+
+        db.session.execute(text("""
+            CREATE TABLE IF NOT EXISTS question_dedup_links (
+                question_id INTEGER NOT NULL,
+                kind VARCHAR(10) NOT NULL,
+                duplicate_of INTEGER NOT NULL,
+                similarity REAL NOT NULL,
+                PRIMARY KEY (question_id, kind)
+            )
+        """))
+        db.session.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_question_dedup_links_of ON question_dedup_links(duplicate_of)
+        """))
+        print("✓ question_dedup_links table ready")
+
+        db.session.execute(text("""
+            CREATE TABLE IF NOT EXISTS question_dedup_pending (
+                question_id INTEGER PRIMARY KEY
+            )
+        """))
+        print("✓ question_dedup_pending table ready")
+
+        for trigger in ('trg_question_dedup_insert', 'trg_question_dedup_update', 'trg_question_dedup_delete'):
+            db.session.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+
+        db.session.execute(text("""
+            CREATE TRIGGER trg_question_dedup_insert AFTER INSERT ON questions
+            BEGIN
+                INSERT OR IGNORE INTO question_dedup_pending (question_id) VALUES (NEW.id);
+            END
+        """))
+        db.session.execute(text(f"""
+            CREATE TRIGGER trg_question_dedup_update AFTER UPDATE OF question_text, topic, difficulty ON questions
+            BEGIN
+                {FORGET_OLD_SQL}
+                INSERT OR IGNORE INTO question_dedup_pending (question_id) VALUES (NEW.id);
+            END
+        """))
+        db.session.execute(text(f"""
+            CREATE TRIGGER trg_question_dedup_delete AFTER DELETE ON questions
+            BEGIN
+                {FORGET_OLD_SQL}
+                DELETE FROM question_dedup_pending WHERE question_id = OLD.id;
+            END
+        """))
+        print("✓ Triggers on questions ready")
+        db.session.commit()
+
+        total = rebuild(db, progress=lambda done: print(f"  ... indexed {done} questions"))
+        print(f"✓ Indexed {total} questions")
+
+        exact, near = db.session.execute(text("""
+            SELECT COALESCE(SUM(kind = 'exact'), 0), COALESCE(SUM(kind = 'near'), 0) FROM question_dedup_links
+        """)).fetchone()
+        print(f"✓ Found {exact} exact and {near} near duplicate links")
+
+        print("\n" + "=" * 60)
+        print("✅ MIGRATION COMPLETE!")
+        print("=" * 60)
+        print("\nDuplicate report:")
+        print("  • /api/admin/questions/find-duplicates?near=1")
+
+if __name__ == '__main__':
+    migrate_question_dedup()
@@ -0,0 +1,96 @@
+"""
+Question Search Migration Script
+================================
+
+Creates questions_fts: an SQLite FTS5 full-text index over question text,
+options, explanation and hint, used by the admin question search. It is an
+external-content index on questions, kept in sync by triggers on insert,
+update and delete, so every way questions are written (admin edits, bulk
+upload, generators) stays searchable.
+
+Also adds the indexes the search filters use: questions(topic, difficulty)
+and question_flags(question_id, status).
+
+The index is rebuilt from the questions table each run, so it is safe to
+run more than once (and to rerun if search results ever look stale).
+
+Usage:
+    cd /home/bbsisk/mathapp
+    source venv/bin/activate
+    python migrate_question_search.py
+"""
+
+from app import app, db
+from question_search import SEARCH_COLUMNS
+from sqlalchemy import text
+
+COLUMNS = ', '.join(SEARCH_COLUMNS)
+
+def _values(row):
+    return ', '.join(f"{row}.{column}" for column in SEARCH_COLUMNS)
+
+def migrate_question_search():
+    with app.app_context():
+        print("=" * 60)
+        print("🔎 QUESTION SEARCH MIGRATION")
+        print("=" * 60)
+
+        db.session.execute(text(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS questions_fts USING fts5(
+                {COLUMNS},
+                content='questions',
+                content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+        """))
+        print("✓ questions_fts index ready")
+
+        for trigger in ('trg_questions_fts_insert', 'trg_questions_fts_delete', 'trg_questions_fts_update'):
+            db.session.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+
+        # External-content FTS5 tables are told about removed rows with the
+        # special 'delete' command, passing the old values
+        db.session.execute(text(f"""
+            CREATE TRIGGER trg_questions_fts_insert AFTER INSERT ON questions
+            BEGIN
+                INSERT INTO questions_fts (rowid, {COLUMNS}) VALUES (NEW.id, {_values('NEW')});
+            END
+        """))
+        db.session.execute(text(f"""
+            CREATE TRIGGER trg_questions_fts_delete AFTER DELETE ON questions
+            BEGIN
+                INSERT INTO questions_fts (questions_fts, rowid, {COLUMNS}) VALUES ('delete', OLD.id, {_values('OLD')});
+            END
+        """))
+        db.session.execute(text(f"""
+            CREATE TRIGGER trg_questions_fts_update AFTER UPDATE OF {COLUMNS} ON questions
+            BEGIN
+                INSERT INTO questions_fts (questions_fts, rowid, {COLUMNS}) VALUES ('delete', OLD.id, {_values('OLD')});
+                INSERT INTO questions_fts (rowid, {COLUMNS}) VALUES (NEW.id, {_values('NEW')});
+            END
+        """))
+        print("✓ Triggers on questions ready")
+
+        db.session.execute(text("INSERT INTO questions_fts (questions_fts) VALUES ('rebuild')"))
+        total = db.session.execute(text("SELECT COUNT(*) FROM questions")).scalar()
+        print(f"✓ Indexed {total} questions")
+
+        db.session.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_questions_topic_difficulty ON questions(topic, difficulty)
+        """))
+        db.session.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_question_flags_question_status ON question_flags(question_id, status)
+        """))
+        print("✓ Indexes on questions and question_flags ready")
+
+        db.session.commit()
+
+        print("\n" + "=" * 60)
+        print("✅ MIGRATION COMPLETE!")
+        print("=" * 60)
+        print("\nSearch:")
+        print("  • /api/admin/questions/search?q=fraction&topic=fractions&limit=50")
+        print("  • /api/admin/questions/export.ndjson?difficulty=advanced")
+
+if __name__ == '__main__':
+    migrate_question_search()
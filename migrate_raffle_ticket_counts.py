@@ -0,0 +1,160 @@
+"""
+Raffle Ticket Counts Migration Script
+=====================================
+
+Moves raffles from one raffle_entries row per ticket to one row per
+participant per round, holding a ticket count:
+- raffle_entries.entry_count: tickets held by the participant this round
+- raffle_ticket_blocks: every purchase with its range of ticket numbers
+  (the audit trail a draw is checked against)
+- raffles.round_ticket_start / active_participants: counters that give draw
+  statistics without scanning entries
+- raffle_draws.winning_ticket: the ticket number drawn
+
+Active per-ticket rows are merged into one row per participant. Entries that
+have already been drawn are left as they are, so past draws still point at
+their winning rows. Safe to run more than once.
+
+Usage:
+    cd /home/bbsisk/mathapp
+    source venv/bin/activate
+    python migrate_raffle_ticket_counts.py
+"""
+
+from datetime import datetime
+
+from app import app, db
+from sqlalchemy import text
+
+
+def add_column(table, column, definition):
+    columns = [row[1] for row in db.session.execute(text(f"PRAGMA table_info({table})")).fetchall()]
+    if column in columns:
+        print(f"✓ {table}.{column} already exists")
+    else:
+        db.session.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {definition}"))
+        print(f"✓ Added {table}.{column}")
+
+
+def migrate_raffle_ticket_counts():
+    with app.app_context():
+        print("=" * 60)
+        print("🎟️  RAFFLE TICKET COUNTS MIGRATION")
+        print("=" * 60)
+
+        add_column('raffle_entries', 'entry_count', 'INTEGER DEFAULT 1')
+        add_column('raffles', 'round_ticket_start', 'INTEGER DEFAULT 0')
+        add_column('raffles', 'active_participants', 'INTEGER DEFAULT 0')
+        add_column('raffle_draws', 'winning_ticket', 'INTEGER')
+
+        db.session.execute(text("""
+            CREATE TABLE IF NOT EXISTS raffle_ticket_blocks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                raffle_id INTEGER NOT NULL,
+                entry_id INTEGER NOT NULL,
+                ticket_start INTEGER NOT NULL,
+                tickets INTEGER NOT NULL,
+                points_spent INTEGER DEFAULT 0,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (raffle_id) REFERENCES raffles(id),
+                FOREIGN KEY (entry_id) REFERENCES raffle_entries(id),
+                UNIQUE(raffle_id, ticket_start)
+            )
+        """))
+        db.session.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_raffle_ticket_blocks_entry
+            ON raffle_ticket_blocks(entry_id)
+        """))
+        print("✓ raffle_ticket_blocks table ready")
+
+        # Merge active per-ticket rows: keep the first row per participant
+        groups = db.session.execute(text("""
+            SELECT raffle_id, student_id, guest_code, MIN(id) as keep_id,
+                   COUNT(*) as row_count, SUM(COALESCE(entry_count, 1)) as tickets,
+                   SUM(points_spent) as points
+            FROM raffle_entries
+            WHERE is_active = 1
+            GROUP BY raffle_id, student_id, guest_code
+            HAVING COUNT(*) > 1
+        """)).fetchall()
+
+        merged_rows = 0
+        for g in groups:
+            db.session.execute(text("""
+                UPDATE raffle_entries SET entry_count = :tickets, points_spent = :points
+                WHERE id = :keep_id
+            """), {'tickets': g.tickets, 'points': g.points, 'keep_id': g.keep_id})
+            merged_rows += db.session.execute(text("""
+                DELETE FROM raffle_entries
+                WHERE raffle_id = :raffle_id AND is_active = 1 AND id != :keep_id
+                  AND student_id IS :student_id AND guest_code IS :guest_code
+            """), {
+                'raffle_id': g.raffle_id, 'keep_id': g.keep_id,
+                'student_id': g.student_id, 'guest_code': g.guest_code
+            }).rowcount
+        print(f"✓ Merged {merged_rows} ticket rows into {len(groups)} participant entries")
+
+        db.session.execute(text("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_raffle_entries_active_student
+            ON raffle_entries(raffle_id, student_id)
+            WHERE is_active = 1 AND student_id IS NOT NULL
+        """))
+        db.session.execute(text("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_raffle_entries_active_guest
+            ON raffle_entries(raffle_id, guest_code)
+            WHERE is_active = 1 AND guest_code IS NOT NULL
+        """))
+        print("✓ One active entry per participant enforced")
+
+        # Number the current round's tickets for raffles that have no blocks yet
+        raffles = db.session.execute(text("""
+            SELECT r.id, r.total_entries FROM raffles r
+            WHERE NOT EXISTS (SELECT 1 FROM raffle_ticket_blocks b WHERE b.raffle_id = r.id)
+        """)).fetchall()
+
+        for raffle in raffles:
+            entries = db.session.execute(text("""
+                SELECT id, COALESCE(entry_count, 1) as tickets, points_spent, entered_at
+                FROM raffle_entries
+                WHERE raffle_id = :raffle_id AND is_active = 1
+                ORDER BY id
+            """), {'raffle_id': raffle.id}).fetchall()
+
+            active_tickets = sum(e.tickets for e in entries)
+            round_start = max((raffle.total_entries or 0) - active_tickets, 0)
+            ticket_start = round_start
+            for e in entries:
+                db.session.execute(text("""
+                    INSERT INTO raffle_ticket_blocks (raffle_id, entry_id, ticket_start, tickets, points_spent, created_at)
+                    VALUES (:raffle_id, :entry_id, :ticket_start, :tickets, :points, :created_at)
+                """), {
+                    'raffle_id': raffle.id, 'entry_id': e.id, 'ticket_start': ticket_start,
+                    'tickets': e.tickets, 'points': e.points_spent,
+                    'created_at': e.entered_at or datetime.utcnow()
+                })
+                ticket_start += e.tickets
+
+            db.session.execute(text("""
+                UPDATE raffles
+                SET round_ticket_start = :round_start, total_entries = :total,
+                    active_participants = :participants
+                WHERE id = :raffle_id
+            """), {
+                'round_start': round_start, 'total': ticket_start,
+                'participants': len(entries), 'raffle_id': raffle.id
+            })
+            print(f"   Raffle {raffle.id}: {active_tickets} active tickets from {len(entries)} participants")
+
+        db.session.commit()
+
+        print("\n" + "=" * 60)
+        print("✅ MIGRATION COMPLETE!")
+        print("=" * 60)
+        print("\nHow draws work now:")
+        print("  • Each purchase gets a block of ticket numbers")
+        print("  • A draw picks one ticket number and looks up its block")
+        print("  • Odds stay proportional to tickets held")
+
+
+if __name__ == '__main__':
+    migrate_raffle_ticket_counts()
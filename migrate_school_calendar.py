@@ -0,0 +1,51 @@
+"""
+School Calendar Migration Script
+================================
+
+Creates school_closure_days: extra non-school days an admin sets for one
+school (storm closures, school-specific mid-term dates). Streaks for that
+school's students skip these days on top of the national calendar in
+irish_school_calendar.py.
+
+Safe to run more than once.
+
+Usage:
+    cd /home/bbsisk/mathapp
+    source venv/bin/activate
+    python migrate_school_calendar.py
+"""
+
+from app import app, db
+from sqlalchemy import text
+
+def migrate_school_calendar():
+    with app.app_context():
+        print("=" * 60)
+        print("📅 SCHOOL CALENDAR MIGRATION")
+        print("=" * 60)
+
+        db.session.execute(text("""
+            CREATE TABLE IF NOT EXISTS school_closure_days (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                school_id INTEGER NOT NULL,
+                closure_date DATE NOT NULL,
+                reason VARCHAR(200),
+                created_by INTEGER,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (school_id) REFERENCES prize_schools(id),
+                UNIQUE(school_id, closure_date)
+            )
+        """))
+        print("✓ school_closure_days table ready")
+
+        db.session.commit()
+
+        print("\n" + "=" * 60)
+        print("✅ MIGRATION COMPLETE!")
+        print("=" * 60)
+        print("\nNew endpoints:")
+        print("  • /api/admin/schools/<id>/closure-days  (GET, POST, DELETE)")
+        print("  • /api/admin/streaks/recompute          (POST)")
+
+if __name__ == '__main__':
+    migrate_school_calendar()
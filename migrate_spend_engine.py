@@ -0,0 +1,59 @@
+"""
+Spend Engine Migration Script
+=============================
+
+Creates spend_requests: one row per idempotency key a client sent with a
+spend (prize redemption, avatar purchase, raffle entry, car upgrade), holding
+the response to replay if the client retries. Keys are scoped to the learner
+and removed after a week by the spend_request_cleanup job.
+
+Safe to run more than once. Restart the app afterwards so it picks the table up.
+
+Usage:
+    cd /home/bbsisk/mathapp
+    source venv/bin/activate
+    python migrate_spend_engine.py
+"""
+
+from app import app, db
+from sqlalchemy import text
+
+def migrate_spend_engine():
+    with app.app_context():
+        print("=" * 60)
+        print("💳 SPEND ENGINE MIGRATION")
+        print("=" * 60)
+
+        db.session.execute(text("""
+            CREATE TABLE IF NOT EXISTS spend_requests (
+                owner VARCHAR(60) NOT NULL,
+                idempotency_key VARCHAR(100) NOT NULL,
+                kind VARCHAR(30) NOT NULL,
+                status_code INTEGER NOT NULL,
+                response TEXT NOT NULL,
+                created_at DATETIME NOT NULL,
+                PRIMARY KEY (owner, idempotency_key)
+            )
+        """))
+        print("✓ spend_requests table ready")
+
+        db.session.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_spend_requests_created
+            ON spend_requests(created_at)
+        """))
+        print("✓ Index idx_spend_requests_created ready")
+
+        db.session.commit()
+
+        print("\n" + "=" * 60)
+        print("✅ MIGRATION COMPLETE!")
+        print("=" * 60)
+        print("\nClients can now send an Idempotency-Key header (or")
+        print("idempotency_key in the JSON body) with:")
+        print("  • POST /api/prizes/redeem")
+        print("  • POST /api/avatar/purchase")
+        print("  • POST /api/raffles/<id>/enter")
+        print("  • POST /api/racing-car/upgrades/buy")
+
+if __name__ == '__main__':
+    migrate_spend_engine()
@@ -0,0 +1,79 @@
+"""
+Who Am I Tiles Migration Script
+===============================
+
+Adds who_am_i_sessions.tiles_mask: the revealed tiles as an integer bitmask
+(bit n set = tile n revealed), replacing the JSON list in tiles_revealed.
+Existing sessions are converted. The old column is left in place, unused.
+
+Also indexes who_am_i_images(difficulty, active), which the image decks
+load from.
+
+Safe to run more than once.
+
+Usage:
+    cd /home/bbsisk/mathapp
+    source venv/bin/activate
+    python migrate_who_am_i_tiles.py
+"""
+
+import json
+
+from app import app, db
+from sqlalchemy import text
+
+def migrate_who_am_i_tiles():
+    with app.app_context():
+        print("=" * 60)
+        print("🖼️  WHO AM I TILES MIGRATION")
+        print("=" * 60)
+
+        columns = [row[1] for row in db.session.execute(text(
+            "PRAGMA table_info(who_am_i_sessions)"
+        )).fetchall()]
+
+        if 'tiles_mask' not in columns:
+            db.session.execute(text(
+                "ALTER TABLE who_am_i_sessions ADD COLUMN tiles_mask INTEGER DEFAULT 0"
+            ))
+            print("✓ Added tiles_mask column")
+        else:
+            print("✓ tiles_mask column already exists")
+
+        sessions = db.session.execute(text("""
+            SELECT id, tiles_revealed FROM who_am_i_sessions
+            WHERE tiles_revealed IS NOT NULL AND tiles_revealed NOT IN ('', '[]')
+              AND COALESCE(tiles_mask, 0) = 0
+        """)).fetchall()
+
+        updates = []
+        for s in sessions:
+            try:
+                tiles = json.loads(s.tiles_revealed)
+            except ValueError:
+                continue
+            mask = 0
+            for tile in tiles:
+                mask |= 1 << int(tile)
+            updates.append({'id': s.id, 'mask': mask})
+
+        if updates:
+            db.session.execute(text(
+                "UPDATE who_am_i_sessions SET tiles_mask = :mask WHERE id = :id"
+            ), updates)
+        print(f"✓ Converted {len(updates)} sessions with revealed tiles")
+
+        db.session.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_who_am_i_images_difficulty_active
+            ON who_am_i_images(difficulty, active)
+        """))
+        print("✓ Index idx_who_am_i_images_difficulty_active ready")
+
+        db.session.commit()
+
+        print("\n" + "=" * 60)
+        print("✅ MIGRATION COMPLETE!")
+        print("=" * 60)
+
+if __name__ == '__main__':
+    migrate_who_am_i_tiles()
@@ -1197,6 +1197,7 @@ def generate_pattern_questions(pattern_type, difficulty, count=3, output_dir='st
 def register_pattern_generator_routes(app, db, Question, admin_required_api):
     """Register Flask routes for pattern question generation"""
     from sqlalchemy import text
+    from question_dedup import find_duplicate
     
     @app.route('/api/admin/generate-pattern-questions', methods=['POST'])
     @admin_required_api
@@ -1240,17 +1241,8 @@ def register_pattern_generator_routes(app, db, Question, admin_required_api):
                         skipped_count += 1
                         continue
                     
-                    # Check for duplicate
-                    existing = db.session.execute(text("""
-                        SELECT id FROM questions 
-                        WHERE topic = :topic AND difficulty = :difficulty AND question_text = :question_text
-                    """), {
-                        'topic': 'patterns',
-                        'difficulty': q['difficulty'],
-                        'question_text': q['question_text']
-                    }).fetchone()
-                    
-                    if existing:
+                    # Check for duplicate (ignores case, spacing and punctuation)
+                    if find_duplicate(db, 'patterns', q['question_text'], q['difficulty']):
                         skipped_count += 1
                         continue
                     
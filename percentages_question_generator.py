@@ -918,6 +918,7 @@ def generate_percentage_questions(question_type, difficulty, count=5, output_dir
 def register_percentages_generator_routes(app, db, Question, admin_required_api):
     """Register Flask routes for percentages question generation"""
     from sqlalchemy import text
+    from question_dedup import find_duplicate
     
     @app.route('/api/admin/generate-percentages-questions', methods=['POST'])
     @admin_required_api
@@ -954,17 +955,8 @@ def register_percentages_generator_routes(app, db, Question, admin_required_api)
                         skipped_count += 1
                         continue
                     
-                    # Check for duplicate
-                    existing = db.session.execute(text("""
-                        SELECT id FROM questions 
-                        WHERE topic = :topic AND difficulty = :difficulty AND question_text = :question_text
-                    """), {
-                        'topic': 'percentages',
-                        'difficulty': q['difficulty'],
-                        'question_text': q['question_text']
-                    }).fetchone()
-                    
-                    if existing:
+                    # Check for duplicate (ignores case, spacing and punctuation)
+                    if find_duplicate(db, 'percentages', q['question_text'], q['difficulty']):
                         skipped_count += 1
                         continue
                     
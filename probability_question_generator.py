@@ -914,6 +914,7 @@ def generate_probability_questions(question_type, difficulty, count=5, output_di
 def register_probability_generator_routes(app, db, Question, admin_required_api):
     """Register Flask routes for probability question generation"""
     from sqlalchemy import text
+    from question_dedup import find_duplicate
     
     @app.route('/api/admin/generate-probability-questions', methods=['POST'])
     @admin_required_api
@@ -950,17 +951,8 @@ def register_probability_generator_routes(app, db, Question, admin_required_api)
                         skipped_count += 1
                         continue
                     
-                    # Check for duplicate
-                    existing = db.session.execute(text("""
-                        SELECT id FROM questions 
-                        WHERE topic = :topic AND difficulty = :difficulty AND question_text = :question_text
-                    """), {
-                        'topic': 'probability',
-                        'difficulty': q['difficulty'],
-                        'question_text': q['question_text']
-                    }).fetchone()
-                    
-                    if existing:
+                    # Check for duplicate (ignores case, spacing and punctuation)
+                    if find_duplicate(db, 'probability', q['question_text'], q['difficulty']):
                         skipped_count += 1
                         continue
                     
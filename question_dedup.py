@@ -0,0 +1,356 @@
+"""
+QUESTION DEDUP
+==============
+Duplicate and near-duplicate index for the question bank, so duplicate
+checks are cheap enough to run on every insert.
+
+Per question (question_dedup):
+- exact_hash: SHA-1 of the normalized question text - case, whitespace,
+  spacing around symbols and sentence punctuation are ignored, so "What is
+  2+3?" and "what is 2 + 3" match. Decimal points and ratios are kept.
+- signature: a 64-value MinHash over 5-character shingles of the
+  normalized text with every number replaced by '#', so the same stem with
+  different numbers (or slightly different wording) scores as similar.
+
+Lookups:
+- exact: one indexed query on (topic, exact_hash)
+- near: the signature is cut into 16 bands of 4 values and each band is
+  hashed into a bucket (question_dedup_lsh). Only questions sharing a
+  bucket are compared, so a lookup reads a handful of rows instead of the
+  whole topic. Pairs at or above NEAR_THRESHOLD estimated similarity count.
+
+Each question keeps at most one 'exact' and one 'near' link to an existing
+question (question_dedup_links). The admin report joins linked questions
+into groups from that table alone - no scan of the question bank.
+
+Triggers on questions (migrate_question_dedup.py) queue inserted and
+edited questions in question_dedup_pending and drop deleted ones, so every
+way questions are written is covered. index_pending() indexes the queue;
+checks run it first, and a scheduled job keeps it empty between checks.
+Without the tables, checks fall back to an exact text match.
+"""
+
+import hashlib
+import random
+import re
+import struct
+import unicodedata
+import zlib
+
+from sqlalchemy import text, inspect, bindparam
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE = 5
+NEAR_THRESHOLD = 0.8
+MAX_NEAR_MATCHES = 10  # Most similar first
+INDEX_BATCH_SIZE = 500
+
+_MERSENNE = (1 << 61) - 1
+_rng = random.Random(20240611)  # Fixed seed - signatures must match across processes and restarts
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE), _rng.randrange(0, _MERSENNE)) for _ in range(NUM_PERM)]
+_SIGNATURE_FORMAT = f'<{NUM_PERM}I'
+
+_tables = {'exists': None}
+
+
+def available(db):
+    if _tables['exists'] is None:
+        _tables['exists'] = inspect(db.engine).has_table('question_dedup')
+        if not _tables['exists']:
+            print("⚠️ question_dedup tables missing - duplicate checks use exact text (run migrate_question_dedup.py)")
+    return _tables['exists']
+
+
+# ---------------------------------------------------------------- hashing
+
+def normalize(question_text):
+    value = unicodedata.normalize('NFKC', question_text or '').lower()
+    value = value.replace('‘', "'").replace('’', "'").replace('“', '"').replace('”', '"')
+    value = value.replace('–', '-').replace('—', '-').replace('−', '-')
+    # Sentence punctuation goes, unless it sits between digits (2.5, 1,000, 3:4)
+    value = re.sub(r'[.,:](?!\d)|(?<!\d)[.,:]|[;!?\'"`]', ' ', value)
+    value = ' '.join(value.split())
+    # "2 + 3" and "2+3" are the same question
+    return re.sub(r'\s*([^\w\s])\s*', r'\1', value)
+
+
+def exact_hash(question_text):
+    return hashlib.sha1(normalize(question_text).encode('utf-8')).hexdigest()
+
+
+def _shingles(question_text):
+    stem = re.sub(r'\d+(?:[.,:]\d+)*', '#', normalize(question_text))
+    if len(stem) <= SHINGLE:
+        return {stem}
+    return {stem[i:i + SHINGLE] for i in range(len(stem) - SHINGLE + 1)}
+
+
+def signature(question_text):
+    hashes = [zlib.crc32(shingle.encode('utf-8')) for shingle in _shingles(question_text)]
+    return [min(((a * h + b) % _MERSENNE) & 0xFFFFFFFF for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def pack_signature(values):
+    return struct.pack(_SIGNATURE_FORMAT, *values)
+
+
+def unpack_signature(blob):
+    return struct.unpack(_SIGNATURE_FORMAT, bytes(blob))
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_PERM
+
+
+def band_buckets(values):
+    """[(band, bucket)] - one signed 64-bit bucket per band of ROWS values"""
+    buckets = []
+    for band in range(BANDS):
+        chunk = struct.pack(f'<{ROWS}I', *values[band * ROWS:(band + 1) * ROWS])
+        digest = hashlib.blake2b(chunk, digest_size=8).digest()
+        buckets.append((band, int.from_bytes(digest, 'little', signed=True)))
+    return buckets
+
+
+# ---------------------------------------------------------------- lookups
+
+def _bucket_params(values):
+    clauses, params = [], {}
+    for band, bucket in band_buckets(values):
+        clauses.append(f"(l.band = :band_{band} AND l.bucket = :bucket_{band})")
+        params[f'band_{band}'] = band
+        params[f'bucket_{band}'] = bucket
+    return ' OR '.join(clauses), params
+
+
+def _matches(db, topic, digest, values, exclude_id=None):
+    """
+    ([exact ids], [(id, similarity)]) for indexed questions in this topic -
+    exact by hash, near through shared LSH buckets.
+    """
+    exact = [row[0] for row in db.session.execute(text("""
+        SELECT question_id FROM question_dedup
+        WHERE topic = :topic AND exact_hash = :hash AND question_id != :exclude
+        ORDER BY question_id
+    """), {'topic': topic, 'hash': digest, 'exclude': exclude_id or 0}).fetchall()]
+
+    bucket_sql, params = _bucket_params(values)
+    candidates = db.session.execute(text(f"""
+        SELECT d.question_id, d.signature
+        FROM question_dedup d
+        WHERE d.topic = :topic AND d.exact_hash != :hash AND d.question_id != :exclude
+          AND d.question_id IN (SELECT l.question_id FROM question_dedup_lsh l WHERE {bucket_sql})
+    """), {**params, 'topic': topic, 'hash': digest, 'exclude': exclude_id or 0}).fetchall()
+
+    near = []
+    for row in candidates:
+        score = similarity(values, unpack_signature(row.signature))
+        if score >= NEAR_THRESHOLD:
+            near.append((row.question_id, score))
+    near.sort(key=lambda match: (-match[1], match[0]))
+    return exact, near
+
+
+def check_question(db, topic, question_text, difficulty=None):
+    """
+    Duplicates of a question that is about to be added:
+    {'exact': [ids], 'near': [{'id', 'similarity'}]}. difficulty narrows
+    exact matches to that difficulty, as the generators' checks always have.
+    """
+    if not available(db):
+        return {'exact': _exact_text_matches(db, topic, question_text, difficulty), 'near': []}
+
+    index_pending(db)
+    exact, near = _matches(db, topic, exact_hash(question_text), signature(question_text))
+    if difficulty and exact:
+        exact = [row[0] for row in db.session.execute(text("""
+            SELECT question_id FROM question_dedup
+            WHERE question_id IN :ids AND difficulty = :difficulty
+            ORDER BY question_id
+        """).bindparams(bindparam('ids', expanding=True)), {'ids': exact, 'difficulty': difficulty}).fetchall()]
+    return {'exact': exact, 'near': [{'id': qid, 'similarity': round(score, 3)}
+                                     for qid, score in near[:MAX_NEAR_MATCHES]]}
+
+
+def find_duplicate(db, topic, question_text, difficulty=None):
+    """Id of an existing question with the same normalized text, or None"""
+    exact = check_question(db, topic, question_text, difficulty)['exact']
+    return exact[0] if exact else None
+
+
+def _exact_text_matches(db, topic, question_text, difficulty=None):
+    sql = "SELECT id FROM questions WHERE topic = :topic AND question_text = :question_text"
+    params = {'topic': topic, 'question_text': question_text}
+    if difficulty:
+        sql += " AND difficulty = :difficulty"
+        params['difficulty'] = difficulty
+    return [row[0] for row in db.session.execute(text(sql + " ORDER BY id"), params).fetchall()]
+
+
+# ---------------------------------------------------------------- indexing
+
+def index_pending(db, limit=None):
+    """
+    Index the questions queued by the triggers, INDEX_BATCH_SIZE per query.
+    Doesn't commit - the caller's transaction covers it. Returns how many
+    were indexed.
+    """
+    if not available(db):
+        return 0
+
+    indexed = 0
+    while limit is None or indexed < limit:
+        batch = INDEX_BATCH_SIZE if limit is None else min(INDEX_BATCH_SIZE, limit - indexed)
+        rows = db.session.execute(text("""
+            SELECT p.question_id, q.topic, q.difficulty, q.question_text
+            FROM question_dedup_pending p
+            LEFT JOIN questions q ON q.id = p.question_id
+            ORDER BY p.question_id
+            LIMIT :batch
+        """), {'batch': batch}).fetchall()
+        if not rows:
+            break
+        for row in rows:
+            if row.topic is not None:
+                _index_question(db, row.question_id, row.topic, row.difficulty, row.question_text)
+            db.session.execute(text("DELETE FROM question_dedup_pending WHERE question_id = :id"),
+                               {'id': row.question_id})
+        indexed += len(rows)
+        if len(rows) < batch:
+            break
+    return indexed
+
+
+def _index_question(db, question_id, topic, difficulty, question_text):
+    digest = exact_hash(question_text)
+    values = signature(question_text)
+
+    for table in ('question_dedup_lsh', 'question_dedup_links', 'question_dedup'):
+        db.session.execute(text(f"DELETE FROM {table} WHERE question_id = :id"), {'id': question_id})
+
+    exact, near = _matches(db, topic, digest, values, exclude_id=question_id)
+
+    db.session.execute(text("""
+        INSERT INTO question_dedup (question_id, topic, difficulty, exact_hash, signature)
+        VALUES (:id, :topic, :difficulty, :hash, :signature)
+    """), {'id': question_id, 'topic': topic, 'difficulty': difficulty,
+           'hash': digest, 'signature': pack_signature(values)})
+    db.session.execute(text("""
+        INSERT INTO question_dedup_lsh (band, bucket, question_id) VALUES (:band, :bucket, :id)
+    """), [{'band': band, 'bucket': bucket, 'id': question_id} for band, bucket in band_buckets(values)])
+
+    links = []
+    if exact:
+        links.append({'id': question_id, 'kind': 'exact', 'of': exact[0], 'similarity': 1.0})
+    if near:
+        links.append({'id': question_id, 'kind': 'near', 'of': near[0][0], 'similarity': near[0][1]})
+    if links:
+        db.session.execute(text("""
+            INSERT INTO question_dedup_links (question_id, kind, duplicate_of, similarity)
+            VALUES (:id, :kind, :of, :similarity)
+        """), links)
+
+
+def rebuild(db, progress=None):
+    """Clear the index and queue every question again. Commits per batch."""
+    for table in ('question_dedup_links', 'question_dedup_lsh', 'question_dedup', 'question_dedup_pending'):
+        db.session.execute(text(f"DELETE FROM {table}"))
+    db.session.execute(text("INSERT INTO question_dedup_pending (question_id) SELECT id FROM questions"))
+    db.session.commit()
+
+    total = 0
+    while True:
+        indexed = index_pending(db, limit=INDEX_BATCH_SIZE)
+        db.session.commit()
+        if not indexed:
+            return total
+        total += indexed
+        if progress:
+            progress(total)
+
+
+# ---------------------------------------------------------------- report
+
+def duplicate_report(db, topic=None, include_near=False):
+    """
+    Groups of duplicate questions, read from question_dedup_links. Exact
+    groups only by default; include_near also joins near duplicates in.
+    Each group: {'topic', 'kind', 'similarity', 'question_text', 'count',
+    'questions': [{'id', 'difficulty', 'image_url'}]}, oldest question first.
+    """
+    where, params = [], {}
+    if not include_near:
+        where.append("l.kind = 'exact'")
+    if topic:
+        where.append("d.topic = :topic")
+        params['topic'] = topic
+    links = db.session.execute(text(f"""
+        SELECT l.question_id, l.duplicate_of, l.kind, l.similarity
+        FROM question_dedup_links l
+        JOIN question_dedup d ON d.question_id = l.question_id
+        {'WHERE ' + ' AND '.join(where) if where else ''}
+    """), params).fetchall()
+
+    parent = {}
+
+    def find(qid):
+        parent.setdefault(qid, qid)
+        while parent[qid] != qid:
+            parent[qid] = parent[parent[qid]]
+            qid = parent[qid]
+        return qid
+
+    edges = {}
+    for link in links:
+        a, b = find(link.question_id), find(link.duplicate_of)
+        if a != b:
+            parent[max(a, b)] = min(a, b)
+        edges.setdefault(link.question_id, []).append(link)
+
+    members = {}
+    for qid in parent:
+        members.setdefault(find(qid), []).append(qid)
+    if not members:
+        return []
+
+    ids = [qid for group in members.values() for qid in group]
+    details = {row.id: row for row in db.session.execute(text("""
+        SELECT id, topic, difficulty, question_text, image_url FROM questions WHERE id IN :ids
+    """).bindparams(bindparam('ids', expanding=True)), {'ids': ids}).fetchall()}
+
+    groups = []
+    for group in members.values():
+        group = sorted(qid for qid in group if qid in details)
+        if len(group) < 2:
+            continue
+        group_links = [link for qid in group for link in edges.get(qid, [])]
+        near = any(link.kind == 'near' for link in group_links)
+        first = details[group[0]]
+        groups.append({
+            'topic': first.topic,
+            'kind': 'near' if near else 'exact',
+            'similarity': round(min(link.similarity for link in group_links), 3) if group_links else 1.0,
+            'question_text': first.question_text,
+            'count': len(group),
+            'questions': [{
+                'id': qid,
+                'difficulty': details[qid].difficulty,
+                'image_url': details[qid].image_url,
+                'created_at': qid  # Using ID as proxy for creation order
+            } for qid in group]
+        })
+
+    groups.sort(key=lambda g: g['count'], reverse=True)
+    return groups
+
+
+def indexed_count(db, topic=None):
+    sql = "SELECT COUNT(*) FROM question_dedup"
+    params = {}
+    if topic:
+        sql += " WHERE topic = :topic"
+        params['topic'] = topic
+    return db.session.execute(text(sql), params).scalar()
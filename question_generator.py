@@ -197,22 +197,14 @@ IMPORTANT:
             
             # Save to database
             from app import Question
+            from question_dedup import find_duplicate
             
             saved = 0
             skipped = 0
             
             for q in all_questions:
-                # Check for duplicate
-                existing = db.session.execute(text("""
-                    SELECT id FROM questions 
-                    WHERE topic = :topic AND difficulty = :difficulty AND question_text = :question_text
-                """), {
-                    'topic': topic_id,
-                    'difficulty': q['difficulty'],
-                    'question_text': q['question_text']
-                }).fetchone()
-                
-                if existing:
+                # Check for duplicate (ignores case, spacing and punctuation)
+                if find_duplicate(db, topic_id, q['question_text'], q['difficulty']):
                     skipped += 1
                     continue
                 
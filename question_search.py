@@ -0,0 +1,228 @@
+"""
+QUESTION SEARCH
+===============
+Server-side search over the question bank for the admin dashboard
+(/api/admin/questions/search, /api/admin/questions/export.ndjson and the
+paged form of /api/admin/all-questions).
+
+- Full-text search uses questions_fts, an SQLite FTS5 index over question
+  text, options, explanation and hint, kept in sync by triggers on
+  questions (migrate_question_search.py). Without it, search falls back to
+  LIKE over the same columns.
+- Filters: topic, difficulty, strand, has_image, flagged (has a pending
+  flag) and q (full text). Strand matches the question's own strand or,
+  when that is empty, the strand its topic belongs to.
+- Keyset pagination like the admin user listing: an opaque cursor holds
+  the last row's sort value and id, so each page is one query with no
+  OFFSET.
+- iter_questions() walks every match in id order, one batch at a time, for
+  the NDJSON export - the full list is never held in memory.
+"""
+
+import re
+
+from sqlalchemy import text, inspect
+
+from admin_user_listing import ListingError, encode_cursor, decode_cursor
+
+EXPORT_BATCH_SIZE = 500
+
+DIFFICULTIES = ('beginner', 'intermediate', 'advanced')
+
+# sort name -> SQL key. 'topic' keeps the old all-questions order
+# (topic, difficulty, id); the space sorts before any topic character.
+SORTS = {
+    'id': "q.id",
+    'topic': "q.topic || ' ' || q.difficulty",
+}
+
+SEARCH_COLUMNS = ('question_text', 'option_a', 'option_b', 'option_c', 'option_d',
+                  'explanation', 'hint_text')
+
+_PENDING_FLAGS_SQL = "(SELECT COUNT(*) FROM question_flags f WHERE f.question_id = q.id AND f.status = 'pending')"
+
+_tables = {'fts': None, 'topics': None}
+
+
+def fts_available(db):
+    if _tables['fts'] is None:
+        _tables['fts'] = inspect(db.engine).has_table('questions_fts')
+        if not _tables['fts']:
+            print("⚠️ questions_fts table missing - question search uses LIKE (run migrate_question_search.py)")
+    return _tables['fts']
+
+
+def _topics_available(db):
+    if _tables['topics'] is None:
+        inspector = inspect(db.engine)
+        _tables['topics'] = inspector.has_table('topics') and inspector.has_table('strands')
+    return _tables['topics']
+
+
+def match_expression(search):
+    """
+    FTS5 MATCH string for what an admin typed: every word must appear,
+    each as a prefix ("frac" finds "fraction"). Quoting each word keeps
+    FTS5 operators and punctuation from being parsed as query syntax.
+    Returns None when there are no words to match.
+    """
+    words = re.findall(r'\w+', search or '')
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def parse_flag(value, name):
+    """'1'/'true'/'yes' -> True, '0'/'false'/'no' -> False, empty -> None"""
+    if value in (None, ''):
+        return None
+    value = str(value).strip().lower()
+    if value in ('1', 'true', 'yes'):
+        return True
+    if value in ('0', 'false', 'no'):
+        return False
+    raise ListingError(f'{name} must be true or false')
+
+
+def _filters(db, topic=None, difficulty=None, strand=None, has_image=None, flagged=None, search=None):
+    where, params = [], {}
+
+    if topic:
+        where.append("q.topic = :topic")
+        params['topic'] = topic
+
+    if difficulty:
+        if difficulty not in DIFFICULTIES:
+            raise ListingError(f'Unknown difficulty: {difficulty}')
+        where.append("q.difficulty = :difficulty")
+        params['difficulty'] = difficulty
+
+    if strand:
+        if _topics_available(db):
+            where.append("""(q.strand = :strand OR (COALESCE(q.strand, '') = '' AND q.topic IN (
+                SELECT t.topic_id FROM topics t JOIN strands s ON s.id = t.strand_id WHERE s.name = :strand)))""")
+        else:
+            where.append("q.strand = :strand")
+        params['strand'] = strand
+
+    if has_image is not None:
+        where.append(f"COALESCE(q.image_url, '') {'!=' if has_image else '='} ''")
+
+    if flagged is not None:
+        where.append(f"{'' if flagged else 'NOT '}EXISTS (SELECT 1 FROM question_flags f "
+                     f"WHERE f.question_id = q.id AND f.status = 'pending')")
+
+    if search and search.strip():
+        match = match_expression(search)
+        if match and fts_available(db):
+            where.append("q.id IN (SELECT rowid FROM questions_fts WHERE questions_fts MATCH :match)")
+            params['match'] = match
+        else:
+            where.append('(' + ' OR '.join(f"LOWER(COALESCE(q.{column}, '')) LIKE :search"
+                                            for column in SEARCH_COLUMNS) + ')')
+            params['search'] = f"%{search.strip().lower()}%"
+
+    return where, params
+
+
+def _question_dict(row):
+    """Same shape as Question.to_dict(), plus strand and pending_flags"""
+    return {
+        'id': row.id,
+        'topic': row.topic,
+        'difficulty': row.difficulty,
+        'strand': row.strand,
+        'question': row.question_text,
+        'options': [row.option_a, row.option_b, row.option_c, row.option_d],
+        'correct': row.correct_answer,
+        'explanation': row.explanation,
+        'image_url': row.image_url,
+        'image_caption': row.image_caption,
+        'hint_text': row.hint_text,
+        'hint_penalty': row.hint_penalty or 50,
+        'has_image': bool(row.image_url),
+        'has_hint': bool(row.hint_text),
+        'pending_flags': row.pending_flags,
+    }
+
+
+def _select(sort_key, where, order, limit=None):
+    sql = f"""
+        SELECT q.id, q.topic, q.difficulty, q.strand, q.question_text,
+               q.option_a, q.option_b, q.option_c, q.option_d, q.correct_answer,
+               q.explanation, q.image_url, q.image_caption, q.hint_text, q.hint_penalty,
+               {_PENDING_FLAGS_SQL} as pending_flags,
+               {sort_key} as sort_value
+        FROM questions q
+        {'WHERE ' + ' AND '.join(where) if where else ''}
+        ORDER BY sort_value {order}, q.id {order}
+    """
+    if limit is not None:
+        sql += " LIMIT :fetch"
+    return text(sql)
+
+
+def search_questions(db, topic=None, difficulty=None, strand=None, has_image=None, flagged=None,
+                     search=None, sort='id', direction='asc', limit=None, cursor=None):
+    """
+    One page of questions matching the filters, in one query.
+
+    Returns {'questions': [...], 'next_cursor': str or None}. Pass
+    next_cursor back (with the same sort and filters) for the following
+    page. limit=None returns every match.
+    """
+    if sort not in SORTS:
+        raise ListingError(f'Unknown sort: {sort}')
+    if direction not in ('asc', 'desc'):
+        raise ListingError('direction must be asc or desc')
+
+    sort_key = SORTS[sort]
+    where, params = _filters(db, topic, difficulty, strand, has_image, flagged, search)
+
+    if cursor:
+        value, after_id = decode_cursor(cursor)
+        op = '<' if direction == 'desc' else '>'
+        where.append(f"({sort_key} {op} :cursor_value OR ({sort_key} = :cursor_value AND q.id {op} :cursor_id))")
+        params['cursor_value'] = value
+        params['cursor_id'] = after_id
+
+    if limit is not None:
+        params['fetch'] = limit + 1  # One extra row tells us whether there is a next page
+
+    rows = db.session.execute(_select(sort_key, where, direction.upper(), limit), params).fetchall()
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].sort_value, rows[-1].id)
+
+    return {'questions': [_question_dict(row) for row in rows], 'next_cursor': next_cursor}
+
+
+def count_questions(db, topic=None, difficulty=None, strand=None, has_image=None, flagged=None, search=None):
+    where, params = _filters(db, topic, difficulty, strand, has_image, flagged, search)
+    sql = "SELECT COUNT(*) FROM questions q"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    return db.session.execute(text(sql), params).scalar()
+
+
+def iter_questions(db, batch_size=EXPORT_BATCH_SIZE, **filters):
+    """
+    Every matching question in id order, fetched batch_size rows at a time
+    (keyset on id), so an export holds one batch in memory at most.
+    """
+    where, params = _filters(db, **filters)
+    where.append("q.id > :after_id")
+    params['fetch'] = batch_size
+    statement = _select(SORTS['id'], where, 'ASC', batch_size)
+
+    after_id = 0
+    while True:
+        params['after_id'] = after_id
+        rows = db.session.execute(statement, params).fetchall()
+        for row in rows:
+            yield _question_dict(row)
+        if len(rows) < batch_size:
+            return
+        after_id = rows[-1].id
@@ -68,8 +68,8 @@ def run_auto_draws():
             # Find raffles due for auto-draw
             raffles = db.session.execute(text("""
                 SELECT * FROM raffles
-                WHERE is_active = 1 
-                AND auto_draw_enabled = 1
+                WHERE is_active = TRUE 
+                AND auto_draw_enabled = TRUE
                 AND draw_frequency IN ('weekly', 'daily', 'monthly')
             """)).fetchall()
             
@@ -90,8 +90,8 @@ def run_auto_draws():
                     today_draw = db.session.execute(text("""
                         SELECT id FROM raffle_draws 
                         WHERE raffle_id = :raffle_id 
-                        AND DATE(drawn_at) = DATE('now')
-                    """), {'raffle_id': raffle.id}).fetchone()
+                        AND drawn_at >= :today
+                    """), {'raffle_id': raffle.id, 'today': now.replace(hour=0, minute=0, second=0, microsecond=0)}).fetchone()
                     
                     if today_draw:
                         log(f"  SKIP: Already drawn today")
@@ -138,8 +138,8 @@ def run_auto_draws():
                                 month_draw = db.session.execute(text("""
                                     SELECT id FROM raffle_draws 
                                     WHERE raffle_id = :raffle_id 
-                                    AND strftime('%Y-%m', drawn_at) = strftime('%Y-%m', 'now')
-                                """), {'raffle_id': raffle.id}).fetchone()
+                                    AND drawn_at >= :month_start
+                                """), {'raffle_id': raffle.id, 'month_start': now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)}).fetchone()
                                 
                                 if not month_draw:
                                     should_draw = True
@@ -153,13 +153,10 @@ def run_auto_draws():
                     
                     if should_draw:
                         # Check if there are entries
-                        entry_count = db.session.execute(text("""
-                            SELECT COUNT(*) as cnt FROM raffle_entries
-                            WHERE raffle_id = :raffle_id AND is_active = 1
-                        """), {'raffle_id': raffle.id}).fetchone()
+                        active_tickets = raffle.total_entries - raffle.round_ticket_start
                         
-                        if entry_count and entry_count.cnt > 0:
-                            log(f"  DRAWING: {reason} ({entry_count.cnt} entries)")
+                        if active_tickets > 0:
+                            log(f"  DRAWING: {reason} ({active_tickets} entries)")
                             
                             # Import and call the draw function
                             from app import perform_raffle_draw
@@ -8,6 +8,10 @@ This script:
 3. Updates UserStats.topics_mastered counts
 4. Recalculates mastery for guest_code users from guest_quiz_attempts
 
+Steps 1-3 are a full rebuild with mastery_engine.py. For routine updates the
+mastery_recalculation job (or `python mastery_engine.py`) only touches
+learners with new attempts.
+
 Run on PythonAnywhere:
     cd /home/bbsisk/mathapp
     source venv/bin/activate
@@ -23,124 +27,22 @@ if app_dir not in sys.path:
     sys.path.insert(0, app_dir)
 
 from app import app, db
+from mastery_engine import MASTERY_THRESHOLD, recalculate_mastery, guest_mastery_summary
 from sqlalchemy import text
 
-def recalculate_registered_users():
-    """Recalculate mastery for all registered users"""
+def recalculate_registered_users(full=True):
+    """Recalculate mastery for registered users (full rebuild by default)"""
     print("\n" + "="*60)
     print("RECALCULATING MASTERY FOR REGISTERED USERS")
     print("="*60)
     
-    # Get all users with quiz attempts
-    users_query = text("""
-        SELECT DISTINCT user_id FROM quiz_attempts WHERE user_id IS NOT NULL
-    """)
-    users = db.session.execute(users_query).fetchall()
-    print(f"\nFound {len(users)} users with quiz attempts")
-    
-    topics = [
-        'arithmetic', 'fractions', 'decimals', 'multiplication_division',
-        'number_systems', 'bodmas', 'introductory_algebra', 'functions', 
-        'patterns', 'solving_equations', 'simplifying_expressions', 
-        'expanding_factorising', 'probability', 'descriptive_statistics', 
-        'sets', 'surds', 'complex_numbers_intro', 'complex_numbers_expanded'
-    ]
-    difficulties = ['beginner', 'intermediate', 'advanced']
-    
-    total_updated = 0
-    total_mastered = 0
-    
-    for (user_id,) in users:
-        # Get best scores for this user
-        scores_query = text("""
-            SELECT topic, difficulty, MAX(percentage) as best_score
-            FROM quiz_attempts
-            WHERE user_id = :user_id
-            GROUP BY topic, difficulty
-        """)
-        scores = db.session.execute(scores_query, {'user_id': user_id}).fetchall()
-        
-        # Build lookup
-        best_scores = {}
-        for topic, difficulty, best_score in scores:
-            if topic not in best_scores:
-                best_scores[topic] = {}
-            best_scores[topic][difficulty] = best_score or 0
-        
-        # Count mastered topics (all 3 difficulties >80%)
-        topics_mastered = 0
-        
-        for topic in topics:
-            topic_scores = best_scores.get(topic, {})
-            mastered_count = sum(1 for d in difficulties if topic_scores.get(d, 0) > 80)
-            
-            if mastered_count == 3:
-                topics_mastered += 1
-            
-            # Update TopicProgress for each difficulty
-            for difficulty in difficulties:
-                best_score = topic_scores.get(difficulty, 0)
-                is_mastered = best_score > 80
-                
-                if best_score > 0:
-                    # Check if TopicProgress exists
-                    check_query = text("""
-                        SELECT id, best_score, is_mastered FROM topic_progress
-                        WHERE user_id = :user_id AND topic = :topic AND difficulty = :difficulty
-                    """)
-                    existing = db.session.execute(check_query, {
-                        'user_id': user_id, 
-                        'topic': topic, 
-                        'difficulty': difficulty
-                    }).fetchone()
-                    
-                    if existing:
-                        # Update if needed
-                        if existing[1] != best_score or existing[2] != is_mastered:
-                            update_query = text("""
-                                UPDATE topic_progress 
-                                SET best_score = :best_score, is_mastered = :is_mastered
-                                WHERE id = :id
-                            """)
-                            db.session.execute(update_query, {
-                                'id': existing[0],
-                                'best_score': int(best_score),
-                                'is_mastered': is_mastered
-                            })
-                            total_updated += 1
-                            if is_mastered:
-                                total_mastered += 1
-                    else:
-                        # Insert new record
-                        insert_query = text("""
-                            INSERT INTO topic_progress (user_id, topic, difficulty, best_score, is_mastered, attempts)
-                            VALUES (:user_id, :topic, :difficulty, :best_score, :is_mastered, 1)
-                        """)
-                        db.session.execute(insert_query, {
-                            'user_id': user_id,
-                            'topic': topic,
-                            'difficulty': difficulty,
-                            'best_score': int(best_score),
-                            'is_mastered': is_mastered
-                        })
-                        total_updated += 1
-                        if is_mastered:
-                            total_mastered += 1
-        
-        # Update UserStats.topics_mastered
-        update_stats_query = text("""
-            UPDATE user_stats SET topics_mastered = :topics_mastered
-            WHERE user_id = :user_id
-        """)
-        db.session.execute(update_stats_query, {
-            'user_id': user_id,
-            'topics_mastered': topics_mastered
-        })
+    result = recalculate_mastery(db, full=full)
     
-    db.session.commit()
-    print(f"✓ Updated {total_updated} TopicProgress records")
-    print(f"✓ Found {total_mastered} mastered topic/difficulty combinations")
-    print(f"✓ Updated topics_mastered count for {len(users)} users")
+    print(f"\n✓ Updated topic_progress for {result['learners']} users ({result['progress_rows']} rows)")
+    print(f"✓ Updated topics_mastered counts in {result['duration_ms']} ms")
+    for step, ms in result['timings_ms'].items():
+        print(f"    {step:<18} {ms} ms")
+    return result
 
 
 def recalculate_guest_users():
@@ -151,68 +53,15 @@ def recalculate_guest_users():
     
     # Check if guest_quiz_attempts table exists
     try:
-        check_query = text("SELECT COUNT(*) FROM guest_quiz_attempts")
-        count = db.session.execute(check_query).fetchone()[0]
-        print(f"\nFound {count} total guest quiz attempts")
+        mastery_summary = guest_mastery_summary(db)
     except Exception as e:
         print(f"guest_quiz_attempts table not found or empty: {e}")
         return
     
-    # Get all guest codes with attempts
-    guests_query = text("""
-        SELECT DISTINCT guest_code FROM guest_quiz_attempts WHERE guest_code IS NOT NULL
-    """)
-    guests = db.session.execute(guests_query).fetchall()
-    print(f"Found {len(guests)} guest codes with quiz attempts")
-    
-    difficulties = ['beginner', 'intermediate', 'advanced']
-    
-    mastery_summary = {
-        'total_guests': len(guests),
-        'guests_with_mastery': 0,
-        'total_mastered_difficulties': 0,
-        'total_mastered_topics': 0
-    }
-    
-    for (guest_code,) in guests:
-        # Get best scores for this guest
-        scores_query = text("""
-            SELECT topic, difficulty, 
-                   MAX(CAST(score AS FLOAT) / total_questions * 100) as best_score
-            FROM guest_quiz_attempts
-            WHERE guest_code = :guest_code
-            GROUP BY topic, difficulty
-        """)
-        scores = db.session.execute(scores_query, {'guest_code': guest_code}).fetchall()
-        
-        # Count mastery
-        guest_mastered_diffs = 0
-        topics_data = {}
-        
-        for topic, difficulty, best_score in scores:
-            if topic not in topics_data:
-                topics_data[topic] = {}
-            topics_data[topic][difficulty] = best_score or 0
-            
-            if best_score and best_score > 80:
-                guest_mastered_diffs += 1
-        
-        # Count fully mastered topics
-        guest_mastered_topics = 0
-        for topic, diffs in topics_data.items():
-            mastered_count = sum(1 for d in difficulties if diffs.get(d, 0) > 80)
-            if mastered_count == 3:
-                guest_mastered_topics += 1
-        
-        if guest_mastered_diffs > 0:
-            mastery_summary['guests_with_mastery'] += 1
-            mastery_summary['total_mastered_difficulties'] += guest_mastered_diffs
-            mastery_summary['total_mastered_topics'] += guest_mastered_topics
-    
-    print(f"\n✓ Guest Mastery Summary:")
+    print(f"\n✓ Guest Mastery Summary ({mastery_summary['guests']} guest codes with quiz attempts):")
     print(f"  - {mastery_summary['guests_with_mastery']} guests have at least one mastered difficulty")
-    print(f"  - {mastery_summary['total_mastered_difficulties']} total mastered difficulties across all guests")
-    print(f"  - {mastery_summary['total_mastered_topics']} total fully mastered topics across all guests")
+    print(f"  - {mastery_summary['mastered_difficulties']} total mastered difficulties across all guests")
+    print(f"  - {mastery_summary['mastered_topics']} total fully mastered topics across all guests")
     
     # Note: Guest mastery is calculated dynamically, no storage needed
     print("\n  (Guest mastery is calculated on-the-fly from guest_quiz_attempts)")
@@ -228,14 +77,14 @@ def show_mastery_report():
     report_query = text("""
         SELECT topic, difficulty, 
                COUNT(*) as attempts,
-               SUM(CASE WHEN percentage > 80 THEN 1 ELSE 0 END) as mastered
+               SUM(CASE WHEN percentage > :threshold THEN 1 ELSE 0 END) as mastered
         FROM quiz_attempts
         WHERE user_id IS NOT NULL
         GROUP BY topic, difficulty
         ORDER BY topic, difficulty
     """)
     
-    results = db.session.execute(report_query).fetchall()
+    results = db.session.execute(report_query, {'threshold': MASTERY_THRESHOLD}).fetchall()
     
     print("\nRegistered Users - Mastery by Topic/Difficulty:")
     print("-" * 60)
@@ -254,13 +103,13 @@ def show_mastery_report():
         SELECT u.username, COUNT(DISTINCT qa.topic || qa.difficulty) as mastered_count
         FROM users u
         JOIN quiz_attempts qa ON u.id = qa.user_id
-        WHERE qa.percentage > 80
+        WHERE qa.percentage > :threshold
         GROUP BY u.id, u.username
         ORDER BY mastered_count DESC
         LIMIT 10
     """)
     
-    top_users = db.session.execute(top_query).fetchall()
+    top_users = db.session.execute(top_query, {'threshold': MASTERY_THRESHOLD}).fetchall()
     
     print("\n\nTop 10 Users by Mastered Difficulties:")
     print("-" * 40)
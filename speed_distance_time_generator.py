@@ -485,6 +485,7 @@ def generate_sdt_questions(question_types=None, difficulties=None, count=3, outp
 def register_sdt_generator_routes(app, db, Question, admin_required_api):
     """Register Flask routes for SDT question generation"""
     from sqlalchemy import text
+    from question_dedup import find_duplicate
     
     @app.route('/api/admin/generate-sdt-questions', methods=['POST'])
     @admin_required_api
@@ -512,11 +513,7 @@ def register_sdt_generator_routes(app, db, Question, admin_required_api):
                 skipped_count += 1
                 continue
             
-            existing = db.session.execute(text(
-                "SELECT id FROM questions WHERE topic = :topic AND question_text = :qt"
-            ), {'topic': TOPIC_NAME, 'qt': q['question_text']}).fetchone()
-            
-            if existing:
+            if find_duplicate(db, TOPIC_NAME, q['question_text']):
                 skipped_count += 1
                 continue
             
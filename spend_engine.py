@@ -0,0 +1,191 @@
+"""
+SPEND ENGINE
+============
+Every spend - prize redemptions, avatar purchases, raffle entries and racing
+car upgrades - takes points (or upgrade budget) and stock with single
+conditional UPDATEs and checks the affected row count, instead of reading the
+balance, checking it in Python and writing it back:
+
+    UPDATE user_stats SET total_points = total_points - :amount
+    WHERE user_id = :key AND total_points >= :amount
+
+If the row is not updated the learner could not afford it (or it sold out) and
+the whole spend is rolled back. Concurrent spends need no application lock and
+can never overspend or oversell.
+
+run_spend() wraps a spend in one transaction: the conditional updates, the
+purchase records and (when the client sent one) the idempotency key are
+committed together. A retry with the same key gets the stored response back
+instead of spending twice. Routes call replay_spend() before their own checks
+(already owned, entry cap, budget), since a spend that went through changes
+their answer and a retry would otherwise get an error instead of its response.
+
+Create the spend_requests table first with migrate_spend_engine.py - without
+it, spends still work but idempotency keys are ignored.
+"""
+
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import text, inspect
+from sqlalchemy.exc import IntegrityError
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+IDEMPOTENCY_KEY_MAX_LENGTH = 100
+IDEMPOTENCY_RETENTION_DAYS = 7
+
+# Where each kind of learner keeps their points
+POINTS_BALANCES = {
+    'guest': ('guest_users', 'total_score', 'guest_code'),
+    'user': ('user_stats', 'total_points', 'user_id'),
+}
+
+_idempotency_table = {'exists': None}
+
+
+class SpendRejected(Exception):
+    """Abort a spend: everything it did is rolled back and (body, status) returned"""
+
+    def __init__(self, body, status=400):
+        super().__init__(body.get('error') or body.get('message'))
+        self.body = body
+        self.status = status
+
+
+def spend_owner(user_id=None, guest_code=None):
+    """Who an idempotency key belongs to (guest_code first, as everywhere)"""
+    return f'guest:{guest_code}' if guest_code else f'user:{user_id}'
+
+
+def deduct_points(db, amount, user_id=None, guest_code=None):
+    """
+    Take amount points in one conditional UPDATE.
+    Returns the new balance, or None if the learner does not have enough.
+    """
+    table, column, key_column = POINTS_BALANCES['guest' if guest_code else 'user']
+    params = {'amount': amount, 'key': guest_code or user_id}
+    updated = db.session.execute(text(f"""
+        UPDATE {table} SET {column} = {column} - :amount
+        WHERE {key_column} = :key AND {column} >= :amount
+    """), params).rowcount
+    if updated != 1:
+        return None
+    return db.session.execute(text(
+        f"SELECT {column} FROM {table} WHERE {key_column} = :key"
+    ), params).scalar()
+
+
+def decrement_stock(db, school_prize_id):
+    """
+    Take one unit of a school prize's stock in one conditional UPDATE.
+    Returns False if it is out of stock. NULL stock means unlimited.
+    """
+    updated = db.session.execute(text("""
+        UPDATE school_prizes SET stock_available = stock_available - 1
+        WHERE id = :id AND stock_available > 0
+    """), {'id': school_prize_id}).rowcount
+    if updated:
+        return True
+    stock = db.session.execute(text(
+        "SELECT stock_available, 1 as found FROM school_prizes WHERE id = :id"
+    ), {'id': school_prize_id}).fetchone()
+    return stock is not None and stock.stock_available is None
+
+
+def spend_upgrade_budget(db, amount, budget, user_id=None, guest_code=None):
+    """
+    Add amount to a racing car's upgrade_budget_used, only if it stays within
+    budget. Returns the budget used afterwards, or None if it would not fit.
+    """
+    key_column = 'guest_code' if guest_code else 'user_id'
+    params = {'amount': amount, 'budget': budget, 'key': guest_code or user_id, 'now': datetime.utcnow()}
+    updated = db.session.execute(text(f"""
+        UPDATE user_race_cars
+        SET upgrade_budget_used = COALESCE(upgrade_budget_used, 0) + :amount, updated_at = :now
+        WHERE {key_column} = :key AND COALESCE(upgrade_budget_used, 0) + :amount <= :budget
+    """), params).rowcount
+    if updated != 1:
+        return None
+    return db.session.execute(text(
+        f"SELECT upgrade_budget_used FROM user_race_cars WHERE {key_column} = :key"
+    ), params).scalar()
+
+
+def idempotency_available(db):
+    if _idempotency_table['exists'] is None:
+        _idempotency_table['exists'] = inspect(db.engine).has_table('spend_requests')
+        if not _idempotency_table['exists']:
+            print("⚠️ spend_requests table missing - idempotency keys ignored (run migrate_spend_engine.py)")
+    return _idempotency_table['exists']
+
+
+def _stored_response(db, owner, idempotency_key):
+    return db.session.execute(text("""
+        SELECT kind, status_code, response FROM spend_requests
+        WHERE owner = :owner AND idempotency_key = :key
+    """), {'owner': owner, 'key': idempotency_key}).fetchone()
+
+
+def _replay(stored, kind):
+    if stored.kind != kind:
+        return {'error': 'Idempotency key was already used for a different request'}, 422, True
+    return json.loads(stored.response), stored.status_code, True
+
+
+def replay_spend(db, kind, owner, idempotency_key):
+    """(body, status, True) stored for this idempotency key, or None if it is new"""
+    if not idempotency_key or not idempotency_available(db):
+        return None
+    stored = _stored_response(db, owner, idempotency_key)
+    return _replay(stored, kind) if stored else None
+
+
+def run_spend(db, kind, owner, idempotency_key, spend):
+    """
+    Run spend() - which makes the conditional updates and purchase records and
+    returns (body, status), or raises SpendRejected - as one transaction.
+
+    Returns (body, status, replayed). With an idempotency key, the first
+    response is stored with the spend and replayed for retries.
+    """
+    if idempotency_key and not idempotency_available(db):
+        idempotency_key = None
+
+    # Checked again here: a concurrent retry may have finished since the route looked
+    replayed = replay_spend(db, kind, owner, idempotency_key)
+    if replayed:
+        return replayed
+
+    try:
+        body, status = spend()
+        if idempotency_key:
+            db.session.execute(text("""
+                INSERT INTO spend_requests (owner, idempotency_key, kind, status_code, response, created_at)
+                VALUES (:owner, :key, :kind, :status, :response, :now)
+            """), {
+                'owner': owner, 'key': idempotency_key, 'kind': kind, 'status': status,
+                'response': json.dumps(body), 'now': datetime.utcnow()
+            })
+        db.session.commit()
+        return body, status, False
+    except SpendRejected as e:
+        db.session.rollback()
+        return e.body, e.status, False
+    except IntegrityError:
+        db.session.rollback()
+        # A concurrent retry with the same key committed first - return its response
+        stored = _stored_response(db, owner, idempotency_key) if idempotency_key else None
+        if stored:
+            return _replay(stored, kind)
+        raise
+
+
+def prune_spend_requests(db, days=IDEMPOTENCY_RETENTION_DAYS):
+    """Forget idempotency keys older than `days`. Returns the number removed."""
+    if not idempotency_available(db):
+        return 0
+    removed = db.session.execute(text(
+        "DELETE FROM spend_requests WHERE created_at < :cutoff"
+    ), {'cutoff': datetime.utcnow() - timedelta(days=days)}).rowcount
+    db.session.commit()
+    return removed
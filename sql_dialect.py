@@ -0,0 +1,113 @@
+"""
+SQL DIALECT
+===========
+The few places where raw SQL differs between SQLite and PostgreSQL, so the
+app can run on either. Which one is used comes from DATABASE_URI (the same
+variable config.DATABASE_URI reads), defaulting to the SQLite file.
+
+Portable as written, so no helper is needed:
+- INSERT ... ON CONFLICT DO NOTHING / DO UPDATE (SQLite 3.24+) instead of
+  INSERT OR IGNORE / INSERT OR REPLACE
+- DATE(column), RANDOM(), CURRENT_TIMESTAMP, COALESCE, LIMIT
+- TRUE/FALSE (SQLite 3.23+) for BOOLEAN columns, which PostgreSQL will not
+  compare with 1/0. Columns created as INTEGER flags keep 1/0
+
+Dialect-dispatched here:
+- insert_returning_id(): new row ids (cursor.lastrowid on SQLite,
+  RETURNING id on PostgreSQL, where lastrowid is not the row id)
+- group_concat(): string aggregation
+- greatest(), least(): the larger/smaller of two values, as CASE (SQLite's
+  scalar MAX/MIN are aggregates on PostgreSQL, and GREATEST/LEAST do not
+  exist on SQLite)
+- flag_is_set(): flags whose column type depends on how the table was made
+- serial_primary_key(): the auto-increment id column for runtime DDL
+- has_table(), column_names(): schema checks instead of sqlite_master
+  and PRAGMA table_info
+
+Data moves from the SQLite file with migrate_sqlite_to_postgres.py.
+tests/run_matrix.py runs the test suite against both databases.
+"""
+
+import os
+
+from sqlalchemy import text, inspect
+
+DEFAULT_DATABASE_URI = 'sqlite:///mathquiz.db'
+
+
+def database_uri():
+    """DATABASE_URI, with the postgres:// scheme some hosts hand out fixed up"""
+    uri = os.environ.get('DATABASE_URI') or DEFAULT_DATABASE_URI
+    if uri.startswith('postgres://'):
+        uri = 'postgresql://' + uri[len('postgres://'):]
+    return uri
+
+
+def engine_options(uri):
+    """SQLAlchemy engine options for this database (a pool sized for concurrent writers on a server database)"""
+    if uri.startswith('sqlite'):
+        return {}
+    return {
+        'pool_pre_ping': True,
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        'pool_recycle': 1800,
+    }
+
+
+def dialect_name(db):
+    return db.engine.dialect.name
+
+
+def is_sqlite(db):
+    return dialect_name(db) == 'sqlite'
+
+
+def insert_returning_id(db, sql, params=None, key='id'):
+    """Run an INSERT ... VALUES statement and return the new row's id"""
+    if is_sqlite(db):
+        return db.session.execute(text(sql), params or {}).lastrowid
+    return db.session.execute(text(f"{sql.rstrip().rstrip(';')} RETURNING {key}"), params or {}).scalar()
+
+
+def group_concat(db, expression, separator=','):
+    """SQL aggregating a column's values into one comma-separated string"""
+    if is_sqlite(db):
+        return f"GROUP_CONCAT({expression}, '{separator}')"
+    return f"STRING_AGG(CAST({expression} AS TEXT), '{separator}')"
+
+
+def greatest(a, b):
+    """SQL for the larger of two expressions"""
+    return f"(CASE WHEN {a} > {b} THEN {a} ELSE {b} END)"
+
+
+def least(a, b):
+    """SQL for the smaller of two expressions"""
+    return f"(CASE WHEN {a} < {b} THEN {a} ELSE {b} END)"
+
+
+def flag_is_set(column):
+    """SQL testing a 0/1 flag that is INTEGER in databases built by the old
+    CREATE TABLE scripts and BOOLEAN in ones built from the models
+    (bonus_questions.is_active, who_am_i_images.active)"""
+    return f"CAST({column} AS INTEGER) = 1"
+
+
+def serial_primary_key(db):
+    """Column definition for an auto-increment integer id, for CREATE TABLE"""
+    if is_sqlite(db):
+        return "id INTEGER PRIMARY KEY AUTOINCREMENT"
+    return "id SERIAL PRIMARY KEY"
+
+
+def has_table(db, table):
+    return inspect(db.engine).has_table(table)
+
+
+def column_names(db, table):
+    """Column names of a table, [] if it does not exist"""
+    inspector = inspect(db.engine)
+    if not inspector.has_table(table):
+        return []
+    return [column['name'] for column in inspector.get_columns(table)]
@@ -1,7 +1,23 @@
 // Service Worker for AgentMath.app PWA
-const CACHE_NAME = 'agentmath-v1';
+// /sw.js prepends self.ASSET_BUNDLES (from build_assets.py) when bundles are built
+const ASSET_BUNDLES = self.ASSET_BUNDLES || { version: null, bundles: [] };
+const CACHE_NAME = ASSET_BUNDLES.version ? 'agentmath-v2-' + ASSET_BUNDLES.version : 'agentmath-v2';
+const QUIZ_PACK_CACHE = 'agentmath-quiz-packs-v1';
 const OFFLINE_URL = '/offline.html';
 
+// Offline quiz submissions are queued in IndexedDB and replayed by background sync
+const OUTBOX_DB_NAME = 'agentmath-outbox';
+const OUTBOX_STORE = 'quiz-submissions';
+const QUIZ_SYNC_TAG = 'sync-quiz-results';
+const SUBMIT_QUIZ_URL = '/api/submit-quiz';
+const QUIZ_PACK_PREFIX = '/api/quiz-pack/';
+const LOGOUT_URLS = ['/api/logout', '/logout'];
+
+// Queued submissions and precached packs belong to one learner (payload.learner /
+// ?learner=, the server's offline_learner_key). On a shared device they are never
+// replayed or served under someone else's session, and logging out clears the
+// leaving learner's (named by the logout response's Offline-Learner header).
+
 // Assets to cache immediately on install
 const PRECACHE_ASSETS = [
   '/',
@@ -11,7 +27,7 @@ const PRECACHE_ASSETS = [
   '/static/css/avatar.css',
   'https://cdn.tailwindcss.com',
   'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css'
-];
+].concat(ASSET_BUNDLES.bundles);
 
 // Install event - cache essential assets
 self.addEventListener('install', (event) => {
@@ -35,7 +51,7 @@ self.addEventListener('activate', (event) => {
   event.waitUntil(
     caches.keys().then((keyList) => {
       return Promise.all(keyList.map((key) => {
-        if (key !== CACHE_NAME) {
+        if (key !== CACHE_NAME && key !== QUIZ_PACK_CACHE) {
           console.log('[ServiceWorker] Removing old cache:', key);
           return caches.delete(key);
         }
@@ -43,20 +59,253 @@ self.addEventListener('activate', (event) => {
     }).then(() => {
       // Take control of all pages immediately
       return self.clients.claim();
+    }).then(() => {
+      // Anything queued while we were being updated can go now
+      return replayOutbox().catch(() => {});
     })
   );
 });
 
+// ==================== OUTBOX (IndexedDB) ====================
+
+function openOutbox() {
+  return new Promise((resolve, reject) => {
+    const open = indexedDB.open(OUTBOX_DB_NAME, 1);
+    open.onupgradeneeded = () => {
+      open.result.createObjectStore(OUTBOX_STORE, { keyPath: 'idempotency_key' });
+    };
+    open.onsuccess = () => resolve(open.result);
+    open.onerror = () => reject(open.error);
+  });
+}
+
+function outboxTransaction(mode, work) {
+  return openOutbox().then((db) => new Promise((resolve, reject) => {
+    const tx = db.transaction(OUTBOX_STORE, mode);
+    const result = work(tx.objectStore(OUTBOX_STORE));
+    tx.oncomplete = () => resolve(result && 'result' in result ? result.result : undefined);
+    tx.onerror = () => reject(tx.error);
+  }));
+}
+
+function outboxAdd(payload) {
+  return outboxTransaction('readwrite', (store) => store.put({
+    idempotency_key: payload.idempotency_key,
+    learner: payload.learner || null,
+    payload: payload,
+    queued_at: Date.now()
+  }));
+}
+
+function outboxAll() {
+  return outboxTransaction('readonly', (store) => store.getAll());
+}
+
+function outboxDelete(key) {
+  return outboxTransaction('readwrite', (store) => store.delete(key));
+}
+
+async function outboxClearLearner(learner) {
+  const entries = await outboxAll();
+  await Promise.all(entries
+    .filter((entry) => entry.learner === learner)
+    .map((entry) => outboxDelete(entry.idempotency_key)));
+}
+
+function newIdempotencyKey() {
+  if (self.crypto && self.crypto.randomUUID) {
+    return self.crypto.randomUUID();
+  }
+  return Date.now().toString(36) + '-' + Math.random().toString(36).slice(2);
+}
+
+// Try the network first; if it is unreachable, queue the submission and answer 202
+async function submitQuizWithOutbox(request) {
+  const body = await request.clone().text();
+  try {
+    return await fetch(request);
+  } catch (error) {
+    let payload;
+    try {
+      payload = JSON.parse(body);
+    } catch (parseError) {
+      throw error;
+    }
+    if (!payload.idempotency_key) {
+      payload.idempotency_key = request.headers.get('Idempotency-Key') || newIdempotencyKey();
+    }
+    await outboxAdd(payload);
+    if (self.registration.sync) {
+      try {
+        await self.registration.sync.register(QUIZ_SYNC_TAG);
+      } catch (syncError) {
+        // Background Sync unavailable - pages ask us to flush when they come back online
+      }
+    }
+    console.log('[ServiceWorker] Quiz submission queued offline:', payload.idempotency_key);
+    return new Response(
+      JSON.stringify({
+        queued: true,
+        idempotency_key: payload.idempotency_key,
+        message: 'You are offline - your quiz will be submitted when you reconnect'
+      }),
+      { status: 202, headers: { 'Content-Type': 'application/json' } }
+    );
+  }
+}
+
+// Replay queued submissions (only `learner`'s when a page says who is signed in;
+// otherwise the server turns away other learners' with 409 learner_mismatch).
+// Throws if any should be retried so sync tries again later.
+async function replayOutbox(learner) {
+  const entries = await outboxAll();
+  let retryLater = false;
+
+  for (const entry of entries) {
+    if (!entry.learner) {
+      // Queued before submissions carried their owner - nobody can be credited safely
+      await outboxDelete(entry.idempotency_key);
+      continue;
+    }
+    if (learner && entry.learner !== learner) {
+      continue;  // Someone else's - kept until they sign in on this device again
+    }
+
+    let response;
+    try {
+      response = await fetch(SUBMIT_QUIZ_URL, {
+        method: 'POST',
+        credentials: 'same-origin',
+        redirect: 'manual',
+        headers: {
+          'Content-Type': 'application/json',
+          'Idempotency-Key': entry.idempotency_key
+        },
+        body: JSON.stringify(entry.payload)
+      });
+    } catch (error) {
+      retryLater = true;
+      break;  // Still offline - no point trying the rest
+    }
+
+    if (response.status === 409) {
+      const body = await response.clone().json().catch(() => ({}));
+      if (body.learner_mismatch) {
+        continue;  // Signed in as someone else - keep it for its owner
+      }
+    }
+
+    // 401 (session expired), 409 (still processing), 5xx and redirects are retried;
+    // success or a permanent rejection removes the entry
+    const retryable = response.type === 'opaqueredirect' ||
+      response.status === 401 || response.status === 409 || response.status >= 500;
+    if (retryable) {
+      retryLater = true;
+    } else {
+      await outboxDelete(entry.idempotency_key);
+      console.log('[ServiceWorker] Replayed quiz submission:', entry.idempotency_key, response.status);
+    }
+  }
+
+  if (retryLater) {
+    throw new Error('Quiz outbox not fully replayed');
+  }
+}
+
+// ==================== QUIZ PACKS ====================
+
+// Fetch the next pack for a topic/difficulty and keep it (and its images) for offline use.
+// It is cached under the learner's own URL, the one their page asks for.
+async function precacheQuizPack(topic, difficulty, learner) {
+  if (!learner) {
+    return;
+  }
+  const packUrl = QUIZ_PACK_PREFIX + encodeURIComponent(topic) + '/' + encodeURIComponent(difficulty) +
+    '?learner=' + encodeURIComponent(learner);
+  const cache = await caches.open(QUIZ_PACK_CACHE);
+  const response = await fetch(packUrl, { credentials: 'same-origin' });
+  if (!response.ok) {
+    return;  // 409 when the session is no longer this learner's
+  }
+  const pack = await response.clone().json();
+  if (pack.learner !== learner) {
+    return;
+  }
+  await cache.put(new URL(packUrl, self.location.origin).href, response);
+
+  const staticCache = await caches.open(CACHE_NAME);
+  await Promise.all((pack.images || []).map((imageUrl) =>
+    staticCache.match(imageUrl).then((hit) => hit || staticCache.add(imageUrl)).catch(() => {})
+  ));
+  console.log('[ServiceWorker] Precached quiz pack', pack.pack_id, 'for', topic, difficulty);
+}
+
+// Packs are single-use: serve a precached one once, otherwise go to the network.
+// The cache key includes ?learner=, so a page only ever gets its own learner's pack.
+async function serveQuizPack(request) {
+  const cache = await caches.open(QUIZ_PACK_CACHE);
+  const cached = await cache.match(request);
+  if (cached) {
+    await cache.delete(request);
+    return cached;
+  }
+  return fetch(request);
+}
+
+// ==================== LOGOUT ====================
+
+async function clearOfflineData(learner) {
+  await outboxClearLearner(learner).catch(() => {});
+  const cache = await caches.open(QUIZ_PACK_CACHE);
+  const requests = await cache.keys();
+  await Promise.all(requests
+    .filter((cached) => new URL(cached.url).searchParams.get('learner') === learner)
+    .map((cached) => cache.delete(cached)));
+  console.log('[ServiceWorker] Offline quiz data cleared for', learner);
+}
+
+// Last chance to send the leaving learner's queued quizzes while their session is
+// still valid, then nothing of theirs stays on the device for the next learner.
+// Other learners' entries are kept for their owners. (Navigations to /logout
+// come back as opaque redirects, so their header can't be read - those keep
+// everything, and the server still only credits queued quizzes to their owner.)
+async function logoutAndClear(request) {
+  await replayOutbox().catch(() => {});
+  const response = await fetch(request);
+  const learner = response.headers.get('Offline-Learner');
+  if (learner) {
+    await clearOfflineData(learner);
+  }
+  return response;
+}
+
 // Fetch event - serve from cache, fallback to network
 self.addEventListener('fetch', (event) => {
   const { request } = event;
   const url = new URL(request.url);
 
+  // Quiz submissions go through the offline outbox
+  if (request.method === 'POST' && url.pathname === SUBMIT_QUIZ_URL) {
+    event.respondWith(submitQuizWithOutbox(request));
+    return;
+  }
+
+  if (url.origin === self.location.origin && LOGOUT_URLS.includes(url.pathname)) {
+    event.respondWith(logoutAndClear(request));
+    return;
+  }
+
   // Skip non-GET requests
   if (request.method !== 'GET') {
     return;
   }
 
+  // Quiz packs may have been precached for offline play
+  if (url.pathname.startsWith(QUIZ_PACK_PREFIX)) {
+    event.respondWith(serveQuizPack(request));
+    return;
+  }
+
   // Skip API calls - always use network for fresh data
   if (url.pathname.startsWith('/api/')) {
     event.respondWith(
@@ -128,13 +377,25 @@ self.addEventListener('message', (event) => {
   if (event.data && event.data.type === 'SKIP_WAITING') {
     self.skipWaiting();
   }
+
+  if (event.data && event.data.type === 'PRECACHE_QUIZ_PACK') {
+    event.waitUntil(
+      precacheQuizPack(event.data.topic, event.data.difficulty, event.data.learner)
+        .catch((error) => console.log('[ServiceWorker] Quiz pack precache failed:', error))
+    );
+  }
+
+  // Pages without Background Sync support ask us to flush when they come back online
+  if (event.data && event.data.type === 'FLUSH_QUIZ_OUTBOX') {
+    event.waitUntil(replayOutbox(event.data.learner).catch(() => {}));
+  }
 });
 
-// Background sync for quiz submissions (future enhancement)
+// Background sync for quiz submissions queued while offline
 self.addEventListener('sync', (event) => {
-  if (event.tag === 'sync-quiz-results') {
+  if (event.tag === QUIZ_SYNC_TAG) {
     console.log('[ServiceWorker] Syncing quiz results...');
-    // Future: sync offline quiz attempts
+    event.waitUntil(replayOutbox());
   }
 });
 
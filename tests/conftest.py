@@ -0,0 +1,97 @@
+"""
+TEST DATABASE
+=============
+Every test run gets a scratch database with the production schema:
+instance/mathquiz.db is copied to a temporary directory and every
+migrate_*.py script is run against the copy (the tracked file is never
+written). With TEST_DATABASE_URI set to a PostgreSQL database, the migrated
+copy is then moved there with migrate_sqlite_to_postgres.py, so the copy
+tool is tested too. That database is emptied first - point it at a
+database used for nothing else.
+
+run_matrix.py runs the suite once per database.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import pytest
+from sqlalchemy import create_engine, text
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_DB = os.path.join(REPO, 'instance', 'mathquiz.db')
+
+# migrate_sqlite_to_postgres.py is run separately; migrate_tutorials.py has a hardcoded server path
+SKIP_MIGRATIONS = {'migrate_sqlite_to_postgres.py', 'migrate_tutorials.py'}
+
+
+def build_sqlite(workdir):
+    """Migrated copy of instance/mathquiz.db in workdir, returns its path"""
+    os.makedirs(os.path.join(workdir, 'instance'))
+    path = os.path.join(workdir, 'instance', 'mathquiz.db')
+    shutil.copyfile(SOURCE_DB, path)
+
+    env = dict(os.environ, DATABASE_URI=f'sqlite:///{path}', SCHEDULER_ENABLED='false',
+               PYTHONPATH=REPO)
+    for script in sorted(os.listdir(REPO)):
+        if not (script.startswith('migrate_') and script.endswith('.py')) or script in SKIP_MIGRATIONS:
+            continue
+        result = subprocess.run([sys.executable, os.path.join(REPO, script)], cwd=workdir, env=env,
+                                stdin=subprocess.DEVNULL, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"{script} failed:\n{result.stdout[-2000:]}\n{result.stderr[-2000:]}")
+    return path
+
+
+def build_postgres(uri, sqlite_path):
+    """Empty the PostgreSQL database and copy the migrated SQLite file into it"""
+    from migrate_sqlite_to_postgres import migrate_sqlite_to_postgres
+
+    engine = create_engine(uri)
+    with engine.begin() as conn:
+        conn.execute(text("DROP SCHEMA public CASCADE"))
+        conn.execute(text("CREATE SCHEMA public"))
+    engine.dispose()
+    migrate_sqlite_to_postgres(uri, sqlite_path)
+
+
+def pytest_configure(config):
+    sys.path.insert(0, REPO)
+    workdir = tempfile.mkdtemp(prefix='mathapp-tests-')
+    config._test_workdir = workdir
+
+    sqlite_path = build_sqlite(workdir)
+    uri = os.environ.get('TEST_DATABASE_URI')
+    if uri:
+        build_postgres(uri, sqlite_path)
+    else:
+        uri = f'sqlite:///{sqlite_path}'
+
+    # app.py reads these when it is first imported
+    os.environ['DATABASE_URI'] = uri
+    os.environ['SCHEDULER_ENABLED'] = 'false'
+
+
+def pytest_unconfigure(config):
+    workdir = getattr(config, '_test_workdir', None)
+    if workdir:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def pytest_report_header(config):
+    from sql_dialect import database_uri
+    return f"database: {database_uri().split('@')[-1]}"
+
+
+@pytest.fixture
+def ctx():
+    """An app context whose session is cleaned up afterwards"""
+    from app import app, db
+
+    with app.app_context():
+        yield db
+        db.session.rollback()
+        db.session.remove()
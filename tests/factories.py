@@ -0,0 +1,32 @@
+"""Rows the tests create, each with a unique email or code"""
+
+import uuid
+
+from sqlalchemy import text
+
+from sql_dialect import insert_returning_id
+
+
+def make_user(db, tag, created_at=None, role='student', points=0):
+    user_id = insert_returning_id(db, """
+        INSERT INTO users (email, password_hash, full_name, role, is_approved, created_at)
+        VALUES (:email, 'x', :name, :role, TRUE, :created_at)
+    """, {'email': f"{tag}-{uuid.uuid4().hex[:8]}@test.local", 'name': f"{tag} learner",
+          'role': role, 'created_at': created_at})
+    db.session.execute(text("INSERT INTO user_stats (user_id, total_points) VALUES (:uid, :points)"),
+                       {'uid': user_id, 'points': points})
+    return user_id
+
+
+def make_guest(db):
+    code = uuid.uuid4().hex[:8].upper()
+    db.session.execute(text("INSERT INTO guest_users (guest_code) VALUES (:code)"), {'code': code})
+    return code
+
+
+def make_raffle(db, entry_cost=10, max_entries=10):
+    return insert_returning_id(db, """
+        INSERT INTO raffles (name, prize_description, entry_cost, max_entries_per_student,
+                             total_entries, round_ticket_start, active_participants)
+        VALUES ('Test raffle', 'A prize', :cost, :max_entries, 0, 0, 0)
+    """, {'cost': entry_cost, 'max_entries': max_entries})
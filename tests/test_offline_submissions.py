@@ -0,0 +1,59 @@
+"""
+Offline quiz submissions: a receipt left pending by a request that died is
+taken over once it is older than QUIZ_RECEIPT_PENDING_TTL, and logging out
+names the leaving learner so the service worker clears only their data.
+"""
+
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+
+from app import app, get_valid_topics_from_db, QUIZ_RECEIPT_PENDING_TTL
+
+from tests.factories import make_user
+
+
+def student_client(user_id):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+        session['user_role'] = 'student'
+    return client
+
+
+@pytest.mark.parametrize('age, taken_over', [(QUIZ_RECEIPT_PENDING_TTL * 2, True),
+                                             (QUIZ_RECEIPT_PENDING_TTL / 10, False)])
+def test_pending_receipt_expires(ctx, age, taken_over):
+    db = ctx
+    user_id = make_user(db, 'offline')
+    key = f"offline-{uuid.uuid4().hex}"
+    db.session.execute(text("""
+        INSERT INTO quiz_submission_receipts (idempotency_key, user_id, status, created_at)
+        VALUES (:key, :uid, 'pending', :at)
+    """), {'key': key, 'uid': user_id, 'at': datetime.utcnow() - age})
+    topic = sorted(get_valid_topics_from_db())[0]
+    db.session.commit()
+
+    response = student_client(user_id).post('/api/submit-quiz', headers={'Idempotency-Key': key}, json={
+        'learner': f"user:{user_id}", 'topic': topic, 'difficulty': 'beginner',
+        'score': 8, 'total_questions': 10, 'percentage': 80, 'time_taken': 60
+    })
+    db.session.rollback()
+    status = db.session.execute(text("SELECT status FROM quiz_submission_receipts WHERE idempotency_key = :key"),
+                                {'key': key}).scalar()
+    if taken_over:
+        assert response.status_code == 201, response.get_json()
+        assert status == 'completed'
+    else:
+        assert response.status_code == 409 and response.get_json()['retry']
+        assert status == 'pending'
+
+
+def test_logout_names_leaving_learner(ctx):
+    user_id = make_user(ctx, 'leaving')
+    ctx.session.commit()
+    response = student_client(user_id).post('/api/logout')
+    assert response.headers['Offline-Learner'] == f"user:{user_id}"
+    assert 'Offline-Learner' not in app.test_client().post('/api/logout').headers
@@ -0,0 +1,246 @@
+"""
+Raw SQL that has to behave the same on SQLite and PostgreSQL: scalar
+MIN/MAX, BOOLEAN vs INTEGER flags, subquery aliases, temporary tables,
+timestamp sort keys and 64-bit rank keys. Run on both with run_matrix.py.
+"""
+
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text, inspect
+from sqlalchemy.exc import IntegrityError
+
+from app import (app, add_raffle_tickets, select_raffle_winner, RaffleIntegrityError,
+                 record_championship_result, recompute_all_streaks, get_who_am_i_images,
+                 get_sample_pool, sample_pool_key, build_prize_price_list, job_scheduler)
+from admin_user_listing import SORTS, list_users, count_users
+from bulk_delete import bulk_delete
+from mastery_engine import (MASTERY_DIFFICULTIES, recalculate_mastery, user_topics_mastered,
+                            guest_topics_mastered, guest_mastery_summary)
+from sql_dialect import insert_returning_id, greatest, least, flag_is_set, is_sqlite
+
+from tests.factories import make_user, make_guest, make_raffle
+
+
+def add_attempt(db, user_id, topic, difficulty, score, completed_at, total=10):
+    db.session.execute(text("""
+        INSERT INTO quiz_attempts (user_id, topic, difficulty, score, total_questions, percentage, completed_at)
+        VALUES (:uid, :topic, :difficulty, :score, :total, :pct, :at)
+    """), {'uid': user_id, 'topic': topic, 'difficulty': difficulty, 'score': score,
+           'total': total, 'pct': score * 100.0 / total if total else 0, 'at': completed_at})
+
+
+def test_dialect_helpers(ctx):
+    row = ctx.session.execute(text(
+        f"SELECT {greatest('2', '7')}, {least('2', '7')}, {flag_is_set('1')}, {flag_is_set('0')}"
+    )).fetchone()
+    assert (row[0], row[1]) == (7, 2)
+    assert bool(row[2]) and not bool(row[3])
+
+
+def test_championship_rank_key_fits_large_totals(ctx):
+    db = ctx
+    race_id = db.session.execute(text("SELECT MIN(id) FROM race_calendar")).scalar()
+    season = 2900 + uuid.uuid4().int % 99
+    leader = make_user(db, 'leader')
+    chaser = make_user(db, 'chaser')
+    for user_id, points, wins in ((leader, 50000, 1500), (chaser, 49999, 3)):
+        db.session.execute(text("""
+            INSERT INTO championship_standings (season_year, user_id, total_points, wins, podiums, best_finish)
+            VALUES (:year, :uid, :points, :wins, 4, 1)
+        """), {'year': season, 'uid': user_id, 'points': points, 'wins': wins})
+
+    assert record_championship_result(season, race_id, None, user_id=chaser) == 1
+    assert record_championship_result(season, race_id, None, user_id=leader) == 1
+
+    key = db.session.execute(text("""
+        SELECT rank_key FROM championship_standings WHERE season_year = :year AND user_id = :uid
+    """), {'year': season, 'uid': leader}).scalar()
+    assert key == ((50000 * 1000 + 999) * 1000 + 4) * 100 + 98
+
+
+def test_recompute_streaks_keeps_longest(ctx):
+    db = ctx
+    veteran = make_user(db, 'veteran')
+    newcomer = make_user(db, 'newcomer')
+    db.session.execute(text("UPDATE user_stats SET longest_streak_days = 50 WHERE user_id = :uid"), {'uid': veteran})
+    for user_id in (veteran, newcomer):
+        add_attempt(db, user_id, 'arithmetic', 'beginner', 8, datetime.utcnow() - timedelta(hours=1))
+    db.session.commit()
+
+    recompute_all_streaks()
+
+    longest = dict(db.session.execute(text("""
+        SELECT user_id, longest_streak_days FROM user_stats WHERE user_id IN (:a, :b)
+    """), {'a': veteran, 'b': newcomer}).fetchall())
+    assert longest[veteran] == 50
+    assert longest[newcomer] == 1
+
+
+def test_mastery_engine(ctx):
+    db = ctx
+    topic = f"topic_{uuid.uuid4().hex[:6]}"
+    user_id = make_user(db, 'master')
+    guest = make_guest(db)
+    at = datetime.utcnow() - timedelta(minutes=1)
+    for difficulty in MASTERY_DIFFICULTIES:
+        add_attempt(db, user_id, topic, difficulty, 10, at)
+        add_attempt(db, user_id, topic, difficulty, 0, at, total=0)
+        db.session.execute(text("""
+            INSERT INTO guest_quiz_attempts (guest_code, topic, difficulty, score, total_questions, completed_at)
+            VALUES (:code, :topic, :difficulty, 10, 10, :at)
+        """), {'code': guest, 'topic': topic, 'difficulty': difficulty, 'at': at})
+    db.session.commit()
+
+    result = recalculate_mastery(db, full=True)
+    assert result['learners'] >= 1
+
+    rows = db.session.execute(text("""
+        SELECT attempts, is_mastered FROM topic_progress WHERE user_id = :uid AND topic = :topic
+    """), {'uid': user_id, 'topic': topic}).fetchall()
+    assert len(rows) == len(MASTERY_DIFFICULTIES)
+    assert all(r.attempts == 1 and r.is_mastered for r in rows)
+    assert user_topics_mastered(db, user_id) == 1
+    assert db.session.execute(text("SELECT topics_mastered FROM user_stats WHERE user_id = :uid"),
+                              {'uid': user_id}).scalar() == 1
+
+    assert guest_topics_mastered(db, guest) == 1
+    summary = guest_mastery_summary(db)
+    assert summary['mastered_topics'] >= 1 and isinstance(summary['mastered_topics'], int)
+
+
+@pytest.mark.parametrize('sort', sorted(SORTS))
+@pytest.mark.parametrize('direction', ['asc', 'desc'])
+def test_admin_listing_pages_every_sort(ctx, sort, direction):
+    db = ctx
+    tag = f"list{uuid.uuid4().hex[:6]}"
+    base = datetime(2025, 1, 1)
+    expected = {make_user(db, tag, created_at=base + timedelta(days=i)) for i in range(4)}
+    expected.add(make_user(db, tag, created_at=None))
+    db.session.commit()
+
+    seen, cursor = [], None
+    while True:
+        page = list_users(db, search=tag, sort=sort, direction=direction, limit=2, cursor=cursor)
+        seen.extend(u['id'] for u in page['users'])
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+    assert sorted(seen) == sorted(expected)
+
+    assert count_users(db, include_guests=False) >= len(expected)
+
+
+def raffle_row(db, raffle_id):
+    return db.session.execute(text("SELECT * FROM raffles WHERE id = :id"), {'id': raffle_id}).fetchone()
+
+
+def winner_of(db, raffle, ticket, monkeypatch):
+    monkeypatch.setattr('secrets.randbelow', lambda n: ticket - raffle.round_ticket_start)
+    return select_raffle_winner(raffle)
+
+
+def test_raffle_tickets_and_winner_lookup(ctx, monkeypatch):
+    db = ctx
+    raffle_id = make_raffle(db)
+    first, second = make_guest(db), make_guest(db)
+    add_raffle_tickets(raffle_id, guest_code=first, tickets=3)
+    add_raffle_tickets(raffle_id, guest_code=second, tickets=2)
+    add_raffle_tickets(raffle_id, guest_code=first, tickets=1)
+    db.session.commit()
+
+    raffle = raffle_row(db, raffle_id)
+    assert (raffle.total_entries, raffle.active_participants) == (6, 2)
+    owners = [winner_of(db, raffle, ticket, monkeypatch)[1] for ticket in range(6)]
+    assert owners == [first, first, first, second, second, first]
+
+    db.session.execute(text("DELETE FROM raffle_ticket_blocks WHERE raffle_id = :id AND ticket_start = 3"),
+                       {'id': raffle_id})
+    with pytest.raises(RaffleIntegrityError):
+        winner_of(db, raffle, 4, monkeypatch)
+
+
+def test_bulk_delete_guest_releases_raffle_tickets(ctx, monkeypatch):
+    db = ctx
+    raffle_id = make_raffle(db)
+    leaving, staying = make_guest(db), make_guest(db)
+    student = make_user(db, 'raffler')
+    add_raffle_tickets(raffle_id, guest_code=staying, tickets=2)
+    add_raffle_tickets(raffle_id, guest_code=leaving, tickets=3)
+    add_raffle_tickets(raffle_id, student_id=student, tickets=1)
+    db.session.commit()
+
+    summary = bulk_delete(db, 'guest', [leaving])
+    assert summary['deleted'] == 1
+
+    raffle = raffle_row(db, raffle_id)
+    assert (raffle.total_entries, raffle.active_participants) == (3, 2)
+    starts = [r.ticket_start for r in db.session.execute(text("""
+        SELECT ticket_start FROM raffle_ticket_blocks WHERE raffle_id = :id ORDER BY ticket_start
+    """), {'id': raffle_id}).fetchall()]
+    assert starts == [0, 2]
+    owners = [winner_of(db, raffle, ticket, monkeypatch) for ticket in range(3)]
+    assert [o[1] for o in owners[:2]] == [staying, staying]
+    assert owners[2][0] == student
+
+
+def test_flag_columns(ctx):
+    db = ctx
+    get_who_am_i_images('no-such-topic', 'beginner')
+    get_sample_pool(sample_pool_key('bonus', 'no-such-category'))
+
+    school_id = insert_returning_id(db, """
+        INSERT INTO prize_schools (name, status, points_multiplier) VALUES ('Test school', 'active', 1.0)
+    """)
+    prize_id = insert_returning_id(db, """
+        INSERT INTO prizes (name, base_point_cost, tier, prize_type, sort_order, is_active)
+        VALUES ('Test prize', 100, 'bronze', 'virtual', 0, TRUE)
+    """)
+    db.session.commit()
+    names = [p['name'] for p in build_prize_price_list(school_id, 1.0)['prizes']]
+    assert 'Test prize' in names
+
+    db.session.execute(text("""
+        INSERT INTO school_prizes (school_id, prize_id, is_enabled) VALUES (:school, :prize, FALSE)
+    """), {'school': school_id, 'prize': prize_id})
+    db.session.commit()
+    names = [p['name'] for p in build_prize_price_list(school_id, 1.0)['prizes']]
+    assert 'Test prize' not in names
+
+
+def test_guest_code_claim_uses_free_index(ctx):
+    db = ctx
+    if not is_sqlite(db):
+        pytest.skip("partial index predicate matching is checked on SQLite")
+    plan = ' '.join(str(row[-1]) for row in db.session.execute(text("""
+        EXPLAIN QUERY PLAN SELECT code FROM guest_code_pool
+        WHERE is_free = TRUE AND slot >= 5 ORDER BY slot LIMIT 1
+    """)).fetchall())
+    assert 'idx_guest_code_pool_free' in plan
+
+
+def test_scheduler_enable_flag(ctx):
+    name = next(iter(job_scheduler.jobs))
+
+    def enabled():
+        return next(job['enabled'] for job in job_scheduler.status()['jobs'] if job['name'] == name)
+
+    assert job_scheduler.set_enabled(name, False) and enabled() is False
+    assert job_scheduler.set_enabled(name, True) and enabled() is True
+
+
+def test_visible_topics_route(ctx):
+    response = app.test_client().get('/api/topics-config')
+    assert response.status_code == 200
+
+
+def test_constraints_carried_over(ctx):
+    db = ctx
+    referred = {fk['referred_table'] for fk in inspect(db.engine).get_foreign_keys('raffle_ticket_blocks')}
+    assert {'raffles', 'raffle_entries'} <= referred
+
+    code = make_guest(db)
+    db.session.commit()
+    with pytest.raises(IntegrityError):
+        db.session.execute(text("INSERT INTO guest_users (guest_code) VALUES (:code)"), {'code': code})
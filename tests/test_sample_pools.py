@@ -0,0 +1,56 @@
+"""
+Cached sample pools (quick play and bonus question ids) pick up questions
+added, edited or removed through the ORM - the admin routes and the question
+generators - as soon as the change is committed.
+"""
+
+import uuid
+
+from app import Question, BonusQuestion, get_sample_pool, sample_pool_key, _sample_pools
+from sql_dialect import insert_returning_id
+
+
+def bonus_question(db, category):
+    # Inserted as SQL: bonus_questions.is_active is still INTEGER in older databases
+    question_id = insert_returning_id(db, """
+        INSERT INTO bonus_questions (category, correct_answer, option_a, option_b, option_c, option_d,
+                                     image_url, is_active, times_shown, times_correct)
+        VALUES (:category, 'A', 'A', 'B', 'C', 'D', '/static/x.png', 1, 0, 0)
+    """, {'category': category})
+    db.session.commit()
+    return db.session.get(BonusQuestion, question_id)
+
+
+def test_new_question_joins_cached_pool(ctx):
+    db = ctx
+    key = sample_pool_key('questions', 'beginner')
+    get_sample_pool(key)
+
+    question = Question(topic='arithmetic', difficulty='beginner', question_text='1 + 1?', option_a='2',
+                        option_b='3', option_c='4', option_d='5', correct_answer=0, explanation='Two')
+    db.session.add(question)
+    db.session.commit()
+    assert question.id in get_sample_pool(key)
+
+
+def test_bonus_edits_refresh_cached_pools(ctx):
+    db = ctx
+    old, new = f"cat_{uuid.uuid4().hex[:6]}", f"cat_{uuid.uuid4().hex[:6]}"
+    question = bonus_question(db, old)
+    old_key, new_key = sample_pool_key('bonus', old), sample_pool_key('bonus', new)
+    assert list(get_sample_pool(old_key)) == [question.id]
+    assert list(get_sample_pool(new_key)) == []
+
+    # Counters don't change which pool a question is in, so the cache is kept
+    question.times_shown = 5
+    db.session.commit()
+    assert old_key in _sample_pools
+
+    question.category = new
+    db.session.commit()
+    assert list(get_sample_pool(old_key)) == []
+    assert list(get_sample_pool(new_key)) == [question.id]
+
+    db.session.delete(question)
+    db.session.commit()
+    assert list(get_sample_pool(new_key)) == []
@@ -0,0 +1,90 @@
+"""
+A spend retried with the same Idempotency-Key gets the stored response back
+(marked Idempotent-Replay), even when the first request has since changed the
+route's own checks - item owned, entry cap reached, budget used.
+"""
+
+import uuid
+
+import pytest
+from sqlalchemy import text
+
+from app import app, FEATURE_FLAGS
+from sql_dialect import insert_returning_id
+
+from tests.factories import make_user, make_raffle
+
+POINTS = 100000
+
+
+def points_of(db, user_id):
+    return db.session.execute(text("SELECT total_points FROM user_stats WHERE user_id = :uid"),
+                              {'uid': user_id}).scalar()
+
+
+def prize_redemption(db, user_id, session):
+    school_id = insert_returning_id(db, """
+        INSERT INTO prize_schools (name, status, points_multiplier) VALUES ('Replay school', 'approved', 1.0)
+    """)
+    prize_id = insert_returning_id(db, """
+        INSERT INTO prizes (name, base_point_cost, tier, prize_type, sort_order, minimum_level, is_active)
+        VALUES ('Replay prize', 10, 'bronze', 'virtual', 0, 0, TRUE)
+    """)
+    session['prize_school_id'] = school_id
+    return '/api/prizes/redeem', {'prize_id': prize_id}, lambda: POINTS - points_of(db, user_id)
+
+
+def avatar_purchase(db, user_id, session):
+    item_id = insert_returning_id(db, """
+        INSERT INTO avatar_items (item_type, item_key, display_name, point_cost, is_default, is_active)
+        VALUES ('hat', :key, 'Replay hat', 25, FALSE, TRUE)
+    """, {'key': f"replay_{uuid.uuid4().hex[:8]}"})
+    return '/api/avatar/purchase', {'item_id': item_id}, lambda: POINTS - points_of(db, user_id)
+
+
+def raffle_entry(db, user_id, session):
+    raffle_id = make_raffle(db, entry_cost=10, max_entries=1)
+    return f'/api/raffles/{raffle_id}/enter', {'entries': 1}, lambda: POINTS - points_of(db, user_id)
+
+
+def car_upgrade(db, user_id, session):
+    upgrade_id = insert_returning_id(db, """
+        INSERT INTO car_upgrades (upgrade_number, category, name, cost, performance_boost)
+        VALUES (:number, 'engine', 'Replay turbo', 500, 1)
+    """, {'number': 900000 + uuid.uuid4().int % 99999})
+    db.session.execute(text("""
+        INSERT INTO user_race_cars (user_id, parts_unlocked, upgrade_budget_used) VALUES (:uid, 50, 0)
+    """), {'uid': user_id})
+    return '/api/racing-car/upgrades/buy', {'upgrade_id': upgrade_id}, lambda: db.session.execute(text(
+        "SELECT upgrade_budget_used FROM user_race_cars WHERE user_id = :uid"
+    ), {'uid': user_id}).scalar()
+
+
+@pytest.mark.parametrize('setup', [prize_redemption, avatar_purchase, raffle_entry, car_upgrade],
+                         ids=lambda setup: setup.__name__)
+def test_retried_spend_replays_stored_response(ctx, monkeypatch, setup):
+    db = ctx
+    for flag in ('PRIZE_SYSTEM_ENABLED', 'AVATAR_SYSTEM_ENABLED', 'AVATAR_SHOP_ENABLED'):
+        monkeypatch.setitem(FEATURE_FLAGS, flag, True)
+
+    user_id = make_user(db, 'spender', points=POINTS)
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+        session['user_role'] = 'student'
+        url, payload, charged = setup(db, user_id, session)
+    db.session.commit()
+
+    headers = {'Idempotency-Key': f"replay-{uuid.uuid4().hex}"}
+    first = client.post(url, json=payload, headers=headers)
+    assert first.status_code == 200, first.get_json()
+    db.session.rollback()
+    spent = charged()
+    assert spent > 0
+
+    retry = client.post(url, json=payload, headers=headers)
+    assert retry.status_code == 200
+    assert retry.headers.get('Idempotent-Replay') == 'true'
+    assert retry.get_json() == first.get_json()
+    db.session.rollback()
+    assert charged() == spent
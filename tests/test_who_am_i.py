@@ -0,0 +1,48 @@
+"""
+Who-am-I dealing: a quiz never gets an image it has already been shown, even
+when its images were dealt by different workers (each with its own decks).
+"""
+
+import uuid
+
+from sqlalchemy import text
+
+from app import next_who_am_i_image, _who_am_i_decks
+from sql_dialect import insert_returning_id
+
+from tests.factories import make_user
+
+
+def test_quiz_never_repeats_an_image_across_workers(ctx):
+    db = ctx
+    topic = f"topic_{uuid.uuid4().hex[:6]}"
+    images = set()
+    for n in range(5):
+        image_id = insert_returning_id(db, """
+            INSERT INTO who_am_i_images (topic, difficulty, image_filename, answer, active)
+            VALUES (:topic, 'beginner', :filename, 'answer', 1)
+        """, {'topic': topic, 'filename': f"{topic}_{n}.png"})
+        db.session.execute(text("INSERT INTO who_am_i_image_topics (image_id, topic) VALUES (:id, :topic)"),
+                           {'id': image_id, 'topic': topic})
+        images.add(image_id)
+    user_id = make_user(db, 'whoami')
+    quiz_id = 900000 + uuid.uuid4().int % 99999
+    db.session.commit()
+
+    # Two workers dealing in turn, each keeping the deck it built for this quiz
+    workers = [{}, {}]
+    dealt = []
+    for n in range(len(images)):
+        worker = workers[n % 2]
+        _who_am_i_decks.pop(quiz_id, None)
+        _who_am_i_decks.update(worker)
+        image_id = next_who_am_i_image(topic, 'beginner', quiz_id)[0]
+        worker[quiz_id] = _who_am_i_decks[quiz_id]
+        dealt.append(image_id)
+        db.session.execute(text("""
+            INSERT INTO who_am_i_sessions (user_id, quiz_attempt_id, image_id, tiles_mask, guesses_made)
+            VALUES (:uid, :quiz, :image, 0, 0)
+        """), {'uid': user_id, 'quiz': quiz_id, 'image': image_id})
+
+    assert sorted(dealt) == sorted(images)
+    assert next_who_am_i_image(topic, 'beginner', quiz_id) is None
@@ -602,7 +602,7 @@ def register_topic_routes(app, db):
                        s.name as strand_name
                 FROM topics t
                 LEFT JOIN strands s ON t.strand_id = s.id
-                WHERE t.is_visible = 1
+                WHERE t.is_visible = TRUE
                 ORDER BY s.sort_order, t.sort_order
             """)).fetchall()
             